@@ -0,0 +1,186 @@
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from keyword_classifier import KeywordClassifier
+
+# Ingredient mapping for consistent matching
+INGREDIENT_MAPPINGS = {
+    # Available ingredients and their synonyms/variations
+    "rice": ["rice", "basmati rice", "white rice", "cooked rice"],
+    "dal": ["dal", "lentils", "toor dal", "moong dal", "masoor dal", "chana dal"],
+    "chapati_flour": ["chapati flour", "wheat flour", "atta", "flour", "whole wheat flour"],
+    "basic_spices": ["basic spices", "spices", "turmeric", "cumin", "coriander", "garam masala",
+                    "red chili powder", "cumin powder", "coriander powder", "spice powder", "masala"],
+    "curd": ["curd", "yogurt", "dahi", "greek yogurt", "hung curd"],
+    "banana": ["banana", "bananas", "ripe banana"],
+    "roasted_chana": ["roasted chana", "chana", "chickpeas", "roasted chickpeas", "bhuna chana"],
+    "cooking_oil": ["cooking oil", "oil", "vegetable oil", "sunflower oil", "mustard oil", "ghee"],
+    # Categories that can include multiple items
+    "seasonal_vegetables": ["onion", "onions", "tomato", "tomatoes", "bell pepper", "capsicum",
+                           "cauliflower", "cabbage", "carrots", "beans", "spinach", "seasonal vegetables", "vegetables"],
+    "basic_aromatics": ["ginger", "garlic", "green chili", "curry leaves"],
+    "common_condiments": ["lemon juice", "lime juice", "salt", "sugar"],
+}
+
+# Always available, whatever the pantry says
+BASIC_ESSENTIALS = ("water", "salt")
+
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_QUANTITY_RE = re.compile(r"\d+.*?(tsp|tbsp|cup|g|kg|ml|l|inch|clove|piece)s?\b", re.IGNORECASE)
+_NAME_KEYS = ("name", "ingredient", "ingredientName", "ingredient_name", "item")
+# Raw ingredient strings whose resolution is remembered
+_CACHE_SIZE = 8192
+
+
+def ingredient_name(ingredient) -> str:
+    """The name of an ingredient given as a string or a dict from a generated recipe."""
+    if isinstance(ingredient, dict):
+        for key in _NAME_KEYS:
+            if ingredient.get(key):
+                return str(ingredient[key]).strip()
+        return ""
+    if isinstance(ingredient, str):
+        return ingredient.strip()
+    return ""
+
+
+def clean_name(name: str) -> str:
+    """Drop parenthesised notes and leading quantities ('2 tbsp ghee (melted)' -> 'ghee')."""
+    return _QUANTITY_RE.sub("", _PAREN_RE.sub("", name)).strip()
+
+
+class AvailabilityEngine:
+    """
+    Resolves ingredients against a pantry using INGREDIENT_MAPPINGS.
+
+    An ingredient belongs to every category with a synonym that contains it or
+    is contained in it. Those categories are found with one scan of the
+    ingredient (a KeywordClassifier over the synonyms) plus a substring test
+    per category, and remembered with the cleaned name per raw ingredient
+    string, so resolving a shopping list against a Pantry is a dictionary
+    lookup per item.
+    """
+
+    def __init__(self, mappings: Dict[str, List[str]] = INGREDIENT_MAPPINGS):
+        self.mappings = {key.lower(): [s.lower() for s in synonyms] for key, synonyms in mappings.items()}
+        self._contained = KeywordClassifier(self.mappings)
+        # "\0" never occurs in an ingredient, so `name in joined` means a synonym contains it
+        self._joined = {key: "\0".join(synonyms) for key, synonyms in self.mappings.items()}
+        self._cache: Dict[str, Tuple[str, str, FrozenSet[str]]] = {}
+        self._lock = threading.Lock()
+
+    def categories_of(self, key: str) -> FrozenSet[str]:
+        """Categories a lower-cased, stripped ingredient name belongs to."""
+        found = set(self._contained.classify(key))
+        found.update(category for category, joined in self._joined.items() if key in joined)
+        return frozenset(found)
+
+    def lookup(self, original: str) -> Tuple[str, str, FrozenSet[str]]:
+        """(cleaned name, lookup key, categories) for a raw ingredient string."""
+        entry = self._cache.get(original)
+        if entry is None:
+            name = clean_name(original)
+            key = name.lower().strip()
+            entry = (name, key, self.categories_of(key))
+            with self._lock:
+                if len(self._cache) >= _CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[original] = entry
+        return entry
+
+    def pantry(self, available_items: Iterable[str]) -> "Pantry":
+        return Pantry(self, available_items)
+
+
+class Pantry:
+    """
+    A pantry prepared for lookups: lower-cased items, and for each category
+    key in the pantry its position. Only a category key stocks a category;
+    an item that is one of its synonyms ("spinach") stocks just itself, not
+    its siblings ("onion").
+    """
+
+    def __init__(self, engine: AvailabilityEngine, available_items: Iterable[str]):
+        self.engine = engine
+        self.items = set()
+        self.rank: Dict[str, int] = {}
+        for pos, item in enumerate(available_items):
+            item = str(item).lower()
+            self.items.add(item)
+            if item in engine.mappings:
+                self.rank.setdefault(item, pos)
+        self.has_spices = "basic_spices" in self.items
+
+    def check(self, name: str) -> Tuple[bool, str]:
+        """
+        (is_available, matched_category) for one ingredient name: the name
+        itself if stocked, else the category of the earliest pantry item it
+        maps to, "basic_spices" for powders and pastes, "basic_essential"
+        for water and salt.
+        """
+        key = name.lower().strip()
+        return self._check(key, self.engine.categories_of(key))
+
+    def _check(self, key: str, categories: FrozenSet[str]) -> Tuple[bool, str]:
+        if key in self.items:
+            return True, key
+        best = None
+        for category in categories:
+            pos = self.rank.get(category)
+            if pos is not None and (best is None or pos < best[0]):
+                best = (pos, category)
+        if best is not None:
+            return True, best[1]
+        if self.has_spices and ("powder" in key or "paste" in key):
+            return True, "basic_spices"
+        if key in BASIC_ESSENTIALS:
+            return True, "basic_essential"
+        return False, ""
+
+    def resolve(self, ingredients: Iterable) -> List[dict]:
+        """Every ingredient with its cleaned name, availability and matched category."""
+        results = []
+        for ingredient in ingredients:
+            original = ingredient_name(ingredient)
+            if not original:
+                continue
+            name, key, categories = self.engine.lookup(original)
+            available, matched = self._check(key, categories)
+            results.append({"ingredient": original, "name": name, "available": available, "matched": matched})
+        return results
+
+    def shopping_list(self, ingredients: Iterable) -> Tuple[List[str], List[dict]]:
+        """(sorted title-cased names to buy, per-ingredient results)"""
+        results = self.resolve(ingredients)
+        to_buy = sorted({r["name"].title() for r in results if not r["available"]})
+        return to_buy, results
+
+    def rank_recipes(self, recipes: Iterable[dict], limit: Optional[int] = None) -> List[dict]:
+        """
+        Recipes ({"name", "ingredients"}) ordered by how few ingredients are
+        missing, ties in the given order, each with its shopping list.
+        """
+        ranked = []
+        for recipe in recipes:
+            ingredients = recipe.get("ingredients") or []
+            if isinstance(ingredients, str):
+                ingredients = ingredients.split(",")
+            to_buy, results = self.shopping_list(ingredients)
+            ranked.append({
+                "name": recipe.get("name", ""),
+                "missing": to_buy,
+                "available": sum(1 for r in results if r["available"]),
+                "total": len(results),
+            })
+        ranked.sort(key=lambda r: len(r["missing"]))
+        return ranked if limit is None else ranked[:limit]
+
+
+engine = AvailabilityEngine()
+
+
+def engine_for(mappings: Optional[Dict[str, List[str]]]) -> AvailabilityEngine:
+    if mappings is None or mappings is INGREDIENT_MAPPINGS:
+        return engine
+    return AvailabilityEngine(mappings)
@@ -0,0 +1,105 @@
+"""
+Benchmark for resolving recipe shopping lists against a pantry.
+
+Builds pantries of --pantry items (INGREDIENT_MAPPINGS categories plus
+ingredient names from recipes1.json) and a batch of --recipes recipes, then
+computes every recipe's shopping list with the original recipe_generator
+functions and with availability.Pantry, checking both agree.
+
+Usage:
+    python benchmarks/bench_availability.py [--pantry 500] [--recipes 2000] [--seed 7]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import availability  # noqa: E402
+from availability import INGREDIENT_MAPPINGS  # noqa: E402
+from recipe_index import RECIPES_FILE, load_recipes  # noqa: E402
+
+
+def check_ingredient_availability(ingredient_name, available_items, mappings):
+    """recipe_generator.check_ingredient_availability before the engine."""
+    ingredient_lower = ingredient_name.lower().strip()
+    available_lower = [item.lower() for item in available_items]
+    if ingredient_lower in available_lower:
+        return True, ingredient_lower
+    for available_item in available_items:
+        available_item_lower = available_item.lower()
+        if available_item_lower in mappings:
+            for synonym in mappings[available_item_lower]:
+                if synonym.lower() == ingredient_lower or ingredient_lower in synonym.lower() or synonym.lower() in ingredient_lower:
+                    return True, available_item_lower
+    if any(word in ingredient_lower for word in ['powder', 'paste']) and 'basic_spices' in available_lower:
+        return True, 'basic_spices'
+    if ingredient_lower in ['water', 'salt']:
+        return True, 'basic_essential'
+    return False, ""
+
+
+def ingredients_to_buy(recipe_ingredients, available_items):
+    """recipe_generator.get_consistent_ingredients_to_buy before the engine, without the logging."""
+    to_buy = []
+    for ingredient in recipe_ingredients:
+        name = ingredient.strip()
+        if not name:
+            continue
+        name = re.sub(r'\([^)]*\)', '', name)
+        name = re.sub(r'\d+.*?(tsp|tbsp|cup|g|kg|ml|l|inch|clove|piece)s?\b', '', name, flags=re.IGNORECASE)
+        name = name.strip()
+        available, _ = check_ingredient_availability(name, available_items, INGREDIENT_MAPPINGS)
+        if not available and name.title() not in to_buy:
+            to_buy.append(name.title())
+    to_buy.sort()
+    return to_buy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pantry", type=int, default=500)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = load_recipes(RECIPES_FILE)
+    if not base:
+        raise SystemExit(f"no recipes in {RECIPES_FILE}")
+    batch = []
+    for _ in range(args.recipes):
+        r = rng.choice(base)
+        batch.append([i for i in (r.get("TranslatedIngredients") or "").split(",") if i.strip()])
+    # category keys, synonyms (which stock only themselves) and recipe ingredients
+    synonyms = sorted({s for words in INGREDIENT_MAPPINGS.values() for s in words})
+    names = sorted({i.strip().lower() for r in base for i in (r.get("Cleaned-Ingredients") or "").split(",")} - set(synonyms))
+    categories = list(INGREDIENT_MAPPINGS)
+    pantry = rng.sample(categories, len(categories) // 2)
+    pantry += rng.sample(synonyms, len(synonyms) // 3)
+    pantry += rng.sample(names, min(len(names), max(0, args.pantry - len(pantry))))
+    while len(pantry) < args.pantry:
+        pantry.append(f"item {len(pantry)}")
+    rng.shuffle(pantry)
+
+    t = time.perf_counter()
+    expected = [ingredients_to_buy(r, pantry) for r in batch]
+    scan_s = time.perf_counter() - t
+    t = time.perf_counter()
+    prepared = availability.engine.pantry(pantry)
+    got = [prepared.shopping_list(r)[0] for r in batch]
+    engine_s = time.perf_counter() - t
+    if got != expected:
+        raise SystemExit("availability engine disagrees with the original shopping lists")
+
+    ingredients = sum(len(r) for r in batch)
+    print(f"{len(batch)} recipes ({ingredients} ingredients) against a {len(pantry)}-item pantry")
+    print(f"original   {scan_s * 1000:9.1f} ms   {scan_s * 1e6 / ingredients:7.2f} us/ingredient")
+    print(f"engine     {engine_s * 1000:9.1f} ms   {engine_s * 1e6 / ingredients:7.2f} us/ingredient   ({scan_s / engine_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
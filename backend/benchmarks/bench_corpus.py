@@ -0,0 +1,122 @@
+"""
+Memory benchmark for the columnar recipe corpus.
+
+Writes recipes1.json scaled up to --recipes entries (copies with renamed
+dishes and reordered instructions) to a temporary file, then loads it in a
+fresh interpreter per mode: "dicts" keeps the json.load list of dicts as
+family_api used to, "corpus" builds a RecipeCorpus. Reports the resident set
+size added and the live Python heap (tracemalloc) for each, plus the cost of
+reading recipes back.
+
+Usage:
+    python benchmarks/bench_corpus.py [--recipes 10000] [--seed 7]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe_corpus import RECIPES_FILE, RecipeCorpus, iter_recipes, read_recipes  # noqa: E402
+
+PREFIXES = ["Homestyle", "Spicy", "Kerala", "Punjabi", "Quick", "Rustic", "Mini", "Baked", "Tawa", "Dhaba"]
+
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_file(path, n, rng):
+    base = read_recipes(RECIPES_FILE)
+    recipes = []
+    while len(recipes) < n:
+        for r in base:
+            if len(recipes) >= n:
+                break
+            copy = dict(r)
+            if len(recipes) >= len(base):
+                copy["TranslatedRecipeName"] = f"{rng.choice(PREFIXES)} {r.get('TranslatedRecipeName', '')}"
+                steps = (r.get("TranslatedInstructions") or "").split(". ")
+                rng.shuffle(steps)
+                copy["TranslatedInstructions"] = ". ".join(steps)
+            recipes.append(copy)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recipes, f, ensure_ascii=False)
+
+
+def child(mode, path):
+    """Load `path` the `mode` way and print a JSON line of measurements."""
+    gc.collect()
+    rss_before = rss_kb()
+    tracemalloc.start()
+    t = time.perf_counter()
+    if mode == "dicts":
+        with open(path, "r", encoding="utf-8") as f:
+            recipes = json.load(f)
+    else:
+        recipes = RecipeCorpus(iter_recipes(path))
+    load_ms = (time.perf_counter() - t) * 1000
+    gc.collect()
+    heap_kb = tracemalloc.get_traced_memory()[0] // 1024
+    tracemalloc.stop()
+    rss_after = rss_kb()
+
+    n = len(recipes)
+    t = time.perf_counter()
+    names = [recipes[i].get("TranslatedRecipeName") for i in range(n)]
+    names_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    for i in range(0, n, max(1, n // 1000)):
+        recipes[i].get("TranslatedInstructions")
+    text_us = (time.perf_counter() - t) * 1e6 / len(range(0, n, max(1, n // 1000)))
+    print(json.dumps({
+        "recipes": n, "names": len(names), "load_ms": load_ms, "rss_kb": rss_after - rss_before,
+        "heap_kb": heap_kb, "names_ms": names_ms, "text_us": text_us,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "recipes.json")
+        make_file(path, args.recipes, random.Random(args.seed))
+        size_kb = os.path.getsize(path) // 1024
+        results = {}
+        for mode in ("dicts", "corpus"):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{args.recipes} recipes, {size_kb} KB of JSON")
+    print("mode      load ms    RSS added   live heap   names ms   instructions us/read")
+    for mode, r in results.items():
+        print(f"{mode:8s} {r['load_ms']:8.0f} {r['rss_kb'] / 1024:9.1f} MB {r['heap_kb'] / 1024:8.1f} MB "
+              f"{r['names_ms']:9.1f} {r['text_us']:12.1f}")
+    dicts, corpus = results["dicts"], results["corpus"]
+    print(f"corpus uses {1 - corpus['heap_kb'] / dicts['heap_kb']:.0%} less live heap "
+          f"and {1 - corpus['rss_kb'] / dicts['rss_kb']:.0%} less RSS")
+
+
+if __name__ == "__main__":
+    main()
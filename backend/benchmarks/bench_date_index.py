@@ -0,0 +1,93 @@
+"""
+Read benchmark for the family tracker's date lookups.
+
+Generates a year of meal logs and nudges for a large family, then compares
+the previous list scans of get_recent_meal_logs / get_daily_nudges with
+DateIndex.since / DateIndex.on, checking both return the same items.
+
+Usage:
+    python benchmarks/bench_date_index.py [--days 365] [--members 8] [--meals 5] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_index import DateIndex  # noqa: E402
+from family import MealLog, NutritionNudge  # noqa: E402
+
+MEAL_TYPES = ["breakfast", "lunch", "snacks", "dinner", "late snack"]
+
+
+def make_data(days, members, meals):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    logs, nudges = [], []
+    for d in range(days, -1, -1):
+        date = (today - timedelta(days=d)).strftime("%Y-%m-%d")
+        for m in range(members):
+            for meal_type in MEAL_TYPES[:meals]:
+                logs.append(MealLog(date=date, meal_type=meal_type, foods=["dal", "rice"], time_logged=date))
+                nudges.append(NutritionNudge(
+                    nudge_id=f"{date}-{m}-{meal_type}", date=date, meal_type=meal_type,
+                    nudge_type="immediate_next_meal", message="", suggestions=[],
+                    nutritional_focus="protein", urgency_level="low", context={},
+                ))
+    return logs, nudges
+
+
+def timed(fn, queries):
+    samples = []
+    for q in queries:
+        t = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--meals", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    logs, nudges = make_data(args.days, args.members, args.meals)
+    t = time.perf_counter()
+    log_index = DateIndex(lambda log: log.date)
+    log_index.extend(logs)
+    nudge_index = DateIndex(lambda nudge: nudge.date)
+    nudge_index.extend(nudges)
+    print(f"{len(logs)} meal logs, {len(nudges)} nudges; index build {(time.perf_counter() - t) * 1000:.0f} ms")
+
+    def scan_recent(days):
+        cutoff = datetime.now() - timedelta(days=days)
+        return [log for log in logs if datetime.fromisoformat(log.date) >= cutoff]
+
+    def index_recent(days):
+        return log_index.since(datetime.now() - timedelta(days=days))
+
+    def scan_day(date):
+        return [n for n in nudges if n.date == date]
+
+    windows = [rng.choice([1, 7, 7, 7, 30]) for _ in range(args.queries)]
+    dates = [(datetime.now() - timedelta(days=rng.randint(0, args.days))).strftime("%Y-%m-%d") for _ in range(args.queries)]
+    for days in set(windows):
+        assert scan_recent(days) == index_recent(days)
+    for date in set(dates):
+        assert scan_day(date) == nudge_index.on(date)
+
+    print(f"{'query':28s} {'scan':>10s} {'index':>10s}")
+    print(f"{'get_recent_meal_logs(1-30)':28s} {timed(scan_recent, windows):8.3f}ms {timed(index_recent, windows):8.3f}ms")
+    print(f"{'get_daily_nudges(date)':28s} {timed(scan_day, dates):8.3f}ms {timed(nudge_index.on, dates):8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Write-cost benchmark for family meal log persistence.
+
+For several history sizes, compares rewriting the whole JSON array per log
+(the previous _save_meal_logs) with appending one line to a Journal, and
+reports how long replaying the journal takes on startup.
+
+Usage:
+    python benchmarks/bench_journal.py [--sizes 1000 10000 50000] [--writes 50] [--fsync interval]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import Journal  # noqa: E402
+
+
+def make_log(i):
+    return {
+        "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "meal_type": ("breakfast", "lunch", "snacks", "dinner")[i % 4],
+        "foods": ["dal", "rice", f"sabzi {i % 50}"],
+        "time_logged": "2025-01-01T12:00:00",
+        "satisfaction_rating": 1 + i % 5,
+        "notes": "",
+    }
+
+
+def bench_rewrite(path, history, writes):
+    logs = list(history)
+    samples = []
+    for i in range(writes):
+        logs.append(make_log(len(logs)))
+        t = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(logs, f, indent=2, ensure_ascii=False)
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+def bench_journal(path, history, writes, fsync):
+    seed = Journal(path, fsync="never")
+    seed.compact(history)
+    journal = Journal(path, fsync=fsync)
+    t = time.perf_counter()
+    replayed = journal.replay()
+    replay_ms = (time.perf_counter() - t) * 1000
+    assert len(replayed) == len(history)
+    samples = []
+    for i in range(writes):
+        record = make_log(len(history) + i)
+        t = time.perf_counter()
+        journal.append(record)
+        samples.append((time.perf_counter() - t) * 1000)
+    journal.close()
+    return samples, replay_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--fsync", default="interval", choices=["always", "interval", "never"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'history':>8} {'rewrite p50':>12} {'journal p50':>12} {'journal max':>12} {'replay':>10}")
+        for size in args.sizes:
+            history = [make_log(i) for i in range(size)]
+            rewrite = bench_rewrite(os.path.join(tmp, f"logs_{size}.json"), history, args.writes)
+            append, replay_ms = bench_journal(os.path.join(tmp, f"logs_{size}.jsonl"), history, args.writes, args.fsync)
+            print(
+                f"{size:>8} {statistics.median(rewrite):>10.2f}ms {statistics.median(append):>10.3f}ms "
+                f"{max(append):>10.3f}ms {replay_ms:>8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark for the meal keyword heuristics.
+
+Classifies synthetic food texts into every keyword_classifier category,
+once with `any(k in text for k in keywords)` loops (how the heuristics were
+written) and once with KeywordClassifier.classify's single scan, checking that
+both agree. Also times single-category checks against their compiled regex.
+
+Usage:
+    python benchmarks/bench_keyword_classifier.py [--texts 20000] [--repeat 5] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_classifier import CATEGORIES, classifier  # noqa: E402
+
+WORDS = [
+    "masala", "tadka", "jeera", "aloo", "gobi", "matar", "palak", "methi", "chole", "rajma",
+    "bhature", "kulcha", "naan", "biryani", "pav", "bhaji", "vada", "samosa", "jalebi", "lassi",
+    "chutney", "raita", "kadhi", "thali", "from", "with", "extra", "homemade", "spicy", "fried",
+]
+
+
+def make_texts(n, rng):
+    keywords = [k for words in CATEGORIES.values() for k in words]
+    texts = []
+    for _ in range(n):
+        words = rng.choices(WORDS, k=rng.randint(1, 6))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        texts.append(" ".join(words))
+    return texts
+
+
+def loops(texts):
+    lists = {name: list(words) for name, words in CATEGORIES.items()}
+    return [{name for name, words in lists.items() if any(k in text for k in words)} for text in texts]
+
+
+def compiled(texts):
+    return [classifier.classify(text) for text in texts]
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, random.Random(args.seed))
+    loop_s, expected = best_of(lambda: loops(texts), args.repeat)
+    regex_s, got = best_of(lambda: compiled(texts), args.repeat)
+    if got != expected:
+        raise SystemExit("compiled classifier disagrees with the keyword loops")
+
+    per_text = 1e6 / len(texts)
+    print(f"{len(texts)} texts x {len(CATEGORIES)} categories")
+    print(f"any() loops      {loop_s * per_text:7.2f} us/text")
+    print(f"single scan      {regex_s * per_text:7.2f} us/text   ({loop_s / regex_s:.1f}x)")
+    for name in ("home_cookable", "restaurant", "beverage", "fast_food"):
+        words = CATEGORIES[name]
+        loop_c, _ = best_of(lambda: [any(k in t for k in words) for t in texts], args.repeat)
+        regex_c, _ = best_of(lambda: [classifier.matches(name, t) for t in texts], args.repeat)
+        print(f"  {name:14s} ({len(words):2d} keywords) {loop_c * per_text:6.2f} -> {regex_c * per_text:6.2f} us/text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark for insight context matching over food_data-style posts.
+
+Builds a synthetic corpus (default 100k posts) from a food/health vocabulary,
+then compares nudging.match_posts (linear scan) with PostIndex.match for
+random meal logs and profiles, checking that both return the same matches.
+
+Usage:
+    python benchmarks/bench_post_index.py [--posts 100000] [--queries 50] [--seed 7]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nudging  # noqa: E402
+from post_index import PostIndex  # noqa: E402
+
+FOODS = [
+    "dal", "rice", "roti", "poha", "upma", "idli", "dosa", "paneer", "curd", "chai", "samosa",
+    "khichdi", "rajma", "chole", "sprouts", "oats", "ragi", "millet", "banana", "buttermilk",
+    "dal makhani", "palak paneer", "masala dosa", "jeera rice", "aloo paratha", "moong dal",
+]
+CONDITIONS = [
+    "diabetes", "hypertension", "anemia", "pcos", "thyroid", "obesity", "arthritis",
+    "weight loss", "manage blood pressure", "gain muscle", "improve digestion",
+]
+FILLER = (
+    "how what why best healthy diet indian meal breakfast lunch dinner snack protein fiber "
+    "sugar salt oil fried home cooked budget quick easy tips help need advice daily routine "
+    "family kids office gym morning evening weekend festival season monsoon winter summer"
+).split()
+REC_TYPES = ["recipe", "swap", "tip", "substitute", "experience", "question"]
+STYLES = [
+    "masala", "tadka", "jeera", "lemon", "tomato", "coconut", "methi", "palak", "mint", "garlic",
+    "kerala", "punjabi", "bengali", "gujarati", "chettinad", "hyderabadi", "goan", "rajasthani",
+    "baked", "steamed", "roasted", "instant", "sprouted", "millet", "oats", "ragi", "bajra", "jowar",
+]
+
+
+def vocabulary():
+    """~700 dish names and ~300 profile terms, so individual terms are selective like in real posts."""
+    dishes = [f"{style} {food}" for style in STYLES for food in FOODS]
+    terms = [f"{cond} stage {i}" if i else cond for cond in CONDITIONS for i in range(25)]
+    return dishes, terms
+
+
+def make_corpus(n, rng, dishes, terms):
+    vocab = FILLER + [w for f in FOODS for w in f.split()]
+    posts = []
+    for i in range(n):
+        foods = rng.sample(dishes, 3)
+        conds = rng.sample(terms, 2)
+        title = " ".join(rng.choices(vocab, k=8))
+        desc = " ".join(rng.choices(vocab, k=30) + rng.sample(foods, 1))
+        recs = []
+        for _ in range(3):
+            text = " ".join(rng.choices(vocab, k=20) + [rng.choice(dishes), rng.choice(terms)])
+            recs.append({"type": rng.choice(REC_TYPES), "text": text})
+        posts.append({
+            "id": f"post-{i:06d}",
+            "post_title": title,
+            "post_description": desc,
+            "search_keywords": rng.sample(vocab, 6) + conds,
+            "foods": foods,
+            "recommendations": recs,
+        })
+    return posts
+
+
+def _normalized(matches):
+    return [
+        dict(m, relevant_recommendations=[dict(r, reasons=sorted(r["reasons"])) for r in m["relevant_recommendations"]])
+        for m in matches
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    dishes, terms = vocabulary()
+    posts = make_corpus(args.posts, rng, dishes, terms)
+    print(f"corpus: {len(posts)} posts generated in {time.perf_counter() - started:.1f} s")
+
+    index = PostIndex(posts)
+    print(f"index build: {index.build_ms:.0f} ms ({len(index.word_posts)} words, {len(index.term_posts)} terms)")
+
+    queries = []
+    for _ in range(args.queries):
+        meal_foods = set(rng.sample(dishes, 4))
+        user_terms = set(rng.sample(terms, 3)) | {str(rng.randint(18, 32))}
+        queries.append((meal_foods, user_terms))
+
+    linear_ms, indexed_ms, hits = [], [], []
+    for meal_foods, user_terms in queries:
+        t = time.perf_counter()
+        expected = nudging.match_posts(posts, meal_foods, user_terms)
+        linear_ms.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        got = index.match(meal_foods, user_terms)
+        indexed_ms.append((time.perf_counter() - t) * 1000)
+        if _normalized(got) != _normalized(expected):
+            raise SystemExit(f"mismatch for {sorted(meal_foods)} / {sorted(user_terms)}")
+        hits.append(len(got))
+
+    print(f"matched posts per query: median {statistics.median(hits):.0f}")
+    for name, samples in (("linear scan", linear_ms), ("post index", indexed_ms)):
+        print(f"{name:12s} median {statistics.median(samples):8.1f} ms   max {max(samples):8.1f} ms")
+
+    # selective queries are where the index pays off: terms that only a few posts mention
+    rare = [({"post-000042"}, {"nonexistent condition"})] * 5
+    for name, fn in (("linear scan", lambda q: nudging.match_posts(posts, *q)), ("post index", lambda q: index.match(*q))):
+        t = time.perf_counter()
+        for q in rare:
+            fn(q)
+        print(f"{name:12s} selective query {(time.perf_counter() - t) * 1000 / len(rare):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
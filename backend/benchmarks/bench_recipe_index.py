@@ -0,0 +1,104 @@
+"""
+Benchmark for recipe retrieval by tags.
+
+Scales recipes1.json up to --recipes entries (copies with renamed dishes),
+then answers tag queries drawn from the recipes' own tags with the original
+recipe_generator scan (substring test of every tag against three fields of
+every recipe) and with RecipeIndex.find_matches, reporting latency and how
+often both return the same top-k.
+
+Usage:
+    python benchmarks/bench_recipe_index.py [--recipes 6000] [--queries 200] [--top-k 3] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe_index import RECIPES_FILE, RecipeIndex, load_recipes  # noqa: E402
+
+PREFIXES = ["Homestyle", "Spicy", "Kerala", "Punjabi", "Quick", "Rustic", "Mini", "Baked", "Tawa", "Dhaba"]
+
+
+def scan(tags, recipes, top_k):
+    """recipe_generator.find_matches before the index."""
+    tags_lc = [t.lower() for t in tags]
+    candidates = []
+    for r in recipes:
+        score = 0
+        text_fields = []
+        for key in ("TranslatedRecipeName", "Cleaned-Ingredients", "TranslatedIngredients"):
+            val = r.get(key, "") or ""
+            text_fields.append(val)
+            val_lc = val.lower()
+            for t in tags_lc:
+                if t in val_lc:
+                    score += 1
+        if score > 0:
+            candidates.append({"score": score, "recipe": r, "snippet": " ".join(text_fields)[:800]})
+    candidates.sort(key=lambda x: x["score"], reverse=True)
+    return candidates[:top_k]
+
+
+def make_corpus(base, n, rng):
+    recipes = []
+    while len(recipes) < n:
+        for r in base:
+            if len(recipes) >= n:
+                break
+            copy = dict(r)
+            if len(recipes) >= len(base):
+                copy["TranslatedRecipeName"] = f"{rng.choice(PREFIXES)} {r.get('TranslatedRecipeName', '')}"
+            recipes.append(copy)
+    return recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=6000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = load_recipes(RECIPES_FILE)
+    if not base:
+        raise SystemExit(f"no recipes in {RECIPES_FILE}")
+    recipes = make_corpus(base, args.recipes, rng)
+    queries = []
+    for _ in range(args.queries):
+        tags = rng.choice(base).get("tags") or ["rice"]
+        queries.append(rng.sample(tags, min(len(tags), rng.randint(1, 4))))
+
+    t = time.perf_counter()
+    index = RecipeIndex(recipes)
+    build_ms = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    expected = [scan(q, recipes, args.top_k) for q in queries]
+    scan_s = time.perf_counter() - t
+    t = time.perf_counter()
+    got = [index.find_matches(q, args.top_k) for q in queries]
+    index_s = time.perf_counter() - t
+    t = time.perf_counter()
+    for q in queries:
+        index.find_matches(q, args.top_k, scoring="bm25")
+    bm25_s = time.perf_counter() - t
+
+    same = sum(
+        [id(m["recipe"]) for m in a] == [id(m["recipe"]) for m in b] for a, b in zip(expected, got)
+    )
+    per_query = 1e6 / len(queries)
+    print(f"{len(recipes)} recipes, {len(queries)} queries, top {args.top_k}; index built in {build_ms:.0f} ms")
+    print(f"substring scan   {scan_s * per_query:10.1f} us/query")
+    print(f"index (count)    {index_s * per_query:10.1f} us/query   ({scan_s / index_s:.0f}x)")
+    print(f"index (bm25)     {bm25_s * per_query:10.1f} us/query")
+    print(f"same top-{args.top_k} as the scan for {same}/{len(queries)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Calibration benchmark for the local recipe relevance scorer.
+
+Builds labelled requests from recipes1.json: each recipe asked for by its own
+dish name with all or some of its tags (relevant when find_matches returns
+that recipe first) and well-known dishes missing from the corpus (never
+relevant). Reports, for a grid of accept/reject thresholds, how many
+verification LLM calls would be skipped and how often the skipped decisions
+agree with the labels, plus the latency saved at --llm-ms per call.
+
+Usage:
+    python benchmarks/bench_relevance.py [--llm-ms 700] [--accept 0.7] [--reject 0.35] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe_classifier import dish_name  # noqa: E402
+from recipe_index import RECIPES_FILE, get_recipe_index  # noqa: E402
+from recipe_relevance import RECIPE_VERIFY_ACCEPT, RECIPE_VERIFY_REJECT, RelevanceScorer  # noqa: E402
+
+# Dishes to ask for that the corpus may not have; any it does have are skipped
+OTHER_DISHES = [
+    ("Pav Bhaji", ["Pav", "Bhaji", "Potato", "Street Food"]),
+    ("Chicken Biryani", ["Chicken", "Biryani", "Rice", "Non-Vegetarian"]),
+    ("Margherita Pizza", ["Pizza", "Cheese", "Tomato", "Italian"]),
+    ("Salmon Sushi Roll", ["Sushi", "Salmon", "Rice", "Japanese"]),
+    ("Chocolate Brownie", ["Chocolate", "Brownie", "Dessert"]),
+    ("Pad Thai", ["Noodles", "Peanut", "Thai"]),
+    ("Beef Stew", ["Beef", "Stew", "Potato"]),
+    ("Caesar Salad", ["Lettuce", "Salad", "Parmesan"]),
+    ("Fish Tacos", ["Fish", "Tacos", "Mexican"]),
+    ("Tonkotsu Ramen", ["Ramen", "Pork", "Noodles"]),
+    ("Blueberry Pancakes", ["Pancakes", "Blueberry", "Breakfast"]),
+    ("Lasagna", ["Pasta", "Cheese", "Italian", "Baked"]),
+    ("Butter Chicken", ["Chicken", "Butter", "Curry"]),
+    ("Chole Bhature", ["Chole", "Bhature", "Chickpeas"]),
+    ("Masala Dosa", ["Dosa", "Potato", "South Indian"]),
+    ("Mutton Rogan Josh", ["Mutton", "Kashmiri", "Curry"]),
+    ("Gulab Jamun", ["Dessert", "Khoya", "Sweet"]),
+    ("Paneer Tikka", ["Paneer", "Tikka", "Grilled"]),
+    ("Vada Pav", ["Vada", "Pav", "Potato", "Street Food"]),
+    ("Falafel Wrap", ["Falafel", "Wrap", "Chickpeas"]),
+    ("Mushroom Risotto", ["Mushroom", "Risotto", "Rice", "Italian"]),
+    ("Egg Fried Rice", ["Egg", "Rice", "Chinese"]),
+    ("Prawn Malai Curry", ["Prawn", "Coconut", "Curry"]),
+    ("Rice Kheer", ["Rice", "Milk", "Dessert"]),
+    ("Kanda Poha", ["Poha", "Onion", "Breakfast"]),
+    ("Misal Pav", ["Misal", "Sprouts", "Pav"]),
+    ("Apple Pie", ["Apple", "Pie", "Baked", "Dessert"]),
+    ("Tomato Soup", ["Tomato", "Soup"]),
+    ("Dal Makhani", ["Dal", "Butter", "Punjabi"]),
+    ("Chicken Shawarma", ["Chicken", "Shawarma", "Wrap"]),
+]
+
+
+def labelled_requests(index, rng):
+    """(input_recipe, candidates, relevant) triples."""
+    requests = []
+    for recipe in index.recipes:
+        tags = recipe.get("tags") or []
+        name = dish_name(recipe.get("TranslatedRecipeName") or "").title()
+        if not name or not tags:
+            continue
+        for query_tags in (tags, rng.sample(tags, max(1, len(tags) // 2))):
+            candidates = index.find_matches(query_tags, 3)
+            relevant = bool(candidates) and candidates[0]["recipe"] == recipe
+            requests.append(({"recipeName": name, "tags": query_tags}, candidates, relevant))
+    corpus_names = [set(dish_name(r.get("TranslatedRecipeName") or "").split()) for r in index.recipes]
+    for name, tags in OTHER_DISHES:
+        words = set(dish_name(name).split())
+        if any(words <= names for names in corpus_names):
+            continue
+        requests.append(({"recipeName": name, "tags": tags}, index.find_matches(tags, 3), False))
+    return requests
+
+
+def evaluate(scores, accept, reject):
+    skipped = correct = 0
+    for score, relevant in scores:
+        if score >= accept:
+            skipped += 1
+            correct += relevant
+        elif score <= reject:
+            skipped += 1
+            correct += not relevant
+    return skipped, correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm-ms", type=float, default=700.0, help="latency of one verification call")
+    parser.add_argument("--accept", type=float, default=RECIPE_VERIFY_ACCEPT)
+    parser.add_argument("--reject", type=float, default=RECIPE_VERIFY_REJECT)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    index = get_recipe_index(RECIPES_FILE)
+    if index is None or not len(index):
+        raise SystemExit(f"no recipes in {RECIPES_FILE}")
+    requests = labelled_requests(index, random.Random(args.seed))
+    scorer = RelevanceScorer(index)
+
+    t = time.perf_counter()
+    scores = [(scorer.score(q, c).score, relevant) for q, c, relevant in requests]
+    score_ms = (time.perf_counter() - t) * 1000
+
+    positives = sum(relevant for _, relevant in scores)
+    print(f"{len(scores)} requests ({positives} relevant), scored in {score_ms / len(scores):.3f} ms each")
+    print()
+    print("accept  reject   skipped   agree")
+    for accept in (0.6, 0.65, 0.7, 0.75, 0.8, 0.85):
+        for reject in (0.2, 0.25, 0.3, 0.35, 0.4):
+            skipped, correct = evaluate(scores, accept, reject)
+            mark = "  <- configured" if (accept, reject) == (args.accept, args.reject) else ""
+            print(f"{accept:6.2f}  {reject:6.2f}   {skipped / len(scores):6.1%}   "
+                  f"{(correct / skipped if skipped else 1):6.1%}{mark}")
+
+    skipped, correct = evaluate(scores, args.accept, args.reject)
+    print()
+    print(f"accept {args.accept:g} / reject {args.reject:g}: {skipped}/{len(scores)} verification calls skipped, "
+          f"{correct}/{skipped} agreeing with the labels")
+    print(f"latency saved: {skipped * args.llm_ms / len(scores):.0f} ms per request on average "
+          f"({skipped * args.llm_ms / 1000:.1f} s over the run at {args.llm_ms:g} ms per call)")
+
+
+if __name__ == "__main__":
+    main()
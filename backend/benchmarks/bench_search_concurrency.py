@@ -0,0 +1,105 @@
+"""
+Load benchmark for the async food repository.
+
+Simulates concurrent /search_foods requests against a fake collection whose
+queries take a fixed amount of I/O time (like an Atlas round-trip), and
+compares calling pymongo directly inside the coroutine with awaiting the
+thread-offloaded repository functions.
+
+Usage:
+    python benchmarks/bench_search_concurrency.py [--requests 200] [--concurrency 50] [--latency-ms 40]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import food_repository  # noqa: E402
+
+
+class _Cursor(list):
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class FakeCollection:
+    """Collection stand-in that blocks for `latency_s` per query, like a network call."""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.docs = [{"dish_name": f"Dal {i}", "calories_kcal": 120 + i, "protein_g": 6.5} for i in range(20)]
+
+    def aggregate(self, pipeline):
+        time.sleep(self.latency_s)
+        return _Cursor(self.docs)
+
+    def find(self, *args, **kwargs):
+        time.sleep(self.latency_s)
+        return _Cursor(self.docs)
+
+
+async def blocking_handler(collection, query):
+    # what the handlers did before: sync pymongo inside the coroutine
+    return food_repository.run_atlas_search_with_fallback(collection, query, limit=5)
+
+
+async def offloaded_handler(collection, query):
+    return await food_repository.search_with_fallback_async(collection, query, limit=5)
+
+
+async def run(handler, collection, total, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        # every request "arrives" at the start, so latency includes time
+        # spent queued behind other requests (or behind a blocked loop)
+        async with sem:
+            await handler(collection, f"dal {i % 7}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "wall_s": elapsed,
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    collection = FakeCollection(args.latency_ms / 1000)
+
+    # silence the per-query prints so they don't dominate the timings
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        blocking = asyncio.run(run(blocking_handler, collection, args.requests, args.concurrency))
+        offloaded = asyncio.run(run(offloaded_handler, collection, args.requests, args.concurrency))
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+        food_repository.shutdown()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.latency_ms:.0f} ms per query, "
+          f"{food_repository.MONGO_QUERY_WORKERS} query workers")
+    for name, r in (("blocking", blocking), ("offloaded", offloaded)):
+        print(f"  {name:<10} wall {r['wall_s']:.2f}s  {r['rps']:.0f} req/s  p50 {r['p50_ms']:.0f} ms  p99 {r['p99_ms']:.0f} ms")
+    print(f"  speedup    {blocking['wall_s'] / offloaded['wall_s']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
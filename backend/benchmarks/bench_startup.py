@@ -0,0 +1,70 @@
+"""
+Cold-start benchmark for the API process.
+
+Times `import main` in fresh interpreters (what every uvicorn worker pays
+before it can accept traffic) and reports peak RSS after the import, plus
+the time of the explicit warm-up hooks run by the app lifespan.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--module main]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+import_ms = (time.perf_counter() - started) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+warm_ms = None
+if {warm}:
+    import nudging
+    started = time.perf_counter()
+    nudging.warm_up()
+    warm_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"import_ms": import_ms, "rss_mb": rss_kb / 1024, "warm_up_ms": warm_ms}}))
+"""
+
+
+def run_once(module, warm):
+    env = dict(os.environ)
+    # the API key is only checked when an LLM call is made, but keep the probe quiet
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, warm=warm)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--no-warm-up", action="store_true", help="skip timing nudging.warm_up()")
+    args = parser.parse_args()
+
+    results = [run_once(args.module, not args.no_warm_up) for _ in range(args.runs)]
+    imports = [r["import_ms"] for r in results]
+    rss = [r["rss_mb"] for r in results]
+    print(f"import {args.module}: median {statistics.median(imports):.0f} ms "
+          f"(min {min(imports):.0f}, max {max(imports):.0f}) over {args.runs} runs")
+    print(f"peak RSS after import: {statistics.median(rss):.1f} MB")
+    warm = [r["warm_up_ms"] for r in results if r["warm_up_ms"] is not None]
+    if warm:
+        print(f"nudging.warm_up(): median {statistics.median(warm):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
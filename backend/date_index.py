@@ -0,0 +1,62 @@
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Callable, Dict, Generic, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DateIndex(Generic[T]):
+    """
+    Items bucketed by their date string and kept sorted by parsed datetime.
+
+    on(date) is a dict lookup and since(cutoff) is a bisect plus a slice, so
+    reads cost O(log n + k) instead of parsing every item's date per request.
+    Items inserted in time order (the usual case) are appended in O(1).
+    """
+
+    def __init__(self, date_of: Callable[[T], str]):
+        self.date_of = date_of
+        self._buckets: Dict[str, List[T]] = {}
+        self._times: List[datetime] = []
+        self._items: List[T] = []
+        self.unparsed = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item: T):
+        date = self.date_of(item)
+        self._buckets.setdefault(date, []).append(item)
+        try:
+            when = datetime.fromisoformat(date)
+            if not self._times or when >= self._times[-1]:
+                self._times.append(when)
+                self._items.append(item)
+            else:
+                # equal timestamps keep insertion order
+                pos = bisect_right(self._times, when)
+                self._times.insert(pos, when)
+                self._items.insert(pos, item)
+        except (TypeError, ValueError) as e:
+            # still reachable by exact date, just not by range
+            self.unparsed += 1
+            logger.warning(f"Not range-indexing item with date {date!r}: {e}")
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def on(self, date: str) -> List[T]:
+        """Items whose date string is exactly `date`, in insertion order."""
+        return list(self._buckets.get(date, ()))
+
+    def since(self, cutoff: datetime) -> List[T]:
+        """Items dated at or after `cutoff`, oldest first."""
+        return self._items[bisect_left(self._times, cutoff):]
+
+    def between(self, start: datetime, end: datetime) -> List[T]:
+        """Items dated in [start, end), oldest first."""
+        return self._items[bisect_left(self._times, start):bisect_left(self._times, end)]
@@ -1,14 +1,19 @@
 import os
 import json
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 import uuid
 
+import llm_gateway
+from date_index import DateIndex
+from journal import Journal
+import keyword_classifier
+from meal_aggregates import MealPatternAggregates
+
 # Pydantic models for structured output
 class NutritionalTargets(BaseModel):
     calories_target: str = Field(description="Recommended daily calorie range for the family")
@@ -86,13 +91,22 @@ class FamilyNutritionTracker:
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables.")
-        self.client = genai.Client(api_key=self.api_key)
 
         # Initialize family data
         self.family_profiles = self._load_family_profiles()
         self.meal_logs = []
         self.nudges = []
+        # Date lookups for /meal_logs and /nudges/{date}; kept in step with the lists above
+        self.meal_log_index = DateIndex(lambda log: log.date)
+        self.nudge_index = DateIndex(lambda nudge: nudge.date)
+        # Per-day counters behind the enhanced report, updated as meals are logged
+        self.meal_patterns = MealPatternAggregates()
         self.current_daily_plan = None  # Track the day's plan for context-aware nudges
+        # Append-only logs; the old JSON arrays are migrated on first start
+        self.meal_log_journal = Journal("family_meal_logs.jsonl", legacy_path="family_meal_logs.json")
+        self.nudge_journal = Journal(
+            "family_nudges.jsonl", key=lambda n: n.get("nudge_id"), legacy_path="family_nudges.json"
+        )
         self._load_existing_data()
 
     def _load_family_profiles(self):
@@ -127,20 +141,17 @@ class FamilyNutritionTracker:
         ]
 
     def _load_existing_data(self):
-        """Load existing meal logs and nudges."""
+        """Load existing meal logs and nudges by replaying their journals."""
         try:
-            if os.path.exists("family_meal_logs.json"):
-                with open("family_meal_logs.json", "r", encoding="utf-8") as f:
-                    logs_data = json.load(f)
-                    self.meal_logs = [MealLog(**log) for log in logs_data]
+            self.meal_logs = [MealLog(**log) for log in self.meal_log_journal.replay()]
+            self.meal_log_index.extend(self.meal_logs)
+            self.meal_patterns.extend(self.meal_logs)
         except Exception as e:
             logger.warning(f"Could not load meal logs: {e}")
 
         try:
-            if os.path.exists("family_nudges.json"):
-                with open("family_nudges.json", "r", encoding="utf-8") as f:
-                    nudges_data = json.load(f)
-                    self.nudges = [NutritionNudge(**nudge) for nudge in nudges_data]
+            self.nudges = [NutritionNudge(**nudge) for nudge in self.nudge_journal.replay()]
+            self.nudge_index.extend(self.nudges)
         except Exception as e:
             logger.warning(f"Could not load nudges: {e}")
 
@@ -149,17 +160,20 @@ class FamilyNutritionTracker:
         try:
             meal_log = MealLog(**meal_data)
             self.meal_logs.append(meal_log)
+            self.meal_log_index.add(meal_log)
+            self.meal_patterns.add(meal_log)
 
             # Generate nudge based on the meal
             nudge = self._generate_meal_nudge(meal_log)
 
             if nudge:
                 self.nudges.append(nudge)
+                self.nudge_index.add(nudge)
 
             # Save data
-            self._save_meal_logs()
+            self._save_meal_log(meal_log)
             if nudge:
-                self._save_nudges()
+                self._save_nudge(nudge)
 
             return nudge
 
@@ -211,6 +225,7 @@ class FamilyNutritionTracker:
     def _analyze_meal_nutrition(self, meal: MealLog) -> Dict[str, Any]:
         """Analyze a meal for nutritional content and gaps."""
         foods = [food.lower() for food in meal.foods]
+        foods_text = " ".join(foods)
 
         analysis = {
             "needs_improvement": False,
@@ -228,7 +243,7 @@ class FamilyNutritionTracker:
 
         # Anemia-related analysis
         if "anemia" in [c.lower() for c in family_conditions]:
-            if not any(keyword in " ".join(foods) for keyword in ["spinach", "lentils", "beans", "meat", "citrus", "vitamin c"]):
+            if not keyword_classifier.matches("iron_rich", foods_text):
                 analysis["needs_improvement"] = True
                 analysis["message"] = f"Great job logging your {meal.meal_type}! To support anemia management, consider adding iron-rich foods to your next meal."
                 analysis["suggestions"] = [
@@ -241,7 +256,7 @@ class FamilyNutritionTracker:
                 analysis["gaps"] = ["iron", "vitamin_c"]
 
         # Check for skipped meals
-        if "skipped" in " ".join(foods).lower() or "no time" in " ".join(foods).lower():
+        if keyword_classifier.matches("skipped_meal", foods_text):
             analysis["needs_improvement"] = True
             analysis["message"] = f"I noticed you skipped {meal.meal_type}. Even a small, nutritious option can make a big difference!"
             analysis["suggestions"] = [
@@ -253,8 +268,7 @@ class FamilyNutritionTracker:
             analysis["urgency"] = "medium"
 
         # Check for fast food patterns
-        fast_food_indicators = ["burger", "pizza", "fries", "chips", "cold drink", "soda", "noodles"]
-        if any(indicator in " ".join(foods) for indicator in fast_food_indicators):
+        if keyword_classifier.matches("fast_food", foods_text):
             analysis["needs_improvement"] = True
             analysis["message"] = f"Your {meal.meal_type} choice is noted! Let's balance it with more nutrient-dense options in your next meal."
             analysis["suggestions"] = [
@@ -277,26 +291,22 @@ class FamilyNutritionTracker:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
 
-        return [nudge for nudge in self.nudges if nudge.date == date]
+        return self.nudge_index.on(date)
 
     def get_recent_meal_logs(self, days: int = 7) -> List[MealLog]:
         """Get recent meal logs."""
         cutoff_date = datetime.now() - timedelta(days=days)
-        return [log for log in self.meal_logs
-                if datetime.fromisoformat(log.date) >= cutoff_date]
+        return self.meal_log_index.since(cutoff_date)
 
-    def generate_enhanced_report(self) -> FamilyHealthReport:
+    async def generate_enhanced_report(self) -> FamilyHealthReport:
         """Generate enhanced family health report incorporating meal log data."""
-        # Get recent meal logs for context
-        recent_logs = self.get_recent_meal_logs(7)
-
-        # Analyze patterns from logged meals
-        meal_patterns = self._analyze_meal_patterns(recent_logs)
+        # Patterns over the last 7 days of logs, from the running per-day counters
+        meal_patterns = self.meal_patterns.window(datetime.now() - timedelta(days=7))
 
         # Generate enhanced report with AI
-        return self._generate_ai_enhanced_report(meal_patterns)
+        return await self._generate_ai_enhanced_report(meal_patterns)
 
-    def create_daily_plan(self, meal_idea: str) -> Optional[DailyPlan]:
+    async def create_daily_plan(self, meal_idea: str) -> Optional[DailyPlan]:
         """Create a proactive daily plan based on meal idea and family profiles."""
         try:
             # Create prompt for the LLM
@@ -344,10 +354,11 @@ Create member-specific modifications for each family member based on their healt
             # Call the LLM
             system_instruction = "You are an expert AI nutritionist and chef from India. You are empathetic, practical, and understand the cultural importance of food. Your goal is to help families eat healthier without sacrificing their favorite meals. Your advice should be like talking to a knowledgeable and friendly family member."
 
-            response = self.client.models.generate_content(
+            response = await llm_gateway.generate(
+                f"{system_instruction}\n\n{prompt}",
                 model="models/gemini-2.5-flash",
-                contents=f"{system_instruction}\n\n{prompt}",
-                config=types.GenerateContentConfig(temperature=0.3)
+                temperature=0.3,
+                label="family.create_daily_plan",
             )
 
             if response.text:
@@ -378,7 +389,7 @@ Create member-specific modifications for each family member based on their healt
             return None
         return None  # Explicitly return None if the response was empty
 
-    def log_meal_deviation_and_nudge(self, member_name: str, deviation_description: str) -> Optional[NutritionNudge]:
+    async def log_meal_deviation_and_nudge(self, member_name: str, deviation_description: str) -> Optional[NutritionNudge]:
         """Log a meal deviation and generate a context-aware nudge based on the daily plan."""
         try:
             # Check if there's a current daily plan
@@ -418,10 +429,11 @@ Return ONLY a simple JSON object with two keys: "message" and "suggestion".
             # Call the LLM
             system_instruction = "You are a supportive and non-judgmental AI nutrition coach. Your tone is always positive and encouraging. You focus on small, easy steps to help users get back on track without making them feel guilty."
 
-            response = self.client.models.generate_content(
+            response = await llm_gateway.generate(
+                f"{system_instruction}\n\n{prompt}",
                 model="models/gemini-2.5-flash",
-                contents=f"{system_instruction}\n\n{prompt}",
-                config=types.GenerateContentConfig(temperature=0.7)
+                temperature=0.7,
+                label="family.log_meal_deviation",
             )
 
             if response.text:
@@ -460,7 +472,8 @@ Return ONLY a simple JSON object with two keys: "message" and "suggestion".
 
                 # Add to nudges list
                 self.nudges.append(nudge)
-                self._save_nudges()
+                self.nudge_index.add(nudge)
+                self._save_nudge(nudge)
 
                 return nudge
 
@@ -474,7 +487,7 @@ Return ONLY a simple JSON object with two keys: "message" and "suggestion".
             return None
         return None  # Explicitly return None if the response was empty
 
-    def get_meal_suggestion(self) -> str:
+    async def get_meal_suggestion(self) -> str:
         """
         Asks the AI to suggest a simple, healthy, and culturally appropriate meal idea.
         """
@@ -488,10 +501,11 @@ Family Profiles:
 Return ONLY the name of the meal as a single string. For example: "Masoor Dal with Roti".
 """
         try:
-            response = self.client.models.generate_content(
+            response = await llm_gateway.generate(
+                prompt,
                 model="models/gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(temperature=0.8)  # Higher temp for more variety
+                temperature=0.8,  # Higher temp for more variety
+                label="family.meal_suggestion",
             )
             return response.text.strip().replace('"', '')
         except Exception as e:
@@ -499,7 +513,7 @@ Return ONLY the name of the meal as a single string. For example: "Masoor Dal wi
             return "Dal and Rice"  # A safe fallback
 
     def _analyze_meal_patterns(self, logs: List[MealLog]) -> Dict[str, Any]:
-        """Analyze patterns from meal logs."""
+        """Analyze patterns from meal logs (full recount; the report uses self.meal_patterns)."""
         if not logs:
             return {"message": "No recent meal logs available"}
 
@@ -520,13 +534,14 @@ Return ONLY the name of the meal as a single string. For example: "Masoor Dal wi
             meal_type = log.meal_type
             patterns["meals_by_type"][meal_type] = patterns["meals_by_type"].get(meal_type, 0) + 1
 
+            foods_text = " ".join(log.foods).lower()
+
             # Check for skipped meals
-            if "skipped" in " ".join(log.foods).lower():
+            if "skipped" in foods_text:
                 patterns["skipped_meals"] += 1
 
             # Check for fast food
-            foods_text = " ".join(log.foods).lower()
-            if any(indicator in foods_text for indicator in ["burger", "pizza", "chips", "noodles"]):
+            if keyword_classifier.matches("fast_food_staples", foods_text):
                 patterns["fast_food_frequency"] += 1
 
             # Track satisfaction
@@ -539,7 +554,7 @@ Return ONLY the name of the meal as a single string. For example: "Masoor Dal wi
 
         return patterns
 
-    def _generate_ai_enhanced_report(self, meal_patterns: Dict[str, Any]) -> FamilyHealthReport:
+    async def _generate_ai_enhanced_report(self, meal_patterns: Dict[str, Any]) -> FamilyHealthReport:
         """Generate AI-enhanced report using meal patterns."""
         # Enhanced prompt that includes meal logging data
         json_schema = FamilyHealthReport.model_json_schema()
@@ -565,10 +580,11 @@ Family Health Conditions: {', '.join([cond for profile in self.family_profiles f
         )
 
         try:
-            response = self.client.models.generate_content(
+            response = await llm_gateway.generate(
+                contents,
                 model="models/gemini-2.5-flash",
-                contents=contents,
-                config=types.GenerateContentConfig(temperature=0.3)
+                temperature=0.3,
+                label="family.enhanced_report",
             )
 
             if response.text:
@@ -627,23 +643,24 @@ Family Health Conditions: {', '.join([cond for profile in self.family_profiles f
             )
         )
 
-    def _save_meal_logs(self):
-        """Save meal logs to file."""
+    def _save_meal_log(self, meal_log: MealLog):
+        """Append one meal log to the journal."""
         try:
-            logs_data = [log.model_dump() for log in self.meal_logs]
-            with open("family_meal_logs.json", "w", encoding="utf-8") as f:
-                json.dump(logs_data, f, indent=2, ensure_ascii=False)
+            self.meal_log_journal.append(meal_log.model_dump())
         except Exception as e:
-            logger.error(f"Failed to save meal logs: {e}")
+            logger.error(f"Failed to save meal log: {e}")
 
-    def _save_nudges(self):
-        """Save nudges to file."""
+    def _save_nudge(self, nudge: NutritionNudge):
+        """Append one nudge to the journal."""
         try:
-            nudges_data = [nudge.model_dump() for nudge in self.nudges]
-            with open("family_nudges.json", "w", encoding="utf-8") as f:
-                json.dump(nudges_data, f, indent=2, ensure_ascii=False)
+            self.nudge_journal.append(nudge.model_dump())
         except Exception as e:
-            logger.error(f"Failed to save nudges: {e}")
+            logger.error(f"Failed to save nudge: {e}")
+
+    def close(self):
+        """Flush the journals to disk."""
+        self.meal_log_journal.close()
+        self.nudge_journal.close()
 
 
 def display_coordinated_plan(plan: CoordinatedMeal):
@@ -725,485 +742,486 @@ def _create_fallback_report():
         )
     )
 
-def main():
-    """Main function to generate family nutrition report."""
-    # Original execution logic moved here
-    # ... existing code ...
-
 load_dotenv()
 
-key = os.getenv("GOOGLE_API_KEY")
-if not key:
-    raise ValueError("Google API Key not found. Please set it in a .env file.")
-
-client = genai.Client(api_key=key)
-
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# Load family profiles from JSON
-family_profiles = []
-try:
-    with open(os.path.join(os.path.dirname(__file__), "family_data.json"), "r", encoding="utf-8") as f:
-        family_profiles = json.load(f)
-except Exception as e:
-    logger.error("Could not load family_data.json: %s", e)
-    # Fallback to hardcoded if file not found
-    family_profiles = [
-        {
-            "name": "Priya", "role": "Student", "BMI": 18.5, "gender": "Female",
-            "health_conditions": ["Vitamin D deficiency", "Anemia"],
-            "health_goals": ["Healthier lifestyle", "Nutritious meals"],
-            "access_to_kitchen": "rarely", "stress_level": "high", "meal_source": "fast_food"
-        },
-        {
-            "name": "Rajesh", "role": "Father", "BMI": 26, "gender": "Male",
-            "health_conditions": ["Hypertension"],
-            "health_goals": ["Reduce blood pressure", "Lose weight"],
-            "access_to_kitchen": "always", "stress_level": "moderate", "meal_source": "home_cooked"
-        },
-        {
-            "name": "Sunita", "role": "Mother (Primary Cook)", "BMI": 28, "gender": "Female",
-            "health_conditions": ["Pre-diabetic"],
-            "health_goals": ["Manage blood sugar", "Lose weight"],
-            "access_to_kitchen": "always", "stress_level": "moderate", "meal_source": "home_cooked"
-        }
-    ]
-
-environmentContext = {
-    "location": "Jaipur",
-    "availability": [
-        "tea", "poha", "upma", "dal", "rice", "chapati_flour", "seasonal_vegetables", "curd",
-        "banana", "roasted_chana", "buttermilk", "cooking_oil", "basic_spices", "community_meals",
-        "local_market", "senior_living_community_kitchen", "digital_literacy_workshop"
-    ],
-    "season": "Autumn",
-    "cultural_event": "local_fairs_and_meets"
-}
-
-priya_meal_log = {
-    "breakfast": "Skipped or instant noodles",
-    "lunch": "Fast food burger or budget thali",
-    "snacks": "Chips, cold drinks, samosa",
-    "dinner": "Maggi noodles or food court meal"
-}
-
-# Check if meal log has meaningful data, provide fallback if empty
-meal_log_has_data = any(value and value not in ["", "N/A", "None", "null"] for value in priya_meal_log.values())
-if not meal_log_has_data:
+
+def generate_family_report():
+    """
+    Build the family nutrition report with the LLM, save it to
+    family_nutrition_report.json and print it.
+
+    Used to run at import time; it is now only run from the command line so
+    importing this module (main.py, family_api.py) has no side effects.
+    """
+    key = os.getenv("GOOGLE_API_KEY")
+    if not key:
+        raise ValueError("Google API Key not found. Please set it in a .env file.")
+
+    # Load family profiles from JSON
+    family_profiles = []
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "family_data.json"), "r", encoding="utf-8") as f:
+            family_profiles = json.load(f)
+    except Exception as e:
+        logger.error("Could not load family_data.json: %s", e)
+        # Fallback to hardcoded if file not found
+        family_profiles = [
+            {
+                "name": "Priya", "role": "Student", "BMI": 18.5, "gender": "Female",
+                "health_conditions": ["Vitamin D deficiency", "Anemia"],
+                "health_goals": ["Healthier lifestyle", "Nutritious meals"],
+                "access_to_kitchen": "rarely", "stress_level": "high", "meal_source": "fast_food"
+            },
+            {
+                "name": "Rajesh", "role": "Father", "BMI": 26, "gender": "Male",
+                "health_conditions": ["Hypertension"],
+                "health_goals": ["Reduce blood pressure", "Lose weight"],
+                "access_to_kitchen": "always", "stress_level": "moderate", "meal_source": "home_cooked"
+            },
+            {
+                "name": "Sunita", "role": "Mother (Primary Cook)", "BMI": 28, "gender": "Female",
+                "health_conditions": ["Pre-diabetic"],
+                "health_goals": ["Manage blood sugar", "Lose weight"],
+                "access_to_kitchen": "always", "stress_level": "moderate", "meal_source": "home_cooked"
+            }
+        ]
+
+    environmentContext = {
+        "location": "Jaipur",
+        "availability": [
+            "tea", "poha", "upma", "dal", "rice", "chapati_flour", "seasonal_vegetables", "curd",
+            "banana", "roasted_chana", "buttermilk", "cooking_oil", "basic_spices", "community_meals",
+            "local_market", "senior_living_community_kitchen", "digital_literacy_workshop"
+        ],
+        "season": "Autumn",
+        "cultural_event": "local_fairs_and_meets"
+    }
+
     priya_meal_log = {
-        "breakfast": "Not specified - will provide general healthy recommendations",
-        "lunch": "Not specified - will provide general healthy recommendations",
-        "snacks": "Not specified - will provide general healthy recommendations",
-        "dinner": "Not specified - will provide general healthy recommendations"
+        "breakfast": "Skipped or instant noodles",
+        "lunch": "Fast food burger or budget thali",
+        "snacks": "Chips, cold drinks, samosa",
+        "dinner": "Maggi noodles or food court meal"
     }
 
-# Load local food data for context
-food_data = []
-try:
-    with open(os.path.join(os.path.dirname(__file__), "food_data.json"), "r", encoding="utf-8") as f:
-        food_data = json.load(f)
-    logger.info("Loaded food_data.json with %d posts", len(food_data))
-except Exception as e:
-    logger.warning("Could not load food_data.json: %s", e)
-
-# Load posts data for additional context
-posts_data = []
-try:
-    with open(os.path.join(os.path.dirname(__file__), "posts_data.json"), "r", encoding="utf-8") as f:
-        posts_data = json.load(f)
-    logger.info("Loaded posts_data.json with %d posts", len(posts_data))
-except Exception as e:
-    logger.warning("Could not load posts_data.json: %s", e)
-
-# Load digi_data.json for additional context
-digi_data = []
-try:
-    with open(os.path.join(os.path.dirname(__file__), "digi_data.json"), "r", encoding="utf-8") as f:
-        digi_data = json.load(f)
-    logger.info("Loaded digi_data.json with %d entries", len(digi_data))
-except Exception as e:
-    logger.warning("Could not load digi_data.json: %s", e)
-
-# Load insights.json if present
-previous_insights = {}
-try:
-    with open(os.path.join(os.path.dirname(__file__), "insights.json"), "r", encoding="utf-8") as f:
-        previous_insights = json.load(f)
-    logger.info("Loaded insights.json with %d entries", len(previous_insights))
-except Exception as e:
-    logger.info("No previous insights.json found or could not load it")
-    pass
-
-# Build context from food_data and posts_data similar to nudging.py
-meal_foods = set()
-for meal in priya_meal_log.values():
-    if isinstance(meal, str):
-        meal_foods.update(meal.lower().split())
-
-user_terms = set()
-for profile in family_profiles:
-    for key in ["health_conditions", "health_goals"]:
-        for item in profile.get(key, []):
-            user_terms.add(item.lower())
-
-# Combine food_data and posts_data for comprehensive matching
-all_posts = food_data + posts_data
-
-matches = []
-for post in all_posts:
-    keywords = set([k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)])
-    tags = set([t.lower() for t in post.get("tags", []) if isinstance(t, str)])
-    queries = set([q.lower() for q in post.get("queries", []) if isinstance(q, str)])
-    title = (post.get("post_title") or post.get("title") or "").lower()
-    description = (post.get("post_description") or post.get("text") or "").lower()
-
-    # Combine all searchable terms
-    all_search_terms = keywords | tags | queries
-
-    matched_terms = set()
-    match_sources = []
-
-    # Direct overlaps with meal foods and user terms
-    if meal_foods & all_search_terms:
-        overlap = meal_foods & all_search_terms
-        matched_terms.update(overlap)
-        match_sources.append("meal_foods")
-
-    if user_terms & all_search_terms:
-        overlap = user_terms & all_search_terms
-        matched_terms.update(overlap)
-        match_sources.append("user_profile_terms")
-
-    # Presence in title/description
-    for term in (meal_foods | user_terms):
-        if term in title or term in description:
-            matched_terms.add(term)
-            match_sources.append("title/description")
-
-    # Also check comments for additional context
-    comments = post.get("comments", [])
-    if isinstance(comments, list):
-        for comment in comments:
-            if isinstance(comment, str):
-                comment_lower = comment.lower()
-                for term in (meal_foods | user_terms):
-                    if term in comment_lower:
-                        matched_terms.add(term)
-                        match_sources.append("comments")
-
-    if matched_terms:
-        relevant_recs = []
-        recommendations = post.get("recommendations", [])
-        if isinstance(recommendations, list):
-            for rec in recommendations:
-                r_text = (rec.get("text") or "").lower()
-                if any(term in r_text for term in matched_terms):
-                    relevant_recs.append(rec)
-        elif isinstance(post.get("comments"), list):  # For posts_data format
-            # Use comments as recommendations for posts_data
-            for comment in post.get("comments", []):
+    # Check if meal log has meaningful data, provide fallback if empty
+    meal_log_has_data = any(value and value not in ["", "N/A", "None", "null"] for value in priya_meal_log.values())
+    if not meal_log_has_data:
+        priya_meal_log = {
+            "breakfast": "Not specified - will provide general healthy recommendations",
+            "lunch": "Not specified - will provide general healthy recommendations",
+            "snacks": "Not specified - will provide general healthy recommendations",
+            "dinner": "Not specified - will provide general healthy recommendations"
+        }
+
+    # Load local food data for context
+    food_data = []
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "food_data.json"), "r", encoding="utf-8") as f:
+            food_data = json.load(f)
+        logger.info("Loaded food_data.json with %d posts", len(food_data))
+    except Exception as e:
+        logger.warning("Could not load food_data.json: %s", e)
+
+    # Load posts data for additional context
+    posts_data = []
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "posts_data.json"), "r", encoding="utf-8") as f:
+            posts_data = json.load(f)
+        logger.info("Loaded posts_data.json with %d posts", len(posts_data))
+    except Exception as e:
+        logger.warning("Could not load posts_data.json: %s", e)
+
+    # Load digi_data.json for additional context
+    digi_data = []
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "digi_data.json"), "r", encoding="utf-8") as f:
+            digi_data = json.load(f)
+        logger.info("Loaded digi_data.json with %d entries", len(digi_data))
+    except Exception as e:
+        logger.warning("Could not load digi_data.json: %s", e)
+
+    # Load insights.json if present
+    previous_insights = {}
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "insights.json"), "r", encoding="utf-8") as f:
+            previous_insights = json.load(f)
+        logger.info("Loaded insights.json with %d entries", len(previous_insights))
+    except Exception as e:
+        logger.info("No previous insights.json found or could not load it")
+        pass
+
+    # Build context from food_data and posts_data similar to nudging.py
+    meal_foods = set()
+    for meal in priya_meal_log.values():
+        if isinstance(meal, str):
+            meal_foods.update(meal.lower().split())
+
+    user_terms = set()
+    for profile in family_profiles:
+        for key in ["health_conditions", "health_goals"]:
+            for item in profile.get(key, []):
+                user_terms.add(item.lower())
+
+    # Combine food_data and posts_data for comprehensive matching
+    all_posts = food_data + posts_data
+
+    matches = []
+    for post in all_posts:
+        keywords = set([k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)])
+        tags = set([t.lower() for t in post.get("tags", []) if isinstance(t, str)])
+        queries = set([q.lower() for q in post.get("queries", []) if isinstance(q, str)])
+        title = (post.get("post_title") or post.get("title") or "").lower()
+        description = (post.get("post_description") or post.get("text") or "").lower()
+
+        # Combine all searchable terms
+        all_search_terms = keywords | tags | queries
+
+        matched_terms = set()
+        match_sources = []
+
+        # Direct overlaps with meal foods and user terms
+        if meal_foods & all_search_terms:
+            overlap = meal_foods & all_search_terms
+            matched_terms.update(overlap)
+            match_sources.append("meal_foods")
+
+        if user_terms & all_search_terms:
+            overlap = user_terms & all_search_terms
+            matched_terms.update(overlap)
+            match_sources.append("user_profile_terms")
+
+        # Presence in title/description
+        for term in (meal_foods | user_terms):
+            if term in title or term in description:
+                matched_terms.add(term)
+                match_sources.append("title/description")
+
+        # Also check comments for additional context
+        comments = post.get("comments", [])
+        if isinstance(comments, list):
+            for comment in comments:
                 if isinstance(comment, str):
                     comment_lower = comment.lower()
-                    if any(term in comment_lower for term in matched_terms):
-                        relevant_recs.append({"text": comment, "type": "comment"})
-
-        matches.append({
-            "id": post.get("id") or post.get("title", "unknown"),
-            "title": post.get("post_title") or post.get("title", ""),
-            "matched_terms": list(matched_terms),
-            "match_sources": list(set(match_sources)),
-            "relevant_recommendations": relevant_recs[:5]  # Limit to 5
-        })
-
-context_summary = []
-for m in matches[:8]:  # Increased from 5 to 8 for more context
-    recs = m.get('relevant_recommendations', [])
-    if recs:
-        hint = (recs[0].get('text') or '')[:150].replace('\n', ' ')
-        context_summary.append(f"{m.get('id')}: {m.get('title')} -> {hint}")
-    else:
-        context_summary.append(f"{m.get('id')}: {m.get('title')}")
-
-# Add digi_data snippets
-for item in digi_data[:5]:  # Increased from 3 to 5
-    title = item.get("title", "")
-    text = item.get("text", "")[:120]  # Increased from 100
-    tags = item.get("tags", [])
-    if isinstance(tags, list):
-        tag_str = ", ".join(tags[:3])
-        context_summary.append(f"DIGI: {title} -> {text} [Tags: {tag_str}]")
-    else:
-        context_summary.append(f"DIGI: {title} -> {text}")
-
-# Add previous insights
-if previous_insights:
-    for k, v in list(previous_insights.items())[:5]:  # Increased from 3 to 5
-        if isinstance(v, str):
-            context_summary.append(f"INSIGHT: {k} -> {v[:120]}")
-
-combined_context_str = "\n".join(context_summary)
-
-# Log what we found
-logger.info("Number of context posts used: %d", len(context_summary))
-logger.info("Total matches found: %d", len(matches))
-if matches:
-    logger.info("Top matched terms: %s", ", ".join(list(set([term for m in matches[:3] for term in m.get("matched_terms", [])]))[:10]))
-
-# System instruction
-system_instruction = (
-    "You are an expert AI nutritionist specializing in family health management. "
-    "Analyze the provided family profiles, meal patterns, and environmental context to create personalized nutrition recommendations. "
-    "Consider each family member's health conditions, goals, access to kitchen facilities, and stress levels. "
-    "Take into account local food availability, seasonal factors, and cultural preferences. "
-    "If meal data is limited or missing, provide general healthy recommendations based on the family profiles. "
-    "Focus on practical, achievable changes that support the family's health goals. "
-    "Do NOT provide medical diagnoses - only nutritional and lifestyle suggestions."
-)
-
-# Prompt
-json_schema = FamilyHealthReport.model_json_schema()
-contents = (
-    "You are an expert AI nutritionist. Based on the family profiles and meal patterns provided, "
-    "generate a personalized nutrition report.\n\n"
-    "FAMILY PROFILES:\n" + json.dumps(family_profiles, indent=2) + "\n\n"
-    "MEAL PATTERNS:\n" + json.dumps(priya_meal_log, indent=2) + "\n\n"
-    "ENVIRONMENT CONTEXT:\n" + json.dumps(environmentContext, indent=2) + "\n\n"
-    "ADDITIONAL CONTEXT:\n" + combined_context_str + "\n\n"
-    "Generate a JSON object with the following structure (provide actual content, not the schema):\n"
-    "{\n"
-    '  "health_snapshot": "A brief overview of the family\'s current health status",\n'
-    '  "today_s_focus": "The most important nutritional goal for today",\n'
-    '  "condition_specific_advice": {\n'
-    '    "condition_name": "specific nutritional advice for this condition"\n'
-    '  },\n'
-    '  "coordinated_plan": {\n'
-    '    "nutritional_targets": {\n'
-    '      "calories_target": "recommended daily calorie range",\n'
-    '      "protein_target": "recommended protein intake",\n'
-    '      "key_nutrients": ["nutrient1", "nutrient2"]\n'
-    '    },\n'
-    '    "meal_plan": {\n'
-    '      "breakfast": {\n'
-    '        "meal_name": "suggested breakfast",\n'
-    '        "ingredients": ["ingredient1", "ingredient2"],\n'
-    '        "nutritional_highlights": "key nutritional benefits",\n'
-    '        "prep_time": "preparation time",\n'
-    '        "calories": "approximate calories"\n'
-    '      },\n'
-    '      "lunch": { ... similar structure ... },\n'
-    '      "dinner": { ... similar structure ... },\n'
-    '      "snacks": ["snack1", "snack2"]\n'
-    '    },\n'
-    '    "shopping_list": ["item1", "item2"],\n'
-    '    "prep_tips": ["tip1", "tip2"]\n'
-    '  }\n'
-    "}\n\n"
-    "Return ONLY the JSON object with actual content filled in. No explanations, no schema definitions, just the JSON data."
-)
-
-# Generate response
-try:
-    response = client.models.generate_content(
-        model="models/gemini-2.5-flash",
-        contents=contents,
-        config=types.GenerateContentConfig(
+                    for term in (meal_foods | user_terms):
+                        if term in comment_lower:
+                            matched_terms.add(term)
+                            match_sources.append("comments")
+
+        if matched_terms:
+            relevant_recs = []
+            recommendations = post.get("recommendations", [])
+            if isinstance(recommendations, list):
+                for rec in recommendations:
+                    r_text = (rec.get("text") or "").lower()
+                    if any(term in r_text for term in matched_terms):
+                        relevant_recs.append(rec)
+            elif isinstance(post.get("comments"), list):  # For posts_data format
+                # Use comments as recommendations for posts_data
+                for comment in post.get("comments", []):
+                    if isinstance(comment, str):
+                        comment_lower = comment.lower()
+                        if any(term in comment_lower for term in matched_terms):
+                            relevant_recs.append({"text": comment, "type": "comment"})
+
+            matches.append({
+                "id": post.get("id") or post.get("title", "unknown"),
+                "title": post.get("post_title") or post.get("title", ""),
+                "matched_terms": list(matched_terms),
+                "match_sources": list(set(match_sources)),
+                "relevant_recommendations": relevant_recs[:5]  # Limit to 5
+            })
+
+    context_summary = []
+    for m in matches[:8]:  # Increased from 5 to 8 for more context
+        recs = m.get('relevant_recommendations', [])
+        if recs:
+            hint = (recs[0].get('text') or '')[:150].replace('\n', ' ')
+            context_summary.append(f"{m.get('id')}: {m.get('title')} -> {hint}")
+        else:
+            context_summary.append(f"{m.get('id')}: {m.get('title')}")
+
+    # Add digi_data snippets
+    for item in digi_data[:5]:  # Increased from 3 to 5
+        title = item.get("title", "")
+        text = item.get("text", "")[:120]  # Increased from 100
+        tags = item.get("tags", [])
+        if isinstance(tags, list):
+            tag_str = ", ".join(tags[:3])
+            context_summary.append(f"DIGI: {title} -> {text} [Tags: {tag_str}]")
+        else:
+            context_summary.append(f"DIGI: {title} -> {text}")
+
+    # Add previous insights
+    if previous_insights:
+        for k, v in list(previous_insights.items())[:5]:  # Increased from 3 to 5
+            if isinstance(v, str):
+                context_summary.append(f"INSIGHT: {k} -> {v[:120]}")
+
+    combined_context_str = "\n".join(context_summary)
+
+    # Log what we found
+    logger.info("Number of context posts used: %d", len(context_summary))
+    logger.info("Total matches found: %d", len(matches))
+    if matches:
+        logger.info("Top matched terms: %s", ", ".join(list(set([term for m in matches[:3] for term in m.get("matched_terms", [])]))[:10]))
+
+    # System instruction
+    system_instruction = (
+        "You are an expert AI nutritionist specializing in family health management. "
+        "Analyze the provided family profiles, meal patterns, and environmental context to create personalized nutrition recommendations. "
+        "Consider each family member's health conditions, goals, access to kitchen facilities, and stress levels. "
+        "Take into account local food availability, seasonal factors, and cultural preferences. "
+        "If meal data is limited or missing, provide general healthy recommendations based on the family profiles. "
+        "Focus on practical, achievable changes that support the family's health goals. "
+        "Do NOT provide medical diagnoses - only nutritional and lifestyle suggestions."
+    )
+
+    # Prompt
+    json_schema = FamilyHealthReport.model_json_schema()
+    contents = (
+        "You are an expert AI nutritionist. Based on the family profiles and meal patterns provided, "
+        "generate a personalized nutrition report.\n\n"
+        "FAMILY PROFILES:\n" + json.dumps(family_profiles, indent=2) + "\n\n"
+        "MEAL PATTERNS:\n" + json.dumps(priya_meal_log, indent=2) + "\n\n"
+        "ENVIRONMENT CONTEXT:\n" + json.dumps(environmentContext, indent=2) + "\n\n"
+        "ADDITIONAL CONTEXT:\n" + combined_context_str + "\n\n"
+        "Generate a JSON object with the following structure (provide actual content, not the schema):\n"
+        "{\n"
+        '  "health_snapshot": "A brief overview of the family\'s current health status",\n'
+        '  "today_s_focus": "The most important nutritional goal for today",\n'
+        '  "condition_specific_advice": {\n'
+        '    "condition_name": "specific nutritional advice for this condition"\n'
+        '  },\n'
+        '  "coordinated_plan": {\n'
+        '    "nutritional_targets": {\n'
+        '      "calories_target": "recommended daily calorie range",\n'
+        '      "protein_target": "recommended protein intake",\n'
+        '      "key_nutrients": ["nutrient1", "nutrient2"]\n'
+        '    },\n'
+        '    "meal_plan": {\n'
+        '      "breakfast": {\n'
+        '        "meal_name": "suggested breakfast",\n'
+        '        "ingredients": ["ingredient1", "ingredient2"],\n'
+        '        "nutritional_highlights": "key nutritional benefits",\n'
+        '        "prep_time": "preparation time",\n'
+        '        "calories": "approximate calories"\n'
+        '      },\n'
+        '      "lunch": { ... similar structure ... },\n'
+        '      "dinner": { ... similar structure ... },\n'
+        '      "snacks": ["snack1", "snack2"]\n'
+        '    },\n'
+        '    "shopping_list": ["item1", "item2"],\n'
+        '    "prep_tips": ["tip1", "tip2"]\n'
+        '  }\n'
+        "}\n\n"
+        "Return ONLY the JSON object with actual content filled in. No explanations, no schema definitions, just the JSON data."
+    )
+
+    # Generate response
+    try:
+        response = llm_gateway.generate_sync(
+            contents,
+            model="models/gemini-2.5-flash",
             system_instruction=system_instruction,
             temperature=0.3,  # Lower temperature for more consistent JSON output
-            response_mime_type="application/json"  # Force JSON response
+            response_mime_type="application/json",  # Force JSON response
+            label="family.report",
         )
-    )
-except Exception as e:
-    logger.error(f"API call failed: {e}")
-    # Create a fallback response
-    response = type('Response', (), {'text': None})()
-
-# Debug: Print the raw response to inspect it
-if response.text:
-    print("Raw response text:", repr(response.text))
-    print("Response length:", len(response.text) if response.text else 0)
-else:
-    print("No response text received")
-
-# Check if response is valid
-if not response.text or response.text.strip() == "":
-    logger.error("Empty response from API")
-    report = FamilyHealthReport(
-        health_snapshot="API quota exceeded. Please try again later.",
-        today_s_focus="Focus on balanced meals with local ingredients.",
-        condition_specific_advice={
-            "General": "Maintain regular meal times and include vegetables in every meal."
-        },
-        coordinated_plan=CoordinatedPlan(
-            nutritional_targets=NutritionalTargets(
-                calories_target="1800-2200 kcal",
-                protein_target="60-80g",
-                key_nutrients=["Vitamin C", "Fiber", "Iron"]
-            ),
-            meal_plan=DailyMealPlan(
-                breakfast=MealSuggestion(
-                    meal_name="Vegetable Poha",
-                    ingredients=["Rice flakes", "Vegetables", "Spices"],
-                    nutritional_highlights="Good source of carbohydrates and vitamins",
-                    prep_time="15 minutes",
-                    calories="250-300"
-                ),
-                lunch=MealSuggestion(
-                    meal_name="Dal and Rice",
-                    ingredients=["Lentils", "Rice", "Vegetables"],
-                    nutritional_highlights="High in protein and fiber",
-                    prep_time="30 minutes",
-                    calories="400-500"
+    except Exception as e:
+        logger.error(f"API call failed: {e}")
+        # Create a fallback response
+        response = type('Response', (), {'text': None})()
+
+    # Debug: Print the raw response to inspect it
+    if response.text:
+        print("Raw response text:", repr(response.text))
+        print("Response length:", len(response.text) if response.text else 0)
+    else:
+        print("No response text received")
+
+    # Check if response is valid
+    if not response.text or response.text.strip() == "":
+        logger.error("Empty response from API")
+        report = FamilyHealthReport(
+            health_snapshot="API quota exceeded. Please try again later.",
+            today_s_focus="Focus on balanced meals with local ingredients.",
+            condition_specific_advice={
+                "General": "Maintain regular meal times and include vegetables in every meal."
+            },
+            coordinated_plan=CoordinatedPlan(
+                nutritional_targets=NutritionalTargets(
+                    calories_target="1800-2200 kcal",
+                    protein_target="60-80g",
+                    key_nutrients=["Vitamin C", "Fiber", "Iron"]
                 ),
-                dinner=MealSuggestion(
-                    meal_name="Vegetable Curry with Roti",
-                    ingredients=["Mixed vegetables", "Whole wheat flour", "Spices"],
-                    nutritional_highlights="Balanced meal with essential nutrients",
-                    prep_time="45 minutes",
-                    calories="350-450"
+                meal_plan=DailyMealPlan(
+                    breakfast=MealSuggestion(
+                        meal_name="Vegetable Poha",
+                        ingredients=["Rice flakes", "Vegetables", "Spices"],
+                        nutritional_highlights="Good source of carbohydrates and vitamins",
+                        prep_time="15 minutes",
+                        calories="250-300"
+                    ),
+                    lunch=MealSuggestion(
+                        meal_name="Dal and Rice",
+                        ingredients=["Lentils", "Rice", "Vegetables"],
+                        nutritional_highlights="High in protein and fiber",
+                        prep_time="30 minutes",
+                        calories="400-500"
+                    ),
+                    dinner=MealSuggestion(
+                        meal_name="Vegetable Curry with Roti",
+                        ingredients=["Mixed vegetables", "Whole wheat flour", "Spices"],
+                        nutritional_highlights="Balanced meal with essential nutrients",
+                        prep_time="45 minutes",
+                        calories="350-450"
+                    ),
+                    snacks=["Fruits", "Nuts", "Yogurt"]
                 ),
-                snacks=["Fruits", "Nuts", "Yogurt"]
-            ),
-            shopping_list=["Rice", "Lentils", "Vegetables", "Spices", "Fruits"],
-            prep_tips=["Prepare vegetables in advance", "Cook in batches", "Use seasonal ingredients"]
+                shopping_list=["Rice", "Lentils", "Vegetables", "Spices", "Fruits"],
+                prep_tips=["Prepare vegetables in advance", "Cook in batches", "Use seasonal ingredients"]
+            )
         )
-    )
-else:
-    # Attempt to parse and validate JSON using Pydantic
-    try:
-        # Clean the response text - remove markdown code blocks if present
-        cleaned_text = response.text.strip()
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:]
-        if cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:]
-        if cleaned_text.endswith("```"):
-            cleaned_text = cleaned_text[:-3]
-        cleaned_text = cleaned_text.strip()
-
-        print("Cleaned response text:", repr(cleaned_text))
-
-        # Try to parse as JSON
-        json_data = json.loads(cleaned_text)
-
-        # Check if we got the schema instead of actual data
-        if "$schema" in json_data or ("type" in json_data and json_data.get("type") == "object"):
-            logger.warning("AI returned schema instead of data, using fallback")
-            raise ValueError("Schema returned instead of data")
-
-        report = FamilyHealthReport(**json_data)
-        logger.info("Successfully parsed and validated JSON response using Pydantic")
-
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error("Failed to parse JSON response: %s", e)
-        logger.error("Cleaned response text: %s", cleaned_text)
-
-        # Try to extract JSON from the text if it's embedded
-        import re
-        json_match = re.search(r'\{.*\}', cleaned_text, re.DOTALL)
-        if json_match:
-            try:
-                json_data = json.loads(json_match.group())
-                if "$schema" not in json_data and json_data.get("type") != "object":
-                    report = FamilyHealthReport(**json_data)
-                    logger.info("Successfully extracted and parsed JSON from response")
-                else:
-                    raise ValueError("Extracted JSON is still a schema")
-            except Exception as e2:
-                logger.error("Failed to parse extracted JSON: %s", e2)
+    else:
+        # Attempt to parse and validate JSON using Pydantic
+        try:
+            # Clean the response text - remove markdown code blocks if present
+            cleaned_text = response.text.strip()
+            if cleaned_text.startswith("```json"):
+                cleaned_text = cleaned_text[7:]
+            if cleaned_text.startswith("```"):
+                cleaned_text = cleaned_text[3:]
+            if cleaned_text.endswith("```"):
+                cleaned_text = cleaned_text[:-3]
+            cleaned_text = cleaned_text.strip()
+
+            print("Cleaned response text:", repr(cleaned_text))
+
+            # Try to parse as JSON
+            json_data = json.loads(cleaned_text)
+
+            # Check if we got the schema instead of actual data
+            if "$schema" in json_data or ("type" in json_data and json_data.get("type") == "object"):
+                logger.warning("AI returned schema instead of data, using fallback")
+                raise ValueError("Schema returned instead of data")
+
+            report = FamilyHealthReport(**json_data)
+            logger.info("Successfully parsed and validated JSON response using Pydantic")
+
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error("Failed to parse JSON response: %s", e)
+            logger.error("Cleaned response text: %s", cleaned_text)
+
+            # Try to extract JSON from the text if it's embedded
+            import re
+            json_match = re.search(r'\{.*\}', cleaned_text, re.DOTALL)
+            if json_match:
+                try:
+                    json_data = json.loads(json_match.group())
+                    if "$schema" not in json_data and json_data.get("type") != "object":
+                        report = FamilyHealthReport(**json_data)
+                        logger.info("Successfully extracted and parsed JSON from response")
+                    else:
+                        raise ValueError("Extracted JSON is still a schema")
+                except Exception as e2:
+                    logger.error("Failed to parse extracted JSON: %s", e2)
+                    report = _create_fallback_report()
+            else:
                 report = _create_fallback_report()
-        else:
+        except Exception as e:
+            logger.error("Failed to validate response with Pydantic: %s", e)
+            logger.error("Response text: %s", response.text)
+            # Fallback: Provide a default report
             report = _create_fallback_report()
+
+    # Save report to JSON file
+    try:
+        report_dict = report.model_dump()
+        with open("family_nutrition_report.json", "w", encoding="utf-8") as f:
+            json.dump(report_dict, f, indent=2, ensure_ascii=False)
+        logger.info("Report saved to family_nutrition_report.json")
     except Exception as e:
-        logger.error("Failed to validate response with Pydantic: %s", e)
-        logger.error("Response text: %s", response.text)
-        # Fallback: Provide a default report
-        report = _create_fallback_report()
-
-# Save report to JSON file
-try:
-    report_dict = report.model_dump()
-    with open("family_nutrition_report.json", "w", encoding="utf-8") as f:
-        json.dump(report_dict, f, indent=2, ensure_ascii=False)
-    logger.info("Report saved to family_nutrition_report.json")
-except Exception as e:
-    logger.error("Failed to save report to JSON: %s", e)
-
-# Simulated app output
-print("\n" + "="*60)
-print("           🍲 Your Family's Nutrition Plan 🍲            ")
-print("="*60 + "\n")
-
-print("📊 Health Snapshot")
-print("-" * 40)
-print(f"{report.health_snapshot}\n")
-
-print("🎯 Today's Nutritional Focus")
-print("-" * 40)
-print(f"{report.today_s_focus}\n")
-
-print("🏥 Condition-Specific Advice")
-print("-" * 40)
-for condition, advice in report.condition_specific_advice.items():
-    print(f"• {condition}: {advice}")
-print()
-
-print("📈 Daily Nutritional Targets")
-print("-" * 40)
-targets = report.coordinated_plan.nutritional_targets
-print(f"• Calories: {targets.calories_target}")
-print(f"• Protein: {targets.protein_target}")
-print("• Key Nutrients:")
-for nutrient in targets.key_nutrients:
-    print(f"  - {nutrient}")
-print()
-
-print("🍽️  Today's Meal Plan")
-print("-" * 40)
-
-meal_plan = report.coordinated_plan.meal_plan
-
-print("🌅 BREAKFAST:")
-print(f"• {meal_plan.breakfast.meal_name}")
-print(f"  Ingredients: {', '.join(meal_plan.breakfast.ingredients)}")
-print(f"  Nutrition: {meal_plan.breakfast.nutritional_highlights}")
-print(f"  Prep Time: {meal_plan.breakfast.prep_time} | Calories: {meal_plan.breakfast.calories}")
-print()
-
-print("🌞 LUNCH:")
-print(f"• {meal_plan.lunch.meal_name}")
-print(f"  Ingredients: {', '.join(meal_plan.lunch.ingredients)}")
-print(f"  Nutrition: {meal_plan.lunch.nutritional_highlights}")
-print(f"  Prep Time: {meal_plan.lunch.prep_time} | Calories: {meal_plan.lunch.calories}")
-print()
-
-print("🌙 DINNER:")
-print(f"• {meal_plan.dinner.meal_name}")
-print(f"  Ingredients: {', '.join(meal_plan.dinner.ingredients)}")
-print(f"  Nutrition: {meal_plan.dinner.nutritional_highlights}")
-print(f"  Prep Time: {meal_plan.dinner.prep_time} | Calories: {meal_plan.dinner.calories}")
-print()
-
-print("🍿 Healthy Snacks:")
-for snack in meal_plan.snacks:
-    print(f"• {snack}")
-print()
-
-print("🛒 Shopping List")
-print("-" * 40)
-for item in report.coordinated_plan.shopping_list:
-    print(f"• {item}")
-print()
-
-print("💡 Preparation Tips")
-print("-" * 40)
-for tip in report.coordinated_plan.prep_tips:
-    print(f"• {tip}")
-
-print("\n" + "="*60)
+        logger.error("Failed to save report to JSON: %s", e)
+
+    # Simulated app output
+    print("\n" + "="*60)
+    print("           🍲 Your Family's Nutrition Plan 🍲            ")
+    print("="*60 + "\n")
+
+    print("📊 Health Snapshot")
+    print("-" * 40)
+    print(f"{report.health_snapshot}\n")
+
+    print("🎯 Today's Nutritional Focus")
+    print("-" * 40)
+    print(f"{report.today_s_focus}\n")
+
+    print("🏥 Condition-Specific Advice")
+    print("-" * 40)
+    for condition, advice in report.condition_specific_advice.items():
+        print(f"• {condition}: {advice}")
+    print()
+
+    print("📈 Daily Nutritional Targets")
+    print("-" * 40)
+    targets = report.coordinated_plan.nutritional_targets
+    print(f"• Calories: {targets.calories_target}")
+    print(f"• Protein: {targets.protein_target}")
+    print("• Key Nutrients:")
+    for nutrient in targets.key_nutrients:
+        print(f"  - {nutrient}")
+    print()
+
+    print("🍽️  Today's Meal Plan")
+    print("-" * 40)
+
+    meal_plan = report.coordinated_plan.meal_plan
+
+    print("🌅 BREAKFAST:")
+    print(f"• {meal_plan.breakfast.meal_name}")
+    print(f"  Ingredients: {', '.join(meal_plan.breakfast.ingredients)}")
+    print(f"  Nutrition: {meal_plan.breakfast.nutritional_highlights}")
+    print(f"  Prep Time: {meal_plan.breakfast.prep_time} | Calories: {meal_plan.breakfast.calories}")
+    print()
+
+    print("🌞 LUNCH:")
+    print(f"• {meal_plan.lunch.meal_name}")
+    print(f"  Ingredients: {', '.join(meal_plan.lunch.ingredients)}")
+    print(f"  Nutrition: {meal_plan.lunch.nutritional_highlights}")
+    print(f"  Prep Time: {meal_plan.lunch.prep_time} | Calories: {meal_plan.lunch.calories}")
+    print()
+
+    print("🌙 DINNER:")
+    print(f"• {meal_plan.dinner.meal_name}")
+    print(f"  Ingredients: {', '.join(meal_plan.dinner.ingredients)}")
+    print(f"  Nutrition: {meal_plan.dinner.nutritional_highlights}")
+    print(f"  Prep Time: {meal_plan.dinner.prep_time} | Calories: {meal_plan.dinner.calories}")
+    print()
+
+    print("🍿 Healthy Snacks:")
+    for snack in meal_plan.snacks:
+        print(f"• {snack}")
+    print()
+
+    print("🛒 Shopping List")
+    print("-" * 40)
+    for item in report.coordinated_plan.shopping_list:
+        print(f"• {item}")
+    print()
+
+    print("💡 Preparation Tips")
+    print("-" * 40)
+    for tip in report.coordinated_plan.prep_tips:
+        print(f"• {tip}")
+
+    print("\n" + "="*60)
 
 # Demo function for meal logging functionality
-def main():
+async def main():
     """
     Demonstrates the complete 'Adaptive Meal Scaffolding' workflow.
     """
@@ -1224,10 +1242,10 @@ def main():
         print(f"User's Idea: 'I want to cook {meal_idea} for dinner.'")
     else:
         print("User asks: 'What should I cook today?'")
-        meal_idea = tracker.get_meal_suggestion()
+        meal_idea = await tracker.get_meal_suggestion()
         print(f"AI Suggestion: 'How about making {meal_idea} today?'")
     
-    daily_plan = tracker.create_daily_plan(meal_idea)
+    daily_plan = await tracker.create_daily_plan(meal_idea)
 
     if not daily_plan:
         print("\nCould not generate a daily plan. Exiting demo.")
@@ -1241,7 +1259,7 @@ def main():
     deviation = "Had a samosa and chai with colleagues."
     print(f"User logs deviation: '{member_deviated} {deviation}'")
     
-    adaptive_nudge = tracker.log_meal_deviation_and_nudge(
+    adaptive_nudge = await tracker.log_meal_deviation_and_nudge(
         member_name=member_deviated, 
         deviation_description=deviation
     )
@@ -1257,5 +1275,6 @@ def main():
     print("="*60 + "\n")
 
 if __name__ == "__main__":
+    generate_family_report()
     # Run the adaptive meal scaffolding demo
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
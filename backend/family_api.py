@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional, Dict, List
+from email.utils import formatdate
+import base64
+import binascii
+import hashlib
 import uvicorn
 import logging
 import json
 import os
 from family import FamilyNutritionTracker
+import llm_gateway
+import recipe_corpus
+from result_cache import TTLCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +22,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Largest page /recipes/all serves when paginated, and how many serialized pages are kept
+RECIPE_PAGE_MAX = int(os.getenv("RECIPE_PAGE_MAX", "500"))
+RECIPE_PAGE_CACHE_SIZE = int(os.getenv("RECIPE_PAGE_CACHE_SIZE", "256"))
+# Serialized response bodies by ETag; the ETag includes the corpus version, so
+# pages of an older recipes1.json are never served and age out of the LRU
+_recipe_pages = TTLCache(maxsize=RECIPE_PAGE_CACHE_SIZE, ttl=float("inf"), name="recipe_pages")
+
 # Initialize the tracker
 tracker = FamilyNutritionTracker()
 
@@ -61,7 +76,7 @@ async def create_daily_plan(request: MealIdeaRequest):
     try:
         logger.info(f"Creating daily plan for meal idea: {request.meal_idea}")
         
-        plan = tracker.create_daily_plan(request.meal_idea)
+        plan = await tracker.create_daily_plan(request.meal_idea)
         
         if plan is None:
             raise HTTPException(status_code=500, detail="Failed to create coordinated meal plan")
@@ -101,7 +116,7 @@ async def log_meal(request: MealLogRequest):
 async def log_deviation(request: DeviationRequest):
     """Log a meal deviation and get adaptive nudge"""
     try:
-        nudge = tracker.log_meal_deviation_and_nudge(
+        nudge = await tracker.log_meal_deviation_and_nudge(
             request.member_name, 
             request.deviation_description
         )
@@ -124,7 +139,7 @@ async def log_deviation(request: DeviationRequest):
 async def get_meal_suggestion():
     """Get an AI-suggested meal idea"""
     try:
-        suggestion = tracker.get_meal_suggestion()
+        suggestion = await tracker.get_meal_suggestion()
         return {"suggestion": suggestion}
         
     except Exception as e:
@@ -163,64 +178,130 @@ async def get_meal_logs(days: int = 7):
 async def get_enhanced_report():
     """Generate enhanced family health report"""
     try:
-        report = tracker.generate_enhanced_report()
+        report = await tracker.generate_enhanced_report()
         return report.model_dump()
         
     except Exception as e:
         logger.error(f"Error generating enhanced report: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate enhanced report")
 
+def _encode_cursor(version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, version: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_version, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_version != version:
+        raise HTTPException(status_code=410, detail="Recipes changed since this cursor was issued; start from the first page")
+    return max(0, offset)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _cached_json(corpus, key: str, build, if_none_match: Optional[str]) -> Response:
+    """
+    The JSON response for `key` (which must identify the content within this
+    corpus version), serialized once per version and answered with 304 when
+    the client already has it.
+    """
+    etag = '"' + hashlib.sha1(f"{corpus.version}|{key}".encode()).hexdigest()[:24] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if corpus.modified is not None:
+        headers["Last-Modified"] = formatdate(corpus.modified, usegmt=True)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    body = _recipe_pages.get_or_set(
+        etag, lambda: json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _load_corpus():
+    try:
+        corpus = recipe_corpus.get_corpus()
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Invalid JSON format in recipes file")
+    if corpus is None:
+        raise HTTPException(status_code=404, detail="Recipes file not found")
+    return corpus
+
+def _recipe_dict(recipe, fields: Optional[List[str]] = None) -> dict:
+    # Ensure each recipe has an ID (on the copy; the shared corpus is read-only)
+    recipe_dict = recipe.to_dict(fields)
+    recipe_dict.setdefault("id", recipe.id)
+    return recipe_dict
+
 @router.get("/recipes/all")
-async def get_all_recipes():
-    """Get all recipes from recipes1.json"""
+async def get_all_recipes(
+    limit: Optional[int] = Query(None, ge=1, le=RECIPE_PAGE_MAX),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Get recipes from recipes1.json: all of them by default, or a page of
+    `limit` from `offset` / `cursor` (the previous page's `next_cursor`).
+    `fields` (comma-separated, e.g. TranslatedRecipeName,Cuisine,TotalTimeInMins,tags)
+    limits each recipe to those fields plus `id`. Responses carry an ETag;
+    send it back in If-None-Match to get 304 while the recipes are unchanged.
+    """
     try:
-        # Load recipes from recipes1.json
-        recipes_file = os.path.join(os.path.dirname(__file__), "recipes1.json")
-        
-        if not os.path.exists(recipes_file):
-            raise HTTPException(status_code=404, detail="Recipes file not found")
-        
-        with open(recipes_file, 'r', encoding='utf-8') as f:
-            recipes_data = json.load(f)
-        
-        # Handle different JSON structures
-        if isinstance(recipes_data, list):
-            recipes = recipes_data
-        elif isinstance(recipes_data, dict) and 'recipes' in recipes_data:
-            recipes = recipes_data['recipes']
-        else:
-            recipes = [recipes_data]  # Single recipe object
-        
-        # Ensure each recipe has an ID
-        for i, recipe in enumerate(recipes):
-            if 'id' not in recipe:
-                recipe['id'] = f"recipe_{i}"
-        
-        return {
-            "recipes": recipes,
-            "total": len(recipes)
-        }
+        corpus = _load_corpus()
+        if cursor:
+            offset = _decode_cursor(cursor, corpus.version)
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        total = len(corpus)
+        end = total if limit is None else min(total, offset + limit)
+
+        def build():
+            return {
+                "recipes": [_recipe_dict(corpus[i], field_list) for i in range(offset, end)],
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "next_cursor": _encode_cursor(corpus.version, end) if end < total else None,
+            }
+
+        key = f"all|{','.join(field_list) if field_list else '*'}|{offset}|{limit}"
+        return _cached_json(corpus, key, build, if_none_match)
         
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Recipes file not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid JSON format in recipes file")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading recipes: {e}")
         raise HTTPException(status_code=500, detail="Failed to load recipes")
 
+@router.get("/recipes/{recipe_id}")
+async def get_recipe(recipe_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get one recipe from recipes1.json by its id, with the same ETag handling as /recipes/all"""
+    try:
+        corpus = _load_corpus()
+        position = corpus.position_of(recipe_id)
+        if position is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        return _cached_json(corpus, f"recipe|{position}", lambda: _recipe_dict(corpus[position]), if_none_match)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading recipe {recipe_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load recipe")
+
 @router.post("/recipes/recommendations")
 async def get_recipe_recommendations(request: RecipeRecommendationRequest):
     """Get AI-powered recipe recommendations based on user query"""
     try:
         logger.info(f"Getting recipe recommendations for query: {request.query}")
         
-        # Use the same Gemini client from FamilyNutritionTracker
-        from google import genai
-        from google.genai import types
-        
-        client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-        
         # Build context from user preferences
         preferences = request.preferences or {}
         preferences_context = f"""
@@ -262,10 +343,11 @@ async def get_recipe_recommendations(request: RecipeRecommendationRequest):
         """
         
         # Call the LLM
-        response = client.models.generate_content(
+        response = await llm_gateway.generate(
+            prompt,
             model="models/gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.7)
+            temperature=0.7,
+            label="family.recipe_recommendations",
         )
         
         if response.text:
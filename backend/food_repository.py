@@ -0,0 +1,390 @@
+import asyncio
+import functools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import food_search
+import mongo_pool
+from result_cache import ShuffledPool, TTLCache, normalize_query, search_key
+
+# pymongo is synchronous; queries run on a dedicated pool sized to the Mongo
+# connection pool so handlers can await them without blocking the event loop.
+MONGO_QUERY_WORKERS = int(os.getenv("MONGO_QUERY_WORKERS", str(min(32, mongo_pool.MONGO_MAX_POOL_SIZE))))
+
+_executor = None
+
+# Result caching for repeated queries ("dal", "poha", ...) and $sample suggestions
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+SAMPLE_POOL_SIZE = int(os.getenv("SAMPLE_POOL_SIZE", "200"))
+SAMPLE_POOL_TTL_SECONDS = float(os.getenv("SAMPLE_POOL_TTL_SECONDS", "600"))
+
+search_cache = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL_SECONDS, name="search")
+sample_pools = TTLCache(64, SAMPLE_POOL_TTL_SECONDS, name="sample_pools")
+
+FOOD_PROJECTION = {
+    "_id": 0,
+    "dish_name": 1,
+    "ingredients": 1,
+    "calories_kcal": 1,
+    "protein_g": 1,
+    "cuisine": 1,
+    "meal_type": 1
+}
+
+def run_atlas_search_query(collection, query, search_path="dish_name", index_name="default", limit=10):
+    """
+    Run an Atlas Search query on the specified collection.
+
+    Args:
+        collection: MongoDB collection object
+        query (str): Search query string
+        search_path (str): Field to search in (default: "dish_name")
+        index_name (str): Name of the Atlas Search index (default: "default")
+        limit (int): Maximum number of results to return
+
+    Returns:
+        list: List of matching documents
+    """
+    try:
+        # Define the aggregation pipeline for Atlas Search
+        pipeline = [
+            {
+                "$search": {
+                    "index": index_name,
+                    "text": {
+                        "query": query,
+                        "path": search_path
+                    }
+                }
+            },
+            {
+                "$limit": limit
+            },
+            {
+                "$project": {
+                    "_id": 0,  # Exclude the _id field from results
+                    "dish_name": 1,
+                    "ingredients": 1,
+                    "calories_kcal": 1,
+                    "protein_g": 1,
+                    "cuisine": 1,
+                    "meal_type": 1,
+                    "score": {"$meta": "searchScore"}  # Include search relevance score
+                }
+            }
+        ]
+
+        # Execute the aggregation pipeline
+        results = list(collection.aggregate(pipeline))
+
+        print(f"🔍 Found {len(results)} results for query: '{query}'")
+        return results
+
+    except Exception as e:
+        print(f"❌ Atlas Search query failed: {e}")
+        print("💡 This might be due to:")
+        print("   - Atlas Search index not configured")
+        print("   - Incorrect index name")
+        print("   - Network connectivity issues")
+        return []
+
+def run_atlas_search_with_fallback(collection, query, search_path="dish_name", index_name="default", limit=10):
+    """
+    Run Atlas Search with regex fallback if Atlas Search fails.
+
+    Args:
+        collection: MongoDB collection object
+        query (str): Search query string
+        search_path (str): Field to search in
+        index_name (str): Name of the Atlas Search index
+        limit (int): Maximum number of results to return
+
+    Returns:
+        list: List of matching documents
+    """
+    # First, try Atlas Search
+    results = run_atlas_search_query(collection, query, search_path, index_name, limit)
+
+    # If no results from Atlas Search, try regex fallback
+    if not results:
+        print("🔄 Atlas Search returned no results, trying regex fallback...")
+        try:
+            # Create a regex pattern for case-insensitive search
+            regex_pattern = {"$regex": query, "$options": "i"}
+
+            # Search using regex
+            cursor = collection.find(
+                {search_path: regex_pattern},
+                {
+                    "_id": 0,
+                    "dish_name": 1,
+                    "ingredients": 1,
+                    "calories_kcal": 1,
+                    "protein_g": 1,
+                    "cuisine": 1,
+                    "meal_type": 1
+                }
+            ).limit(limit)
+
+            results = list(cursor)
+            print(f"🔍 Regex fallback found {len(results)} results for query: '{query}'")
+
+        except Exception as e:
+            print(f"❌ Regex fallback also failed: {e}")
+            results = []
+
+    return results
+
+def search_recipes_by_ingredients(collection, ingredients_list, index_name="default", limit=10):
+    """
+    Search for recipes that contain specific ingredients using Atlas Search.
+
+    Args:
+        collection: MongoDB collection object
+        ingredients_list (list): List of ingredient names to search for
+        index_name (str): Name of the Atlas Search index
+        limit (int): Maximum number of results to return
+
+    Returns:
+        list: List of matching recipes
+    """
+    try:
+        # Create a compound query for multiple ingredients
+        should_clauses = []
+        for ingredient in ingredients_list:
+            should_clauses.append({
+                "text": {
+                    "query": ingredient,
+                    "path": "ingredients"
+                }
+            })
+
+        pipeline = [
+            {
+                "$search": {
+                    "index": index_name,
+                    "compound": {
+                        "should": should_clauses,
+                        "minimumShouldMatch": 1  # At least one ingredient should match
+                    }
+                }
+            },
+            {
+                "$limit": limit
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "dish_name": 1,
+                    "ingredients": 1,
+                    "calories_kcal": 1,
+                    "protein_g": 1,
+                    "cuisine": 1,
+                    "meal_type": 1,
+                    "score": {"$meta": "searchScore"}
+                }
+            }
+        ]
+
+        results = list(collection.aggregate(pipeline))
+        print(f"🔍 Found {len(results)} recipes containing ingredients: {ingredients_list}")
+        return results
+
+    except Exception as e:
+        print(f"❌ Ingredient search failed: {e}")
+        return []
+
+def sample_foods(collection, limit=10, match=None, projection=None):
+    """
+    Return a random sample of foods, optionally filtered by a $match query.
+
+    Falls back to a plain find() if $sample is not available.
+
+    Args:
+        collection: MongoDB collection object
+        limit (int): Number of documents to return
+        match (dict): Optional filter applied before sampling
+        projection (dict): Fields to return (default: FOOD_PROJECTION)
+
+    Returns:
+        list: List of sampled documents
+    """
+    projection = projection or FOOD_PROJECTION
+    try:
+        pipeline = [
+            {"$match": match or {}},
+            {"$sample": {"size": limit}},
+            {"$project": projection}
+        ]
+        return list(collection.aggregate(pipeline))
+    except Exception as e:
+        print(f"❌ $sample failed, using find(): {e}")
+        return list(collection.find(match or {}, projection).limit(limit))
+
+
+def lookup_dishes(collection, queries, limit=1, index_name="default"):
+    """
+    Full food documents for many dish-name queries in a constant number of round-trips.
+
+    Served from the local index when it is loaded. Otherwise all queries go to
+    Atlas in one aggregation ($search per query, combined with $unionWith), and
+    the queries that found nothing share one regex aggregation with a $facet
+    per query, so each gets up to `limit` documents of its own.
+
+    Returns:
+        dict: {query: [documents]} for every non-empty query
+    """
+    queries = list(dict.fromkeys(q for q in queries if isinstance(q, str) and q.strip()))
+    results = {q: [] for q in queries}
+    if not queries:
+        return results
+
+    index = food_search.get_index()
+    if index is not None:
+        for q in queries:
+            results[q] = index.lookup(q, limit=limit)
+        return results
+    if collection is None:
+        return results
+
+    def _branch(i, q):
+        return [
+            {"$search": {"index": index_name, "text": {"query": q, "path": "dish_name"}}},
+            {"$limit": limit},
+            {"$project": {"_id": 0}},
+            {"$addFields": {"_query": i}},
+        ]
+
+    pipeline = _branch(0, queries[0]) + [
+        {"$unionWith": {"coll": collection.name, "pipeline": _branch(i, q)}}
+        for i, q in enumerate(queries[1:], 1)
+    ]
+    try:
+        for doc in collection.aggregate(pipeline):
+            results[queries[doc.pop("_query")]].append(doc)
+    except Exception as e:
+        print(f"❌ Batched Atlas Search failed, using regex fallback: {e}")
+
+    missing = [q for q in queries if not results[q]]
+    if missing:
+        patterns = [re.compile(re.escape(q), re.I) for q in missing]
+        pipeline = [
+            {"$match": {"dish_name": {"$in": patterns}}},
+            {"$project": {"_id": 0}},
+            {"$facet": {
+                str(i): [{"$match": {"dish_name": pattern}}, {"$limit": limit}]
+                for i, pattern in enumerate(patterns)
+            }},
+        ]
+        try:
+            facets = next(collection.aggregate(pipeline), {})
+        except Exception:
+            facets = {}
+        for i, q in enumerate(missing):
+            results[q] = facets.get(str(i), [])
+    return results
+
+
+# Async wrappers used by the FastAPI handlers
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MONGO_QUERY_WORKERS, thread_name_prefix="mongo-query")
+    return _executor
+
+
+async def _offload(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def local_search_ready():
+    """True when searches can be answered from the in-process index without Atlas."""
+    return food_search.get_index() is not None
+
+
+async def search_with_fallback_async(collection, query, search_path="dish_name", index_name="default", limit=10):
+    """Awaitable, cached run_atlas_search_with_fallback, served from the local index when loaded."""
+    key = search_key(query, search_path, limit)
+    hit, results = search_cache.get(key)
+    if hit:
+        return results
+    index = food_search.get_index()
+    if index is not None:
+        results = index.search(query, search_path=search_path, limit=limit)
+    else:
+        results = await _offload(run_atlas_search_with_fallback, collection, query, search_path, index_name, limit)
+    # empty results may just mean Atlas was unreachable, so they are not cached
+    if results:
+        search_cache.set(key, results)
+    return results
+
+
+async def search_by_ingredients_async(collection, ingredients_list, index_name="default", limit=10):
+    """Awaitable, cached search_recipes_by_ingredients, served from the local index when loaded."""
+    key = search_key(",".join(sorted(normalize_query(i) for i in ingredients_list)), "ingredients", limit)
+    hit, results = search_cache.get(key)
+    if hit:
+        return results
+    index = food_search.get_index()
+    if index is not None:
+        results = index.search_ingredients(ingredients_list, limit=limit)
+    else:
+        results = await _offload(search_recipes_by_ingredients, collection, ingredients_list, index_name, limit)
+    if results:
+        search_cache.set(key, results)
+    return results
+
+
+async def sample_foods_async(collection, limit=10, meal_type=None, cuisine=None):
+    """
+    Random suggestions served from a cached, pre-shuffled pool.
+
+    meal_type/cuisine are case-insensitive substring filters. Each distinct
+    filter fills its pool once (SAMPLE_POOL_SIZE documents, from the local
+    index or a single $sample aggregation) and later calls take slices of it.
+    """
+    key = (normalize_query(meal_type), normalize_query(cuisine))
+    hit, pool = sample_pools.get(key)
+    if not hit:
+        index = food_search.get_index()
+        if index is not None:
+            docs = index.sample(SAMPLE_POOL_SIZE, meal_type=meal_type, cuisine=cuisine)
+        else:
+            match = {}
+            if meal_type:
+                match["meal_type"] = {"$regex": re.escape(meal_type), "$options": "i"}
+            if cuisine:
+                match["cuisine"] = {"$regex": re.escape(cuisine), "$options": "i"}
+            docs = await _offload(sample_foods, collection, SAMPLE_POOL_SIZE, match)
+        pool = ShuffledPool(docs)
+        if docs:
+            sample_pools.set(key, pool)
+    return pool.take(limit)
+
+
+def invalidate_caches(*_):
+    """Drop cached results; registered to run whenever the food index reloads."""
+    search_cache.clear()
+    sample_pools.clear()
+
+
+def cache_stats():
+    return {
+        "search": search_cache.stats(),
+        "sample_pools": sample_pools.stats(),
+        "sample_pool_size": SAMPLE_POOL_SIZE,
+    }
+
+
+food_search.on_reload(invalidate_caches)
+
+
+def shutdown():
+    """Stop the query worker threads. Called from the app lifespan."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
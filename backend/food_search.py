@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+
+import mongo_pool
+from text_index import InvertedIndex
+
+load_dotenv()
+
+# "local" serves searches from the in-process index (Atlas is used only until the
+# first snapshot is loaded); "atlas" always queries MongoDB Atlas Search.
+FOOD_SEARCH_BACKEND = os.getenv("FOOD_SEARCH_BACKEND", "local").lower()
+FOOD_SNAPSHOT_FILE = os.getenv("FOOD_SNAPSHOT_FILE", os.path.join(os.path.dirname(__file__), "food_collection.json"))
+FOOD_INDEX_REFRESH_SECONDS = int(os.getenv("FOOD_INDEX_REFRESH_SECONDS", "900"))
+
+SEARCH_FIELDS = ("dish_name", "ingredients", "cuisine", "meal_type")
+RESULT_FIELDS = ("dish_name", "ingredients", "calories_kcal", "protein_g", "cuisine", "meal_type")
+
+
+class FoodSearchIndex:
+    """Immutable search index over a snapshot of food_collection documents."""
+
+    def __init__(self, docs: List[dict], source: str = "memory"):
+        self.docs = docs
+        self.source = source
+        self.built_at = time.time()
+        started = time.perf_counter()
+        self.index = InvertedIndex(SEARCH_FIELDS)
+        for doc in docs:
+            self.index.add(doc)
+        self.index.finalize()
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _result(self, doc_id: int, score: Optional[float] = None) -> dict:
+        doc = self.docs[doc_id]
+        result = {k: doc.get(k) for k in RESULT_FIELDS if k in doc}
+        if score is not None:
+            result["score"] = round(score, 4)
+        return result
+
+    def search(self, query: str, search_path: str = "dish_name", limit: int = 10) -> List[dict]:
+        """Ranked results in the same shape as the Atlas Search projection."""
+        hits = self.index.search(query, search_path, limit=limit)
+        return [self._result(doc_id, score) for doc_id, score in hits]
+
+    def search_ingredients(self, ingredients_list: List[str], limit: int = 10) -> List[dict]:
+        """Documents matching any of the ingredients (like compound.should with minimumShouldMatch=1)."""
+        return self.search(" ".join(ingredients_list), search_path="ingredients", limit=limit)
+
+    def lookup(self, query: str, limit: int = 1) -> List[dict]:
+        """Full documents (all nutrient fields) for the best matches on dish_name."""
+        hits = self.index.search(query, "dish_name", limit=limit)
+        return [dict(self.docs[doc_id]) for doc_id, _ in hits]
+
+    def filter(self, meal_type: Optional[str] = None, cuisine: Optional[str] = None) -> List[int]:
+        """Doc ids whose meal_type/cuisine contain the given values (case-insensitive)."""
+        meal_type = (meal_type or "").lower()
+        cuisine = (cuisine or "").lower()
+        ids = []
+        for doc_id, doc in enumerate(self.docs):
+            if meal_type and meal_type not in str(doc.get("meal_type") or "").lower():
+                continue
+            if cuisine and cuisine not in str(doc.get("cuisine") or "").lower():
+                continue
+            ids.append(doc_id)
+        return ids
+
+    def sample(self, limit: int = 10, meal_type: Optional[str] = None, cuisine: Optional[str] = None) -> List[dict]:
+        ids = self.filter(meal_type, cuisine)
+        return [self._result(doc_id) for doc_id in random.sample(ids, min(limit, len(ids)))]
+
+
+_index: Optional[FoodSearchIndex] = None
+_snapshot_mtime: Optional[float] = None
+_reload_listeners: List[Callable[[FoodSearchIndex], None]] = []
+_refresh_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+_refresh_lock = threading.Lock()
+
+
+def load_snapshot():
+    """
+    Load food documents from the JSON export if present, otherwise from Atlas.
+
+    Returns:
+        (docs, source) or (None, None) if neither is available
+    """
+    if FOOD_SNAPSHOT_FILE and os.path.exists(FOOD_SNAPSHOT_FILE):
+        with open(FOOD_SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f), FOOD_SNAPSHOT_FILE
+
+    collection = mongo_pool.get_collection()
+    if collection is None:
+        return None, None
+    try:
+        return list(collection.find({}, {"_id": 0})), "mongodb"
+    except Exception as e:
+        print(f"❌ Failed to load food_collection snapshot: {e}")
+        return None, None
+
+
+def export_snapshot(path: str = FOOD_SNAPSHOT_FILE) -> int:
+    """Write the current food_collection to a JSON file usable as FOOD_SNAPSHOT_FILE."""
+    collection = mongo_pool.get_collection()
+    if collection is None:
+        raise RuntimeError("MONGO_URI is not configured")
+    docs = list(collection.find({}, {"_id": 0}))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(docs, f, ensure_ascii=False)
+    return len(docs)
+
+
+def _snapshot_changed() -> bool:
+    if not (FOOD_SNAPSHOT_FILE and os.path.exists(FOOD_SNAPSHOT_FILE)):
+        return True  # Atlas-backed snapshots are simply reloaded on every refresh
+    return os.path.getmtime(FOOD_SNAPSHOT_FILE) != _snapshot_mtime
+
+
+def refresh(force: bool = False) -> bool:
+    """Rebuild the index from the latest snapshot and swap it in. Returns True if reloaded."""
+    global _index, _snapshot_mtime
+    with _refresh_lock:
+        if not force and _index is not None and not _snapshot_changed():
+            return False
+        docs, source = load_snapshot()
+        if docs is None:
+            return False
+        new_index = FoodSearchIndex(docs, source)
+        if source == FOOD_SNAPSHOT_FILE:
+            _snapshot_mtime = os.path.getmtime(FOOD_SNAPSHOT_FILE)
+        _index = new_index
+    print(f"✅ Food search index built: {len(new_index)} docs from {source} in {new_index.build_ms:.0f} ms")
+    for listener in list(_reload_listeners):
+        try:
+            listener(new_index)
+        except Exception as e:
+            print(f"❌ Food index reload listener failed: {e}")
+    return True
+
+
+def on_reload(callback: Callable[[FoodSearchIndex], None]):
+    """Register a callback invoked after every successful index rebuild."""
+    _reload_listeners.append(callback)
+    return callback
+
+
+def get_index() -> Optional[FoodSearchIndex]:
+    """The local index if the local backend is enabled and a snapshot is loaded."""
+    if FOOD_SEARCH_BACKEND != "local":
+        return None
+    return _index
+
+
+def _refresh_loop():
+    while not _stop_event.is_set():
+        try:
+            refresh()
+        except Exception as e:
+            print(f"❌ Food search index refresh failed: {e}")
+        _stop_event.wait(FOOD_INDEX_REFRESH_SECONDS)
+
+
+def start_background_refresh():
+    """Build the index off the request path and keep it fresh. Called from the app lifespan."""
+    global _refresh_thread
+    if FOOD_SEARCH_BACKEND != "local" or (_refresh_thread and _refresh_thread.is_alive()):
+        return
+    _stop_event.clear()
+    _refresh_thread = threading.Thread(target=_refresh_loop, name="food-index-refresh", daemon=True)
+    _refresh_thread.start()
+
+
+def stop_background_refresh():
+    _stop_event.set()
+
+
+def index_stats() -> dict:
+    index = _index
+    return {
+        "backend": FOOD_SEARCH_BACKEND,
+        "ready": index is not None,
+        "documents": len(index) if index else 0,
+        "source": index.source if index else None,
+        "built_at": index.built_at if index else None,
+        "build_ms": round(index.build_ms, 1) if index else None,
+        "refresh_seconds": FOOD_INDEX_REFRESH_SECONDS,
+    }
+
+
+if __name__ == "__main__":
+    count = export_snapshot()
+    print(f"✅ Exported {count} documents to {FOOD_SNAPSHOT_FILE}")
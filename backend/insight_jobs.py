@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_WORKERS = int(os.getenv("INSIGHT_WORKERS", "4"))
+INSIGHT_QUEUE_SIZE = int(os.getenv("INSIGHT_QUEUE_SIZE", "1000"))
+# A job is handed to the workers only once its user has stopped editing for this long
+INSIGHT_COALESCE_SECONDS = float(os.getenv("INSIGHT_COALESCE_SECONDS", "0.5"))
+INSIGHT_JOB_HISTORY = int(os.getenv("INSIGHT_JOB_HISTORY", "1000"))
+INSIGHT_JOB_TTL_SECONDS = float(os.getenv("INSIGHT_JOB_TTL_SECONDS", "3600"))
+
+
+class QueueFullError(Exception):
+    """Too many insight jobs are waiting; the caller should retry later."""
+
+
+class InsightJob:
+    def __init__(self, user_id: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = "queued"
+        self.submissions = 1
+        self.created_at = time.time()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "submissions": self.submissions,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "done":
+            out["result"] = self.result
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class InsightJobQueue:
+    """
+    Bounded asyncio worker pool for insight generation.
+
+    submit() returns at once. A new job is handed to the workers after
+    INSIGHT_COALESCE_SECONDS without further submits for its user; until it
+    starts running, submits for that user join it instead of adding work, so a
+    burst of meal-log edits produces one generation that sees the final log.
+    A user's jobs run one at a time: a job dequeued while an older one for
+    the same user is running is held (still joinable) and enqueued when that
+    one finishes, so a stale generation never overwrites a newer one.
+    Waiting jobs do not hold a worker. Workers start on first submit in the
+    running event loop.
+    """
+
+    def __init__(self, run: Callable[[str], Awaitable[Any]], workers: int = INSIGHT_WORKERS,
+                 max_queue: int = INSIGHT_QUEUE_SIZE, coalesce_seconds: float = INSIGHT_COALESCE_SECONDS):
+        self.run = run
+        self.workers = workers
+        self.max_queue = max_queue
+        self.coalesce_seconds = coalesce_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+        self.jobs: "OrderedDict[str, InsightJob]" = OrderedDict()
+        self._pending: Dict[str, InsightJob] = {}  # user_id -> job not yet running
+        self._running: Dict[str, InsightJob] = {}
+        self._held: Dict[str, InsightJob] = {}  # user_id -> job waiting for the user's running job
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # first use, or the app restarted on a new loop (e.g. in tests)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+        self._running.clear()
+        self._held.clear()
+        self._tasks = [loop.create_task(self._worker(i)) for i in range(self.workers)]
+
+    def submit(self, user_id: str) -> InsightJob:
+        self._ensure_workers()
+        self.submitted += 1
+        job = self._pending.get(user_id)
+        if job is not None:
+            job.submissions += 1
+            self.coalesced += 1
+            if job.timer is not None:
+                # still settling: restart the quiet period
+                job.timer.cancel()
+                job.timer = self._loop.call_later(self.coalesce_seconds, self._enqueue, job)
+            return job
+        if len(self._pending) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.max_queue} insight jobs already waiting")
+        job = InsightJob(user_id)
+        job.timer = self._loop.call_later(self.coalesce_seconds, self._enqueue, job)
+        self._pending[user_id] = job
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def _enqueue(self, job: InsightJob):
+        job.timer = None
+        self._queue.put_nowait(job)
+
+    def get(self, job_id: str) -> Optional[InsightJob]:
+        return self.jobs.get(job_id)
+
+    def active(self, user_id: str) -> Optional[InsightJob]:
+        """The user's waiting or running job, if any."""
+        return self._pending.get(user_id) or self._running.get(user_id)
+
+    def claim(self, user_id: str) -> Optional[InsightJob]:
+        """
+        Take over the user's job if it is still settling, so the caller can run
+        it itself (the streaming endpoint does) and report it with finish().
+        Returns None when there is no such job.
+        """
+        job = self._pending.get(user_id)
+        if job is None or job.timer is None or user_id in self._running:
+            # none, already handed to the workers, or it must wait for the running job
+            return None
+        job.timer.cancel()
+        job.timer = None
+        del self._pending[user_id]
+        self._start(job)
+        return job
+
+    def _start(self, job: InsightJob):
+        job.status = "running"
+        job.started_at = time.time()
+        self._running[job.user_id] = job
+
+    def finish(self, job: InsightJob, result: Any = None, error: Optional[str] = None):
+        if error is None and isinstance(result, dict) and set(result) == {"error"}:
+            error = str(result["error"])
+        if error is not None:
+            job.status = "failed"
+            job.error = error
+            self.failed += 1
+        else:
+            job.status = "done"
+            job.result = result
+            self.completed += 1
+        job.finished_at = time.time()
+        if self._running.get(job.user_id) is job:
+            del self._running[job.user_id]
+            held = self._held.pop(job.user_id, None)
+            if held is not None:
+                self._queue.put_nowait(held)
+        job.done.set()
+
+    async def wait(self, job: InsightJob, timeout: float) -> InsightJob:
+        """Wait up to `timeout` seconds for the job to finish (long-poll)."""
+        if not job.finished and timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def _worker(self, n: int):
+        while True:
+            job = await self._queue.get()
+            if job.user_id in self._running:
+                # one job per user at a time; this one runs once the current one finishes
+                self._held[job.user_id] = job
+                self._queue.task_done()
+                continue
+            try:
+                # from here on new submits start a fresh job that will see newer state
+                if self._pending.get(job.user_id) is job:
+                    del self._pending[job.user_id]
+                self._start(job)
+                self.finish(job, result=await self.run(job.user_id))
+            except asyncio.CancelledError:
+                self.finish(job, error="cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Insight job {job.id} for {job.user_id} failed: {e}")
+                self.finish(job, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        """Forget finished jobs beyond INSIGHT_JOB_HISTORY or older than INSIGHT_JOB_TTL_SECONDS."""
+        cutoff = time.time() - INSIGHT_JOB_TTL_SECONDS
+        excess = len(self.jobs) - INSIGHT_JOB_HISTORY
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            if not job.finished:
+                continue
+            if excess > 0 or (job.finished_at or 0) < cutoff:
+                del self.jobs[job_id]
+                excess -= 1
+            else:
+                break
+
+    async def stop(self):
+        for job in self._pending.values():
+            if job.timer is not None:
+                job.timer.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "waiting": len(self._pending),
+            "running": len(self._running),
+            "held": len(self._held),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "coalesce_seconds": self.coalesce_seconds,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "jobs_by_status": statuses,
+        }
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "always": fsync every append, "interval": at most every JOURNAL_FSYNC_INTERVAL_SECONDS,
+# "never": leave it to the OS (a process crash loses nothing, a power loss may)
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "interval")
+JOURNAL_FSYNC_INTERVAL_SECONDS = float(os.getenv("JOURNAL_FSYNC_INTERVAL_SECONDS", "1.0"))
+# Rewrite the file on replay once this many lines are dead (superseded or torn) and
+# they make up at least half the file
+JOURNAL_COMPACT_MIN_DEAD = int(os.getenv("JOURNAL_COMPACT_MIN_DEAD", "500"))
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Append-only JSON-lines file: one record per line, written in O(1).
+
+    `key(record)` identifies records that replace earlier ones (last line wins);
+    without it every line is its own record. A torn last line from a crash is
+    skipped on replay, and the file is compacted when mostly dead.
+    """
+
+    def __init__(self, path: str, key: Optional[Callable[[dict], str]] = None, fsync: str = JOURNAL_FSYNC,
+                 legacy_path: Optional[str] = None):
+        self.path = path
+        self.key = key
+        self.fsync = fsync
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_fsync = 0.0
+        self._unsynced = False
+        self.lines = 0
+        self.dead = 0
+        self.replay_ms = 0.0
+
+    def replay(self) -> List[dict]:
+        """All live records in append order. Migrates `legacy_path` (a JSON array) on first use."""
+        started = time.perf_counter()
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            self.compact(legacy)
+            logger.info(f"Migrated {len(legacy)} records from {self.legacy_path} to {self.path}")
+
+        records: Dict[object, dict] = {}
+        lines = torn = 0
+        unterminated = False
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for n, line in enumerate(f):
+                    unterminated = not line.endswith("\n")
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn += 1
+                        logger.warning(f"Skipping unreadable line {n + 1} in {self.path}")
+                        continue
+                    k = self.key(record) if self.key else n
+                    records.pop(k, None)  # re-insert so order follows the latest write
+                    records[k] = record
+
+        live = list(records.values())
+        self.lines = lines
+        self.dead = lines - len(live)
+        # rewrite a partial last line too, or the next append would be glued onto it
+        if torn or unterminated or (self.dead >= JOURNAL_COMPACT_MIN_DEAD and self.dead * 2 >= lines):
+            self.compact(live)
+        self.replay_ms = (time.perf_counter() - started) * 1000
+        return live
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _sync(self, f, force=False):
+        now = time.monotonic()
+        if force or self.fsync == "always" or (
+            self.fsync == "interval" and now - self._last_fsync >= JOURNAL_FSYNC_INTERVAL_SECONDS
+        ):
+            os.fsync(f.fileno())
+            self._last_fsync = now
+            self._unsynced = False
+        else:
+            self._unsynced = True
+
+    def append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+            self._sync(f)
+            self.lines += 1
+
+    def compact(self, records: List[dict]):
+        """Atomically replace the file with exactly `records`."""
+        tmp = self.path + ".tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(tmp, self.path)
+            _fsync_dir(self.path)
+            self.lines = len(records)
+            self.dead = 0
+
+    def flush(self):
+        """fsync anything appended since the last sync (call on shutdown)."""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync(self._file, force=True)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "lines": self.lines,
+            "dead": self.dead,
+            "fsync": self.fsync,
+            "replay_ms": round(self.replay_ms, 1),
+        }
@@ -0,0 +1,84 @@
+import re
+from typing import Dict, Iterable, Optional, Set
+
+# Keyword lists behind the meal heuristics. Matching is by substring, like the
+# `any(k in text for k in ...)` checks these replace, so "dal" also matches "dals".
+CATEGORIES: Dict[str, tuple] = {
+    # nudges after a logged meal
+    "fast_food": ("burger", "pizza", "fries", "chips", "cold drink", "soda", "noodles"),
+    # the narrower list the enhanced report has always counted as fast food
+    "fast_food_staples": ("burger", "pizza", "chips", "noodles"),
+    "iron_rich": ("spinach", "lentils", "beans", "meat", "citrus", "vitamin c"),
+    "skipped_meal": ("skipped", "no time"),
+    # dish names, and the meal_type field of food documents
+    "beverage": ("tea", "chai", "coffee", "latte", "milk", "juice", "smoothie", "shake", "soda", "cola", "beverage", "drink"),
+    "beverage_meal_type": ("drink", "beverage", "tea", "chai"),
+    # whether a suggested alternative is cooked at home or bought
+    "restaurant": (
+        "order", "ordered", "restaurant", "stall", "vendor", "takeaway", "delivery",
+        "zomato", "swiggy", "street", "food court", "fast food", "canteen", "mess",
+    ),
+    "home_cookable": (
+        "dal", "sabzi", "curry", "roti", "paratha", "rice", "khichdi", "idli", "dosa",
+        "sandwich", "omelette", "egg", "paneer", "salad", "smoothie", "porridge",
+        "upma", "poha", "pulao", "kheer", "bhaji", "stew", "stir fry", "lentil",
+        "beans", "vegetable", "sabji", "chapati", "soup", "pickle",
+    ),
+}
+
+
+def _compile(keywords: Iterable[str]) -> "re.Pattern":
+    # longest first so the alternation never stops at a shorter keyword's prefix
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in ordered))
+
+
+class KeywordClassifier:
+    """
+    One compiled alternation regex per category, plus one over all keywords.
+
+    classify() finds every keyword occurrence in a single scan: at each
+    position the combined pattern reports the longest keyword starting there,
+    and the keywords that are its prefixes (the only other ones that can match
+    at that position) are folded into its category set up front.
+
+    Text is matched as given, so pass it lowercased (the keywords are).
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.keywords = {name: tuple(words) for name, words in categories.items()}
+        self.patterns = {name: _compile(words) for name, words in self.keywords.items()}
+        owners: Dict[str, Set[str]] = {}
+        for name, words in self.keywords.items():
+            for word in words:
+                owners.setdefault(word, set()).add(name)
+        self._categories_of = {
+            word: frozenset().union(*(names for other, names in owners.items() if word.startswith(other)))
+            for word in owners
+        }
+        ordered = sorted(owners, key=len, reverse=True)
+        self._scan = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+
+    def matches(self, category: str, text: str) -> bool:
+        """True if any keyword of `category` occurs in `text`."""
+        return self.patterns[category].search(text) is not None
+
+    def classify(self, text: str, categories: Optional[Iterable[str]] = None) -> Set[str]:
+        """Every category (or every one of `categories`) with a keyword in `text`."""
+        found = set()
+        for m in self._scan.finditer(text):
+            found |= self._categories_of[m.group(1)]
+        if categories is not None:
+            found &= set(categories)
+        return found
+
+
+classifier = KeywordClassifier(CATEGORIES)
+
+
+def matches(category: str, text: str) -> bool:
+    return classifier.matches(category, text)
+
+
+def classify(text: str, categories: Optional[Iterable[str]] = None) -> Set[str]:
+    return classifier.classify(text, categories)
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", os.path.join(os.path.dirname(__file__), "llm_cache.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Calls sampled hotter than this want variety (e.g. meal suggestions) and skip the cache
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.75"))
+
+# When over LLM_CACHE_MAX_ENTRIES, evict this fraction of the least recently used entries
+_EVICT_FRACTION = 0.1
+# Hits are remembered in memory and their access times written in one batch
+# once this many are pending (or with the next store, or on close)
+_TOUCH_BATCH = 64
+
+
+class CachedResponse:
+    """Stand-in for a GenerateContentResponse served from the cache (.text / .parsed)."""
+
+    def __init__(self, text: str, response_schema=None):
+        self.text = text
+        self._schema = response_schema
+        self.from_cache = True
+
+    @property
+    def parsed(self):
+        if self._schema is not None and hasattr(self._schema, "model_validate_json"):
+            return self._schema.model_validate_json(self.text)
+        try:
+            return json.loads(self.text)
+        except ValueError:
+            return None
+
+
+def _schema_key(schema) -> Any:
+    if schema is None:
+        return None
+    if hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema()
+    return repr(schema)
+
+
+def cache_key(model, contents, system_instruction=None, temperature=None, response_mime_type=None, response_schema=None) -> str:
+    """sha256 over everything that changes what the model is asked to produce."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system_instruction": system_instruction,
+            "contents": contents,
+            "temperature": temperature,
+            "response_mime_type": response_mime_type,
+            "response_schema": _schema_key(response_schema),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cacheable(temperature: Optional[float]) -> bool:
+    return LLM_CACHE_ENABLED and (temperature is None or temperature <= LLM_CACHE_MAX_TEMPERATURE)
+
+
+class LLMCache:
+    """
+    SQLite-backed response cache, least recently used entries evicted first.
+
+    The methods block on SQLite, so async code calls them through
+    asyncio.to_thread (see llm_gateway); the connection is shared between
+    threads behind a lock. A hit is a single primary-key read: its access
+    time is written later in a batch, and the entry count is kept in memory
+    rather than counted on every store. Expired entries read as misses and
+    are replaced by the next store for their key, or evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: float = LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entries = 0
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, text TEXT NOT NULL, latency_ms REAL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _write_touched(self, db: sqlite3.Connection):
+        """Write the pending access times (the caller holds the lock and commits)."""
+        if self._touched:
+            db.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT text, latency_ms, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= _TOUCH_BATCH:
+                self._write_touched(db)
+                db.commit()
+            self.hits += 1
+            self.saved_ms += row[1] or 0.0
+            return row[0]
+
+    def set(self, key: str, model: str, text: str, latency_ms: float):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            self._write_touched(db)
+            exists = db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is not None
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, text, latency_ms, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, text, latency_ms, now, now),
+            )
+            self.stores += 1
+            if not exists:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                excess = self._entries - self.max_entries + max(1, int(self.max_entries * _EVICT_FRACTION))
+                cur = db.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += cur.rowcount
+                self._entries -= cur.rowcount
+            db.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM responses")
+            db.commit()
+            self._touched.clear()
+            self._entries = 0
+
+    def close(self):
+        """Write pending access times and close the connection. Called from the app lifespan."""
+        with self._lock:
+            if self._conn is not None:
+                self._write_touched(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._db()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": LLM_CACHE_ENABLED,
+                "file": self.path,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "max_temperature": LLM_CACHE_MAX_TEMPERATURE,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "saved_ms": round(self.saved_ms, 1),
+            }
+
+
+cache = LLMCache(LLM_CACHE_FILE)
@@ -0,0 +1,352 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+import llm_cache
+
+load_dotenv()
+
+DEFAULT_MODEL = "models/gemini-2.5-flash"
+
+# All Gemini calls in the process share these limits (see README)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+
+# HTTP statuses worth retrying: rate limits, timeouts and transient server errors
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMTimeoutError(Exception):
+    """A Gemini call did not finish within its timeout (after retries)."""
+
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.by_label: Dict[str, int] = {}
+        self.latencies_ms = deque(maxlen=500)
+        self.waits_ms = deque(maxlen=500)
+        self.first_chunk_ms = deque(maxlen=500)
+
+    def enqueue(self, label):
+        with self._lock:
+            self.calls += 1
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            self.by_label[label] = self.by_label.get(label, 0) + 1
+
+    def start(self, wait_ms):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.waits_ms.append(wait_ms)
+
+    def finish(self, ok, latency_ms):
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.successes += 1
+            else:
+                self.failures += 1
+            self.latencies_ms.append(latency_ms)
+
+    def first_chunk(self, ms):
+        with self._lock:
+            self.first_chunk_ms.append(ms)
+
+    def bump(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self.latencies_ms)
+            waits = list(self.waits_ms)
+            first_chunks = list(self.first_chunk_ms)
+            return {
+                "calls": self.calls,
+                "successes": self.successes,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "retries": self.retries,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queued,
+                "max_queue_depth": self.max_queued,
+                "latency_ms": {"p50": self._percentile(latencies, 0.5), "p95": self._percentile(latencies, 0.95)},
+                "queue_wait_ms": {"p50": self._percentile(waits, 0.5), "p95": self._percentile(waits, 0.95)},
+                "stream_first_chunk_ms": {"p50": self._percentile(first_chunks, 0.5), "p95": self._percentile(first_chunks, 0.95)},
+                "by_label": dict(self.by_label),
+            }
+
+
+_metrics = _Metrics()
+_clients: Dict[str, genai.Client] = {}
+_clients_lock = threading.Lock()
+# asyncio primitives belong to one event loop; keep a semaphore per loop
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_client(api_key_env: str = "GOOGLE_API_KEY") -> genai.Client:
+    """Shared Gemini client for the API key stored in `api_key_env`, created on first use."""
+    client = _clients.get(api_key_env)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key_env)
+            if client is None:
+                client = genai.Client(api_key=os.getenv(api_key_env))
+                _clients[api_key_env] = client
+    return client
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _semaphores[loop] = sem
+    return sem
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    # httpx transport errors (connect/read failures) surface without a status code
+    return type(exc).__module__.startswith("httpx") or type(exc).__module__.startswith("httpcore")
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def build_config(system_instruction=None, temperature=None, response_mime_type=None, response_schema=None):
+    kwargs = {}
+    if system_instruction is not None:
+        kwargs["system_instruction"] = system_instruction
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if response_mime_type is not None:
+        kwargs["response_mime_type"] = response_mime_type
+    if response_schema is not None:
+        kwargs["response_schema"] = response_schema
+    return types.GenerateContentConfig(**kwargs) if kwargs else None
+
+
+async def generate(
+    contents,
+    model: str = DEFAULT_MODEL,
+    system_instruction: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_mime_type: Optional[str] = None,
+    response_schema=None,
+    api_key_env: str = "GOOGLE_API_KEY",
+    timeout: Optional[float] = None,
+    label: str = "default",
+    cache: bool = True,
+):
+    """
+    Await a Gemini generate_content call without blocking the event loop.
+
+    At most LLM_MAX_CONCURRENCY calls run at once per worker; the rest wait
+    in line (reported as queue depth). Each attempt is bounded by `timeout`
+    and transient failures are retried with jittered exponential backoff;
+    the slot is given up while backing off and taken again for the retry.
+
+    Identical requests are answered from llm_cache unless `cache` is False or
+    the temperature is above LLM_CACHE_MAX_TEMPERATURE.
+
+    Returns:
+        The GenerateContentResponse, or a llm_cache.CachedResponse (both have .text / .parsed)
+    """
+    key = None
+    if cache and llm_cache.cacheable(temperature):
+        key = llm_cache.cache_key(model, contents, system_instruction, temperature, response_mime_type, response_schema)
+        text = await asyncio.to_thread(llm_cache.cache.get, key)
+        if text is not None:
+            return llm_cache.CachedResponse(text, response_schema)
+    else:
+        llm_cache.cache.record_bypass()
+
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    config = build_config(system_instruction, temperature, response_mime_type, response_schema)
+    client = get_client(api_key_env)
+
+    sem = _semaphore()
+    _metrics.enqueue(label)
+    queued_at = time.perf_counter()
+    await sem.acquire()
+    held = True
+    started = time.perf_counter()
+    _metrics.start((started - queued_at) * 1000)
+    ok = False
+    try:
+        attempt = 0
+        while True:
+            try:
+                response = await asyncio.wait_for(
+                    client.aio.models.generate_content(model=model, contents=contents, config=config),
+                    timeout,
+                )
+                ok = True
+                if key is not None and response.text:
+                    await asyncio.to_thread(
+                        llm_cache.cache.set, key, model, response.text, (time.perf_counter() - started) * 1000
+                    )
+                return response
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    _metrics.bump("timeouts")
+                if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise LLMTimeoutError(f"{label}: no response from {model} within {timeout:g}s") from e
+                    raise
+                _metrics.bump("retries")
+                # back off without the slot, so calls that can run now don't queue behind this one
+                sem.release()
+                held = False
+                await asyncio.sleep(_backoff(attempt))
+                await sem.acquire()
+                held = True
+                attempt += 1
+    finally:
+        if held:
+            sem.release()
+        _metrics.finish(ok, (time.perf_counter() - started) * 1000)
+
+
+async def stream(
+    contents,
+    model: str = DEFAULT_MODEL,
+    system_instruction: Optional[str] = None,
+    temperature: Optional[float] = None,
+    api_key_env: str = "GOOGLE_API_KEY",
+    timeout: Optional[float] = None,
+    label: str = "default",
+    cache: bool = True,
+) -> AsyncIterator[str]:
+    """
+    Stream a Gemini completion as text chunks (generate_content_stream).
+
+    Shares generate()'s concurrency limit, metrics and cache: a cached answer
+    is yielded as one chunk, and a completed stream is stored for next time.
+    `timeout` bounds the wait for each chunk. Failures are retried only
+    before the first chunk has been yielded.
+    """
+    key = None
+    if cache and llm_cache.cacheable(temperature):
+        key = llm_cache.cache_key(model, contents, system_instruction, temperature, None, None)
+        text = await asyncio.to_thread(llm_cache.cache.get, key)
+        if text is not None:
+            yield text
+            return
+    else:
+        llm_cache.cache.record_bypass()
+
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    config = build_config(system_instruction, temperature)
+    client = get_client(api_key_env)
+
+    sem = _semaphore()
+    _metrics.enqueue(label)
+    queued_at = time.perf_counter()
+    await sem.acquire()
+    held = True
+    started = time.perf_counter()
+    _metrics.start((started - queued_at) * 1000)
+    ok = False
+    chunks = []
+    try:
+        attempt = 0
+        while True:
+            try:
+                iterator = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(model=model, contents=contents, config=config),
+                    timeout,
+                )
+                iterator = iterator.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    text = chunk.text or ""
+                    if not text:
+                        continue
+                    if not chunks:
+                        _metrics.first_chunk((time.perf_counter() - started) * 1000)
+                    chunks.append(text)
+                    yield text
+                ok = True
+                if key is not None and chunks:
+                    await asyncio.to_thread(
+                        llm_cache.cache.set, key, model, "".join(chunks), (time.perf_counter() - started) * 1000
+                    )
+                return
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    _metrics.bump("timeouts")
+                if chunks or attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise LLMTimeoutError(f"{label}: {model} stalled for {timeout:g}s") from e
+                    raise
+                _metrics.bump("retries")
+                # back off without the slot, so calls that can run now don't queue behind this one
+                sem.release()
+                held = False
+                await asyncio.sleep(_backoff(attempt))
+                await sem.acquire()
+                held = True
+                attempt += 1
+    finally:
+        if held:
+            sem.release()
+        _metrics.finish(ok, (time.perf_counter() - started) * 1000)
+
+
+def generate_sync(contents, **kwargs):
+    """generate() for scripts and other code that is not running inside an event loop."""
+    return asyncio.run(generate(contents, **kwargs))
+
+
+def metrics() -> Dict[str, Any]:
+    return {
+        "config": {
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "timeout_seconds": LLM_TIMEOUT_SECONDS,
+            "max_retries": LLM_MAX_RETRIES,
+            "backoff_base_seconds": LLM_BACKOFF_BASE_SECONDS,
+            "backoff_max_seconds": LLM_BACKOFF_MAX_SECONDS,
+        },
+        **_metrics.snapshot(),
+        "cache": llm_cache.cache.stats(),
+    }
@@ -1,6 +1,6 @@
+import asyncio
 import os
 import json
-from pymongo import MongoClient
 from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,14 +8,20 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import uvicorn
 
+import mongo_pool
+from food_repository import (
+    run_atlas_search_query,
+    run_atlas_search_with_fallback,
+    search_recipes_by_ingredients,
+    local_search_ready,
+    search_with_fallback_async,
+    search_by_ingredients_async,
+    sample_foods_async,
+)
+
 # Load environment variables from .env file
 load_dotenv()
 
-# MongoDB Atlas connection details
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = "FoodData"  # Replace with your database name
-COLLECTION_NAME = "food_collection"  # Replace with your collection name
-
 # FastAPI router
 router = APIRouter()
 
@@ -37,193 +43,22 @@ class SearchResponse(BaseModel):
 
 def connect_to_mongodb():
     """
-    Establish connection to MongoDB Atlas.
+    Get the shared MongoDB Atlas connection from the process-wide pool.
 
     Returns:
-        MongoClient: Connected MongoDB client
+        MongoClient: Shared MongoDB client (owned by mongo_pool, do not close)
         database: Database object
         collection: Collection object
     """
-    try:
-        # Create MongoDB client
-        client = MongoClient(MONGO_URI)
-
-        # Test the connection
-        client.admin.command('ping')
-        print("✅ Successfully connected to MongoDB Atlas!")
-
-        # Get database and collection
-        database = client[DATABASE_NAME]
-        collection = database[COLLECTION_NAME]
-
-        return client, database, collection
-
-    except Exception as e:
-        print(f"❌ Failed to connect to MongoDB Atlas: {e}")
+    client = mongo_pool.get_client()
+    if client is None:
+        print("❌ MongoDB is not configured (MONGO_URI missing)")
         return None, None, None
 
-def run_atlas_search_query(collection, query, search_path="dish_name", index_name="default", limit=10):
-    """
-    Run an Atlas Search query on the specified collection.
-
-    Args:
-        collection: MongoDB collection object
-        query (str): Search query string
-        search_path (str): Field to search in (default: "dish_name")
-        index_name (str): Name of the Atlas Search index (default: "default")
-        limit (int): Maximum number of results to return
-
-    Returns:
-        list: List of matching documents
-    """
-    try:
-        # Define the aggregation pipeline for Atlas Search
-        pipeline = [
-            {
-                "$search": {
-                    "index": index_name,
-                    "text": {
-                        "query": query,
-                        "path": search_path
-                    }
-                }
-            },
-            {
-                "$limit": limit
-            },
-            {
-                "$project": {
-                    "_id": 0,  # Exclude the _id field from results
-                    "dish_name": 1,
-                    "ingredients": 1,
-                    "calories_kcal": 1,
-                    "protein_g": 1,
-                    "cuisine": 1,
-                    "meal_type": 1,
-                    "score": {"$meta": "searchScore"}  # Include search relevance score
-                }
-            }
-        ]
-
-        # Execute the aggregation pipeline
-        results = list(collection.aggregate(pipeline))
-
-        print(f"🔍 Found {len(results)} results for query: '{query}'")
-        return results
-
-    except Exception as e:
-        print(f"❌ Atlas Search query failed: {e}")
-        print("💡 This might be due to:")
-        print("   - Atlas Search index not configured")
-        print("   - Incorrect index name")
-        print("   - Network connectivity issues")
-        return []
-
-def run_atlas_search_with_fallback(collection, query, search_path="dish_name", index_name="default", limit=10):
-    """
-    Run Atlas Search with regex fallback if Atlas Search fails.
-
-    Args:
-        collection: MongoDB collection object
-        query (str): Search query string
-        search_path (str): Field to search in
-        index_name (str): Name of the Atlas Search index
-        limit (int): Maximum number of results to return
+    database = client[mongo_pool.DATABASE_NAME]
+    collection = database[mongo_pool.COLLECTION_NAME]
 
-    Returns:
-        list: List of matching documents
-    """
-    # First, try Atlas Search
-    results = run_atlas_search_query(collection, query, search_path, index_name, limit)
-
-    # If no results from Atlas Search, try regex fallback
-    if not results:
-        print("🔄 Atlas Search returned no results, trying regex fallback...")
-        try:
-            # Create a regex pattern for case-insensitive search
-            regex_pattern = {"$regex": query, "$options": "i"}
-
-            # Search using regex
-            cursor = collection.find(
-                {search_path: regex_pattern},
-                {
-                    "_id": 0,
-                    "dish_name": 1,
-                    "ingredients": 1,
-                    "calories_kcal": 1,
-                    "protein_g": 1,
-                    "cuisine": 1,
-                    "meal_type": 1
-                }
-            ).limit(limit)
-
-            results = list(cursor)
-            print(f"🔍 Regex fallback found {len(results)} results for query: '{query}'")
-
-        except Exception as e:
-            print(f"❌ Regex fallback also failed: {e}")
-            results = []
-
-    return results
-
-def search_recipes_by_ingredients(collection, ingredients_list, index_name="default", limit=10):
-    """
-    Search for recipes that contain specific ingredients using Atlas Search.
-
-    Args:
-        collection: MongoDB collection object
-        ingredients_list (list): List of ingredient names to search for
-        index_name (str): Name of the Atlas Search index
-        limit (int): Maximum number of results to return
-
-    Returns:
-        list: List of matching recipes
-    """
-    try:
-        # Create a compound query for multiple ingredients
-        should_clauses = []
-        for ingredient in ingredients_list:
-            should_clauses.append({
-                "text": {
-                    "query": ingredient,
-                    "path": "ingredients"
-                }
-            })
-
-        pipeline = [
-            {
-                "$search": {
-                    "index": index_name,
-                    "compound": {
-                        "should": should_clauses,
-                        "minimumShouldMatch": 1  # At least one ingredient should match
-                    }
-                }
-            },
-            {
-                "$limit": limit
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "dish_name": 1,
-                    "ingredients": 1,
-                    "calories_kcal": 1,
-                    "protein_g": 1,
-                    "cuisine": 1,
-                    "meal_type": 1,
-                    "score": {"$meta": "searchScore"}
-                }
-            }
-        ]
-
-        results = list(collection.aggregate(pipeline))
-        print(f"🔍 Found {len(results)} recipes containing ingredients: {ingredients_list}")
-        return results
-
-    except Exception as e:
-        print(f"❌ Ingredient search failed: {e}")
-        return []
+    return client, database, collection
 
 # FastAPI Endpoints
 @router.get("/")
@@ -234,14 +69,13 @@ async def root():
 async def health_check():
     """Health check endpoint for mobile app connectivity"""
     try:
-        # Test MongoDB connection
-        client, database, collection = connect_to_mongodb()
-        if client:
-            client.close()
+        # Test MongoDB connection through the shared pool
+        if await asyncio.to_thread(mongo_pool.ping):
             return {
                 "status": "healthy",
                 "database": "connected",
-                "timestamp": "2025-08-31"
+                "timestamp": "2025-08-31",
+                "pool": mongo_pool.pool_stats()["metrics"]
             }
         else:
             return {
@@ -269,19 +103,15 @@ async def search_recipes(
 
         # Connect to MongoDB
         client, database, collection = connect_to_mongodb()
-        if collection is None:
+        if collection is None and not local_search_ready():
             print("❌ Database connection failed")
             raise HTTPException(status_code=500, detail="Database connection failed")
 
         # Perform search based on type
         if search_type == "ingredients":
-            results = search_recipes_by_ingredients(collection, [q], limit=limit)
+            results = await search_by_ingredients_async(collection, [q], limit=limit)
         else:
-            results = run_atlas_search_with_fallback(collection, q, search_path=search_type, limit=limit)
-
-        # Close connection
-        if client:
-            client.close()
+            results = await search_with_fallback_async(collection, q, search_path=search_type, limit=limit)
 
         # Format results
         formatted_results = []
@@ -318,15 +148,11 @@ async def search_by_ingredients(
 
         # Connect to MongoDB
         client, database, collection = connect_to_mongodb()
-        if collection is None:
+        if collection is None and not local_search_ready():
             raise HTTPException(status_code=500, detail="Database connection failed")
 
         # Perform ingredient search
-        results = search_recipes_by_ingredients(collection, ingredients_list, limit=limit)
-
-        # Close connection
-        if client:
-            client.close()
+        results = await search_by_ingredients_async(collection, ingredients_list, limit=limit)
 
         # Format results
         formatted_results = []
@@ -355,36 +181,11 @@ async def get_recipe_suggestions(
     try:
         # Connect to MongoDB
         client, database, collection = connect_to_mongodb()
-        if collection is None:
+        if collection is None and not local_search_ready():
             raise HTTPException(status_code=500, detail="Database connection failed")
 
-        # Build query
-        query = {}
-        if meal_type:
-            query["meal_type"] = {"$regex": meal_type, "$options": "i"}
-        if cuisine:
-            query["cuisine"] = {"$regex": cuisine, "$options": "i"}
-
         # Get random suggestions
-        pipeline = [
-            {"$match": query} if query else {"$match": {}},
-            {"$sample": {"size": limit}},
-            {"$project": {
-                "_id": 0,
-                "dish_name": 1,
-                "ingredients": 1,
-                "calories_kcal": 1,
-                "protein_g": 1,
-                "cuisine": 1,
-                "meal_type": 1
-            }}
-        ]
-
-        results = list(collection.aggregate(pipeline))
-
-        # Close connection
-        if client:
-            client.close()
+        results = await sample_foods_async(collection, limit=limit, meal_type=meal_type, cuisine=cuisine)
 
         # Format results
         formatted_results = []
@@ -484,9 +285,8 @@ def main():
     cuisine_results = run_atlas_search_with_fallback(collection, cuisine_query, search_path="cuisine")
     print_search_results(cuisine_results)
 
-    # Close the connection
-    if client:
-        client.close()
-        print("\n🔌 MongoDB connection closed.")
+    # Close the shared pool
+    mongo_pool.close()
+    print("\n🔌 MongoDB connection closed.")
 
 
@@ -2,20 +2,27 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
+from contextlib import asynccontextmanager
 import json
 import os
 from datetime import datetime
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
+import availability
+import mongo_pool
+import food_repository
+import family_api
+import food_search
+import llm_cache
+import llm_gateway
+import nudging
+import recipe_index
+import typeahead
+import user_state
+
 # Load environment variables
 load_dotenv()
 
-# MongoDB Atlas connection details
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = "FoodData"
-COLLECTION_NAME = "food_collection"
-
 from family import (
     FamilyHealthReport,
     CoordinatedPlan,
@@ -25,7 +32,23 @@ from family import (
     MealLog
 )
 
-app = FastAPI(title="Heritage Nutrition AI API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm shared resources before serving and release them on shutdown."""
+    mongo_pool.warm_up()
+    food_search.start_background_refresh()
+    nudging.warm_up()
+    typeahead.warm_up()
+    yield
+    food_search.stop_background_refresh()
+    family_api.tracker.close()
+    await nudging.insight_queue.stop()
+    llm_cache.cache.close()
+    user_state.store.close()
+    food_repository.shutdown()
+    mongo_pool.close()
+
+app = FastAPI(title="Heritage Nutrition AI API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -40,10 +63,12 @@ app.add_middleware(
 from nudging import router as nudging_router
 from family_api import router as family_router
 from logmeal import router as logmeal_router
+from recipe_generator import router as recipe_router
 
 app.include_router(nudging_router, prefix="/nudging", tags=["nudging"])
 app.include_router(family_router, prefix="/family", tags=["family"])
 app.include_router(logmeal_router, prefix="/logmeal", tags=["logmeal"])
+app.include_router(recipe_router, prefix="/recipes", tags=["recipes"])
 
 # Pydantic models for API requests/responses
 class FamilyMember(BaseModel):
@@ -68,6 +93,15 @@ class DeviationLog(BaseModel):
     deviation_description: str
     timestamp: Optional[str] = None
 
+class AvailabilityRecipe(BaseModel):
+    name: str
+    ingredients: List[str] = []
+
+class AvailabilityRequest(BaseModel):
+    pantry: List[str]
+    recipes: Optional[List[AvailabilityRecipe]] = None
+    limit: int = 10
+
 # Mock data storage (in production, use a database)
 family_profiles = {}
 meal_logs = []
@@ -75,84 +109,17 @@ deviation_logs = []
 
 def connect_to_mongodb():
     """
-    Establish connection to MongoDB Atlas.
-    Returns: (client, database, collection) or (None, None, None) if failed
-    """
-    try:
-        client = MongoClient(MONGO_URI)
-        client.admin.command('ping')
-        database = client[DATABASE_NAME]
-        collection = database[COLLECTION_NAME]
-        return client, database, collection
-    except Exception as e:
-        print(f"❌ Failed to connect to MongoDB Atlas: {e}")
-        return None, None, None
+    Get the shared MongoDB Atlas connection from the process-wide pool.
+    Returns: (client, database, collection) or (None, None, None) if not configured
 
-def run_atlas_search_with_fallback(collection, query, search_path="dish_name", index_name="default", limit=10):
+    The client is owned by mongo_pool and must not be closed by callers.
     """
-    Run Atlas Search with regex fallback if Atlas Search fails.
-    """
-    try:
-        # First, try Atlas Search
-        pipeline = [
-            {
-                "$search": {
-                    "index": index_name,
-                    "text": {
-                        "query": query,
-                        "path": search_path
-                    }
-                }
-            },
-            {
-                "$limit": limit
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "dish_name": 1,
-                    "ingredients": 1,
-                    "calories_kcal": 1,
-                    "protein_g": 1,
-                    "cuisine": 1,
-                    "meal_type": 1,
-                    "score": {"$meta": "searchScore"}
-                }
-            }
-        ]
-        
-        results = list(collection.aggregate(pipeline))
-        if results:
-            print(f"🔍 Atlas Search found {len(results)} results for query: '{query}'")
-            return results
-            
-    except Exception as e:
-        print(f"❌ Atlas Search failed: {e}")
-    
-    # Fallback to regex search
-    try:
-        print(f"🔄 Using regex fallback for query: '{query}'")
-        regex_pattern = {"$regex": query, "$options": "i"}
-        cursor = collection.find(
-            {search_path: regex_pattern},
-            {
-                "_id": 0,
-                "dish_name": 1,
-                "ingredients": 1,
-                "calories_kcal": 1,
-                "protein_g": 1,
-                "cuisine": 1,
-                "meal_type": 1
-            }
-        ).limit(limit)
-        
-        results = list(cursor)
-        print(f"🔍 Regex fallback found {len(results)} results for query: '{query}'")
-        return results
-        
-    except Exception as e:
-        print(f"❌ Regex fallback also failed: {e}")
-        return []
+    client = mongo_pool.get_client()
+    if client is None:
+        return None, None, None
+    database = client[mongo_pool.DATABASE_NAME]
+    collection = database[mongo_pool.COLLECTION_NAME]
+    return client, database, collection
 
 @app.get("/")
 async def root():
@@ -353,41 +320,15 @@ async def search_foods(query: str = "", limit: int = 10):
     try:
         # Connect to MongoDB
         client, database, collection = connect_to_mongodb()
-        if collection is None:
+        if collection is None and not food_repository.local_search_ready():
             raise HTTPException(status_code=500, detail="Database connection failed")
         
         if not query:
             # Return some random samples if no query provided
-            try:
-                pipeline = [
-                    {"$sample": {"size": limit}},
-                    {"$project": {
-                        "_id": 0,
-                        "dish_name": 1,
-                        "calories_kcal": 1,
-                        "protein_g": 1,
-                        "cuisine": 1,
-                        "meal_type": 1
-                    }}
-                ]
-                results = list(collection.aggregate(pipeline))
-            except:
-                # Fallback to find if aggregation fails
-                results = list(collection.find({}, {
-                    "_id": 0,
-                    "dish_name": 1,
-                    "calories_kcal": 1,
-                    "protein_g": 1,
-                    "cuisine": 1,
-                    "meal_type": 1
-                }).limit(limit))
+            results = await food_repository.sample_foods_async(collection, limit=limit)
         else:
-            # Search using Atlas Search with fallback
-            results = run_atlas_search_with_fallback(collection, query, limit=limit)
-        
-        # Close connection
-        if client:
-            client.close()
+            # Search using Atlas Search with fallback, off the event loop
+            results = await food_repository.search_with_fallback_async(collection, query, limit=limit)
         
         # Transform results to match frontend expectations
         formatted_results = []
@@ -409,16 +350,56 @@ async def search_foods(query: str = "", limit: int = 10):
         print(f"❌ Search failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.get("/search_foods/suggest")
+async def suggest_foods(query: str = "", limit: int = 10):
+    """Autocomplete food and ingredient names from the in-memory prefix index"""
+    return typeahead.suggest(query, limit=max(1, min(limit, 50)))
+
+@app.get("/search_foods/index")
+async def search_index_stats():
+    """Status of the in-process food search index"""
+    return food_search.index_stats()
+
+@app.get("/search_foods/cache")
+async def search_cache_stats():
+    """Hit/miss counters for the search result cache and suggestion pools"""
+    return food_repository.cache_stats()
+
+@app.get("/mongo/pool")
+async def mongo_pool_metrics():
+    """Connection pool configuration and live counters"""
+    return mongo_pool.pool_stats()
+
+@app.get("/llm/metrics")
+async def llm_metrics():
+    """LLM gateway limits, queue depth, retries and latency"""
+    return llm_gateway.metrics()
+
+@app.post("/recipes/availability")
+async def recipes_availability(request: AvailabilityRequest):
+    """Rank recipes by how few ingredients the pantry is missing (recipes1.json when none are given)"""
+    if request.recipes is not None:
+        recipes = [r.model_dump() for r in request.recipes]
+    else:
+        index = recipe_index.get_recipe_index()
+        recipes = [
+            {"name": r.get("TranslatedRecipeName", ""), "ingredients": r.get("Cleaned-Ingredients") or ""}
+            for r in (index.recipes if index else [])
+        ]
+    pantry = availability.engine.pantry(request.pantry)
+    ranked = pantry.rank_recipes(recipes, limit=max(1, min(request.limit, 100)))
+    print(f"✅ Ranked {len(recipes)} recipes against {len(request.pantry)} pantry items")
+    return {"recipes": ranked, "count": len(recipes)}
+
 @app.post("/store_meal_log")
 async def store_meal_log(data: dict):
     """Store meal log data"""
     try:
         meal_log = data.get("mealLog", {})
         
-        # Store to file
-        meal_log_file = "meal_log.json"
-        with open(meal_log_file, "w", encoding="utf-8") as f:
-            json.dump(meal_log, f, ensure_ascii=False, indent=2)
+        # Same store as /nudging/store_meal_log (mirrored to meal_log.json)
+        user_state.store.put(user_state.DEFAULT_USER_ID, "mealLog", meal_log)
+        typeahead.record_meal_log(meal_log)
         
         print("Meal log stored successfully:", meal_log)
         return {"message": "Meal log stored successfully"}
@@ -0,0 +1,88 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, List
+
+import keyword_classifier
+
+
+class _Day:
+    __slots__ = ("total", "meals_by_type", "skipped", "fast_food", "satisfaction_sum", "satisfaction_count")
+
+    def __init__(self):
+        self.total = 0
+        self.meals_by_type: Dict[str, int] = {}
+        self.skipped = 0
+        self.fast_food = 0
+        self.satisfaction_sum = 0
+        self.satisfaction_count = 0
+
+
+class MealPatternAggregates:
+    """
+    Per-day meal pattern counters, updated as each meal is logged.
+
+    window(cutoff) sums the handful of day buckets on or after the cutoff, so
+    the enhanced report no longer walks every recent log. The result has the
+    same shape and values as FamilyNutritionTracker._analyze_meal_patterns.
+    """
+
+    def __init__(self):
+        self._days: Dict[str, _Day] = {}
+        # (parsed date, date string) of every bucket, sorted
+        self._keys: List[tuple] = []
+
+    def add(self, log):
+        day = self._days.get(log.date)
+        if day is None:
+            try:
+                when = datetime.fromisoformat(log.date)
+            except ValueError:
+                # the report window is by date; there is nothing to file this under
+                return
+            day = self._days[log.date] = _Day()
+            insort(self._keys, (when, log.date))
+
+        foods_text = " ".join(log.foods).lower()
+        day.total += 1
+        day.meals_by_type[log.meal_type] = day.meals_by_type.get(log.meal_type, 0) + 1
+        if "skipped" in foods_text:
+            day.skipped += 1
+        if keyword_classifier.matches("fast_food_staples", foods_text):
+            day.fast_food += 1
+        if log.satisfaction_rating:
+            day.satisfaction_sum += log.satisfaction_rating
+            day.satisfaction_count += 1
+
+    def extend(self, logs):
+        for log in logs:
+            self.add(log)
+
+    def window(self, cutoff: datetime) -> Dict[str, Any]:
+        """Patterns over logs dated at or after `cutoff`."""
+        start = bisect_left(self._keys, (cutoff, ""))
+        if start == len(self._keys):
+            return {"message": "No recent meal logs available"}
+
+        patterns = {
+            "total_meals_logged": 0,
+            "meals_by_type": {},
+            "skipped_meals": 0,
+            "fast_food_frequency": 0,
+            "average_satisfaction": 0,
+            "common_foods": []
+        }
+        satisfaction_sum = 0
+        satisfaction_count = 0
+        for _, date in self._keys[start:]:
+            day = self._days[date]
+            patterns["total_meals_logged"] += day.total
+            for meal_type, count in day.meals_by_type.items():
+                patterns["meals_by_type"][meal_type] = patterns["meals_by_type"].get(meal_type, 0) + count
+            patterns["skipped_meals"] += day.skipped
+            patterns["fast_food_frequency"] += day.fast_food
+            satisfaction_sum += day.satisfaction_sum
+            satisfaction_count += day.satisfaction_count
+
+        if satisfaction_count > 0:
+            patterns["average_satisfaction"] = satisfaction_sum / satisfaction_count
+        return patterns
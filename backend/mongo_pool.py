@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
+
+# Load environment variables
+load_dotenv()
+
+# MongoDB Atlas connection details
+MONGO_URI = os.getenv("MONGO_URI")
+DATABASE_NAME = "FoodData"
+COLLECTION_NAME = "food_collection"
+
+# Pool tuning (all optional, see README)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so they can be reported on /mongo/pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkins": 0,
+            "pool_clears": 0,
+        }
+        self.checked_out = 0
+        self.open_connections = 0
+
+    def _bump(self, name, delta=1):
+        with self._lock:
+            self.counters[name] += delta
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.counters["connections_created"] += 1
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.counters["connections_closed"] += 1
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failures")
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.counters["checkouts"] += 1
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.counters["checkins"] += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+            }
+
+
+_client: Optional[MongoClient] = None
+_client_lock = threading.Lock()
+_metrics = PoolMetricsListener()
+_warmed_up_at: Optional[float] = None
+_last_error: Optional[str] = None
+
+
+def get_client() -> Optional[MongoClient]:
+    """
+    Return the process-wide MongoClient, creating it on first use.
+
+    The client owns a connection pool and is safe to share across threads,
+    so every module should go through here instead of building its own.
+
+    Returns:
+        MongoClient or None if MONGO_URI is not configured
+    """
+    global _client, _last_error
+    if _client is not None:
+        return _client
+    if not MONGO_URI:
+        return None
+
+    with _client_lock:
+        if _client is None:
+            try:
+                _client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                    event_listeners=[_metrics],
+                )
+            except Exception as e:
+                _last_error = str(e)
+                print(f"❌ Failed to create MongoDB client: {e}")
+                return None
+    return _client
+
+
+def get_database(name: str = DATABASE_NAME):
+    client = get_client()
+    if client is None:
+        return None
+    return client[name]
+
+
+def get_collection(name: str = COLLECTION_NAME, database: str = DATABASE_NAME):
+    """Return a collection handle backed by the shared pool, or None."""
+    db = get_database(database)
+    if db is None:
+        return None
+    return db[name]
+
+
+def ping() -> bool:
+    """Round-trip a ping through the pool. Used by health checks and warm-up."""
+    global _last_error
+    client = get_client()
+    if client is None:
+        return False
+    try:
+        client.admin.command("ping")
+        _last_error = None
+        return True
+    except Exception as e:
+        _last_error = str(e)
+        return False
+
+
+def warm_up() -> bool:
+    """
+    Open the pool before traffic arrives.
+
+    Pings the server (which performs the TLS handshake and server selection)
+    and leaves MONGO_MIN_POOL_SIZE connections for the background pool
+    maintainer to keep alive.
+    """
+    global _warmed_up_at
+    started = time.perf_counter()
+    ok = ping()
+    if ok:
+        _warmed_up_at = time.time()
+        print(f"✅ MongoDB pool warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+    elif MONGO_URI:
+        print(f"❌ MongoDB pool warm-up failed: {_last_error}")
+    return ok
+
+
+def close():
+    """Close the shared client. Called once from the app lifespan on shutdown."""
+    global _client, _warmed_up_at
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            _warmed_up_at = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool configuration and live counters for the metrics endpoint."""
+    return {
+        "configured": bool(MONGO_URI),
+        "connected": _client is not None,
+        "warmed_up_at": _warmed_up_at,
+        "last_error": _last_error,
+        "config": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+            "connect_timeout_ms": MONGO_CONNECT_TIMEOUT_MS,
+            "socket_timeout_ms": MONGO_SOCKET_TIMEOUT_MS,
+            "server_selection_timeout_ms": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "wait_queue_timeout_ms": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        },
+        "metrics": _metrics.snapshot(),
+    }
@@ -1,31 +1,39 @@
+import asyncio
 import os
 import json
 import logging
 import re
-from google import genai
-from google.genai import types
+import threading
+import time
 from dotenv import load_dotenv
 
+import llm_gateway
+
 load_dotenv()
 
-key = os.getenv("GEMINI_API_KEY_2")
-client = genai.Client(api_key=key)
+# nudging uses its own Gemini key; the gateway creates the client on first use
+GEMINI_KEY_ENV = "GEMINI_API_KEY_2"
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+import insight_jobs
+import keyword_classifier
+import post_index
+import recipe_classifier
+import typeahead
+import user_state
+from partial_json import PartialJSONObject
+from pipeline import Pipeline
+
 router = APIRouter()
 
-# Global variables
-mongoReasoning = []
-context_summary = []
-substitutions_from_posts = []
-mongo_swaps_preview = []
-meal_items_list = []
-combined_context_str = ""
+# Stage timings of the most recent alternatives run (any user)
+mongoStageTimings = {}
 
 class UserInfoModel(BaseModel):
     userInfo: dict
@@ -36,21 +44,17 @@ class EnvironmentContextModel(BaseModel):
 class MealLogModel(BaseModel):
     mealLog: dict
 
-USER_DATA_FILE = os.path.join(os.path.dirname(__file__), "user_data.json")
-ENVIRONMENT_CONTEXT_FILE = os.path.join(os.path.dirname(__file__), "environment_context.json")
-MEAL_LOG_FILE = os.path.join(os.path.dirname(__file__), "meal_log.json")
-
-def load_user_info():
-    if os.path.exists(USER_DATA_FILE):
-        try:
-            with open(USER_DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if data:  # Check if not empty
-                    return data
-                else:
-                    logger.warning("user_data.json is empty. Using fallback.")
-        except Exception as e:
-            logger.warning(f"Failed to load user_data.json: {e}. Using fallback.")
+# Per-user profile, environment, meal log and insights live in user_state;
+# the original routes act on DEFAULT_USER_ID, whose state is mirrored to the
+# old JSON files.
+DEFAULT_USER_ID = user_state.DEFAULT_USER_ID
+
+def load_user_info(user_id=DEFAULT_USER_ID):
+    data = user_state.store.get(user_id, "userInfo")
+    if data:
+        return data
+    if data is not None:
+        logger.warning("userInfo for %s is empty. Using fallback.", user_id)
     return {
         "name": "Mr. Sharma",
         "location": "Jaipur",
@@ -69,25 +73,19 @@ def load_user_info():
         "meal_source": "home_cooked",
     }
 
-def load_environment_context():
-    if os.path.exists(ENVIRONMENT_CONTEXT_FILE):
-        try:
-            with open(ENVIRONMENT_CONTEXT_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load environment_context.json: {e}. Using fallback.")
+def load_environment_context(user_id=DEFAULT_USER_ID):
+    data = user_state.store.get(user_id, "environmentContext")
+    if data is not None:
+        return data
     return {
         "availability": [],
         "season": "Autumn",
     }
 
-def load_meal_log():
-    if os.path.exists(MEAL_LOG_FILE):
-        try:
-            with open(MEAL_LOG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load meal_log.json: {e}. Using fallback.")
+def load_meal_log(user_id=DEFAULT_USER_ID):
+    data = user_state.store.get(user_id, "mealLog")
+    if data is not None:
+        return data
     return {
         "breakfast": {"foods": []},
         "lunch": {"foods": []},
@@ -95,23 +93,8 @@ def load_meal_log():
         "dinner": {"foods": []}
     }
 
-def load_mongo_reasoning():
-    return mongoReasoning
-
-def load_context_summary():
-    return context_summary
-
-def load_substitutions_from_posts():
-    return substitutions_from_posts
-
-def load_mongo_swaps_preview():
-    return mongo_swaps_preview
-
-def load_meal_items_list():
-    return meal_items_list
-
-def load_combined_context_str():
-    return combined_context_str
+def load_mongo_stage_timings():
+    return mongoStageTimings
 
 def generate_tags(recipe_name):
     """Generate an array of tags from the recipe name for unique identification."""
@@ -127,324 +110,278 @@ def generate_tags(recipe_name):
     tags = list(set(tag for tag in tags if tag))
     return tags
 
-# --- user info and meal log to be embedded into the system instruction ---
-userInfo = load_user_info()
-
-environmentContext = load_environment_context()
+# --- data files used as LLM context ---
+# Parsed on first use and re-read only when the file changes on disk, so
+# importing this module does no I/O and repeated insight runs skip the parse.
+FOOD_DATA_FILE = os.path.join(os.path.dirname(__file__), "food_data.json")
+DIGI_DATA_FILE = os.path.join(os.path.dirname(__file__), "digi_data.json")
 
-mealLog = load_meal_log()
+_json_cache = {}
+_json_cache_lock = threading.Lock()
 
-
-# Load local food data for context
-food_data = []
-try:
-    with open(os.path.join(os.path.dirname(__file__), "food_data.json"), "r", encoding="utf-8") as f:
-        food_data = json.load(f)
-except Exception as e:
-    # could not load food_data.json; continue silently
-    pass
-
-# Load digi_data.json for additional user/context signals (optional)
-digi_data = {}
-try:
-    digi_path = os.path.join(os.path.dirname(__file__), "digi_data.json")
-    if not os.path.exists(digi_path):
-        # fallback to current working directory in case script is run differently
-        digi_path = os.path.join(os.getcwd(), "digi_data.json")
-    with open(digi_path, "r", encoding="utf-8") as f:
-        digi_data = json.load(f)
-    # log that digi_data was read successfully (user requested this log)
+def _load_json_cached(path, default):
     try:
-        # show a compact preview of top-level keys or length
-        if isinstance(digi_data, dict):
-            logger.info("Loaded digi_data.json with keys: %s", list(digi_data.keys())[:6])
-        elif isinstance(digi_data, list):
-            logger.info("Loaded digi_data.json as list with %d entries", len(digi_data))
-        else:
-            logger.info("Loaded digi_data.json (type=%s)", type(digi_data).__name__)
-    except Exception:
-        logger.info("Loaded digi_data.json")
-except Exception:
-    digi_data = {}
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return default
+    cached = _json_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"Failed to load {os.path.basename(path)}: {e}")
+        return default
+    with _json_cache_lock:
+        _json_cache[path] = (mtime, data)
+    return data
+
+def load_food_data():
+    return _load_json_cached(FOOD_DATA_FILE, [])
+
+def load_digi_data():
+    path = DIGI_DATA_FILE
+    if not os.path.exists(path):
+        # fallback to current working directory in case script is run differently
+        path = os.path.join(os.getcwd(), "digi_data.json")
+    return _load_json_cached(path, {})
 
-# Load any previously produced insights to incorporate as context (optional)
-previous_insights = None
-insights_path = os.path.join(os.path.dirname(__file__), "insights.json")
-try:
-    if os.path.exists(insights_path):
-        with open(insights_path, "r", encoding="utf-8") as f:
-            previous_insights = json.load(f)
-        # previous_insights loaded if present
-    else:
-        # no previous insights file present
-        pass
-except Exception as e:
-    # ignore failures to load previous insights for this run
-    pass
-
-meal_foods = set()
-for m in mealLog.values():
-    # Handle new format: direct array of food names
-    if isinstance(m, list):
-        for food in m:
-            if isinstance(food, str):
-                meal_foods.add(food.lower())
-    # Handle old format: {"foods": [...]}
-    elif isinstance(m, dict) and "foods" in m:
-        for food in m.get("foods", []):
-            if isinstance(food, str):
-                meal_foods.add(food.lower())
-            elif isinstance(food, dict) and "name" in food:
-                meal_foods.add(food["name"].lower())
-
-# Build user-related search terms from profile: goals, conditions, meds, allergies
-user_terms = set()
-for key_name in ("health_goals", "health_conditions", "medication_details", "allergies"):
-    for t in userInfo.get(key_name, []) or []:
-        if isinstance(t, str):
-            user_terms.add(t.lower())
-
-# Include BMI as a token if present (turn number into a rough tag)
-try:
-    bmi_val = int(userInfo.get("BMI", 0))
-    user_terms.add(str(bmi_val))
-except Exception:
-    pass
-
-# Candidate selection and deeper analysis: look for posts where
-# - post keywords or foods intersect with meal_foods OR user_terms
-# - or title/description contain meal_foods or user_terms
-matches = []
-for post in food_data:
-    keywords = set([k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)])
-    foods = set([f.lower() for f in post.get("foods", []) if isinstance(f, str)])
-    title = (post.get("post_title") or "")
-    description = (post.get("post_description") or post.get("description") or "")
-    title_l = title.lower()
-    desc_l = description.lower()
-
-    matched_terms = set()
-    match_sources = []
-
-    # direct overlaps with meal foods, keywords, and user terms
-    if meal_foods & (keywords | foods):
-        overlap = meal_foods & (keywords | foods)
-        matched_terms.update(overlap)
-        match_sources.append("meal_foods")
-
-    if user_terms & (keywords | foods):
-        overlap = user_terms & (keywords | foods)
-        matched_terms.update(overlap)
-        match_sources.append("user_profile_terms")
-
-    # presence in title/description
-    for term in (meal_foods | user_terms):
-        if term in title_l or term in desc_l:
-            matched_terms.add(term)
-            match_sources.append("title/description")
-
-    # If nothing matched by the above but keywords exist that look promising, skip
-    if not matched_terms:
-        continue
-
-    # Analyze recommendations and keep only relevant ones
-    relevant_recs = []
-    for rec in post.get("recommendations", []) or []:
-        r_text = (rec.get("text") or "").lower()
-        r_type = (rec.get("type") or "").lower()
-        reasons = []
-        if meal_foods & set(r_text.split()):
-            reasons.append("matches_meal_food_in_text")
-        if user_terms & set(r_text.split()):
-            reasons.append("matches_user_term_in_text")
-        if user_terms & set(r_type.split()):
-            reasons.append("matches_user_term_in_type")
-        # also match if recommendation mentions any of the matched_terms or keywords
-        if any(t in r_text for t in matched_terms) or any(t in r_type for t in matched_terms) or any(t in r_text for t in keywords):
-            reasons.append("contains_matched_term")
-
-        # keep recommendation if we found at least one reason
-        if reasons:
-            relevant_recs.append({
-                "type": rec.get("type"),
-                "text": rec.get("text"),
-                "reasons": list(set(reasons))
-            })
+def load_previous_insights(user_id=DEFAULT_USER_ID):
+    return user_state.store.get(user_id, "insights")
 
-    matches.append({
-        "id": post.get("id"),
-        "title": title,
-        "matched_terms": sorted(matched_terms),
-        "match_sources": sorted(set(match_sources)),
-        "title_snippet": title[:160],
-        "description_snippet": description[:240],
-        "relevant_recommendations": relevant_recs,
-        "all_recommendations_count": len(post.get("recommendations", []) or [])
-    })
-
-# (Detailed match logs removed) - summary count will be printed after context is built
-
-# Build a compact context summary from matches (keep it short, focusing on the kept recommendations)
-context_summary = []
-for m in matches[:6]:
-    recs = m.get('relevant_recommendations', [])
-    if recs:
-        # include the first relevant recommendation text as a short hint
-        hint = (recs[0].get('text') or '')[:120].replace('\n', ' ')
-        context_summary.append(f"{m.get('id')}: {m.get('title')} -> rec: {hint}")
-    else:
-        context_summary.append(f"{m.get('id')}: {m.get('title')} (no directly relevant recs)")
-
-# Log only the number of posts used as context
-logger.info("Number of context posts used: %d", len(context_summary))
-
-# Extract substitution/swap-type recommendations from the matched posts (prioritize these)
-substitutions_from_posts = []
-for m in matches:
-    pid = m.get('id')
-    for rec in (m.get('relevant_recommendations') or []):
-        rtext = (rec.get('text') or '')
-        rtype = (rec.get('type') or '')
-        rt = rtext.lower()
-        rt_type = rtype.lower()
-        # heuristics: type contains swap/substitute/replace OR text mentions swap/replace/substitute/instead
-        if any(k in rt_type for k in ('swap', 'substitute', 'replacement')) or any(k in rt for k in ('swap', 'replace', 'substitute', 'instead of', 'instead')):
-            substitutions_from_posts.append({
-                'post_id': pid,
-                'text': rtext.strip(),
-                'type': rtype
-            })
 
-if substitutions_from_posts:
-    # include up to 6 of these in the compact context so the model uses them directly
-    for s in substitutions_from_posts[:6]:
-        context_summary.append(f"POST_SWAP: {s['post_id']} -> {s['text']}")
-else:
-    # no substitution snippets to add
-    pass
+# --- context building shared by generate_insights and the lazy context ---
+def collect_meal_foods(mealLog):
+    """Lower-cased food names from a meal log in either the list or {"foods": [...]} format."""
+    meal_foods = set()
+    for m in (mealLog or {}).values():
+        if isinstance(m, list):
+            for food in m:
+                if isinstance(food, str):
+                    meal_foods.add(food.lower())
+        elif isinstance(m, dict) and "foods" in m:
+            for food in m.get("foods", []):
+                if isinstance(food, str):
+                    meal_foods.add(food.lower())
+                elif isinstance(food, dict) and "name" in food:
+                    meal_foods.add(food["name"].lower())
+    return meal_foods
 
-# Log what meal foods and user terms we used
-# (suppress detailed logs; only the context post count is logged)
+def collect_user_terms(userInfo):
+    """Search terms from the profile: goals, conditions, meds, allergies and BMI."""
+    user_terms = set()
+    for key_name in ("health_goals", "health_conditions", "medication_details", "allergies"):
+        for t in userInfo.get(key_name, []) or []:
+            if isinstance(t, str):
+                user_terms.add(t.lower())
 
-# Append short snippets from digi_data and previous_insights into the compact context so the model can reference them
-if digi_data:
+    # Include BMI as a token if present
     try:
-        # Keep it short: include up to 4 top-level keys and a tiny JSON snippet
-        keys = list(digi_data.keys())[:4]
-        context_summary.append("DIGI_DATA_KEYS: " + ", ".join(keys))
-        # include a small sample of one key if available
-        sample_key = keys[0] if keys else None
-        if sample_key:
-            sample_val = str(digi_data.get(sample_key))[:200].replace('\n', ' ')
-            context_summary.append(f"DIGI_SAMPLE: {sample_key} -> {sample_val}")
+        bmi_val = int(userInfo.get("BMI", 0))
+        user_terms.add(str(bmi_val))
     except Exception:
         pass
+    return user_terms
 
-if previous_insights:
-    try:
-        # If insights is a dict with some keys, include a brief summary line for each main field
-        if isinstance(previous_insights, dict):
-            preview = []
-            for k, v in previous_insights.items():
-                if isinstance(v, str):
-                    cleaned_v = v[:80].replace('\n', ' ')
-                    preview.append(f"{k}: {cleaned_v}")
-                elif isinstance(v, list):
-                    preview.append(f"{k}: list(len={len(v)})")
-                else:
-                    preview.append(f"{k}: {type(v).__name__}")
-            # include up to 3 preview lines
-            for p in preview[:3]:
-                context_summary.append("PREV_INSIGHT: " + p)
-    except Exception:
-        pass
+def match_posts(food_data, meal_foods, user_terms):
+    """
+    Posts whose keywords, foods, title or description mention the meal foods or user terms.
 
-# Build safe previews for inclusion in the system instruction payload
-if isinstance(digi_data, dict):
-    digi_preview = {k: (str(digi_data.get(k))[:180]) for k in list(digi_data.keys())[:3]}
-elif digi_data:
-    # digi_data is present but not a dict (e.g., a list) - include a short string preview
-    digi_preview = {"_preview": str(digi_data)[:180]}
-else:
-    digi_preview = {}
-
-if isinstance(previous_insights, dict):
-    prev_preview = {k: (str(previous_insights.get(k))[:180]) for k in list(previous_insights.keys())[:3]}
-else:
-    prev_preview = {}
-
-# Build a combined context preview that weights food_data posts 60% and digi_data 40% (by prominence)
-combined_context_lines = []
-# Prefer up to 6 food_data context lines (60%)
-for i, line in enumerate(context_summary[:6]):
-    combined_context_lines.append(f"FD[{i+1}]: {line}")
-
-# Add up to 4 snippets from digi_data (40%) to the combined context
-if digi_data:
-    try:
-        if isinstance(digi_data, dict):
-            # include up to 4 key->shortvalue pairs
+    Linear scan over every post; kept as the reference for PostIndex.match,
+    which find_matching_posts uses instead.
+    """
+    matches = []
+    for post in food_data:
+        keywords = set([k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)])
+        foods = set([f.lower() for f in post.get("foods", []) if isinstance(f, str)])
+        title = (post.get("post_title") or "")
+        description = (post.get("post_description") or post.get("description") or "")
+        title_l = title.lower()
+        desc_l = description.lower()
+
+        matched_terms = set()
+        match_sources = []
+
+        # direct overlaps with meal foods, keywords, and user terms
+        if meal_foods & (keywords | foods):
+            overlap = meal_foods & (keywords | foods)
+            matched_terms.update(overlap)
+            match_sources.append("meal_foods")
+
+        if user_terms & (keywords | foods):
+            overlap = user_terms & (keywords | foods)
+            matched_terms.update(overlap)
+            match_sources.append("user_profile_terms")
+
+        # presence in title/description
+        for term in (meal_foods | user_terms):
+            if term in title_l or term in desc_l:
+                matched_terms.add(term)
+                match_sources.append("title/description")
+
+        if not matched_terms:
+            continue
+
+        # Analyze recommendations and keep only relevant ones
+        relevant_recs = []
+        for rec in post.get("recommendations", []) or []:
+            r_text = (rec.get("text") or "").lower()
+            r_type = (rec.get("type") or "").lower()
+            reasons = []
+            if meal_foods & set(r_text.split()):
+                reasons.append("matches_meal_food_in_text")
+            if user_terms & set(r_text.split()):
+                reasons.append("matches_user_term_in_text")
+            if user_terms & set(r_type.split()):
+                reasons.append("matches_user_term_in_type")
+            if any(t in r_text for t in matched_terms) or any(t in r_type for t in matched_terms) or any(t in r_text for t in keywords):
+                reasons.append("contains_matched_term")
+
+            if reasons:
+                relevant_recs.append({
+                    "type": rec.get("type"),
+                    "text": rec.get("text"),
+                    "reasons": list(set(reasons))
+                })
+
+        matches.append({
+            "id": post.get("id"),
+            "title": title,
+            "matched_terms": sorted(matched_terms),
+            "match_sources": sorted(set(match_sources)),
+            "title_snippet": title[:160],
+            "description_snippet": description[:240],
+            "relevant_recommendations": relevant_recs,
+            "all_recommendations_count": len(post.get("recommendations", []) or [])
+        })
+    return matches
+
+def find_matching_posts(meal_foods, user_terms):
+    """match_posts over food_data.json, answered from a term index rebuilt only when the file changes."""
+    index = post_index.get_post_index(FOOD_DATA_FILE, lambda path: _load_json_cached(path, []))
+    if index is None:
+        return []
+    return index.match(meal_foods, user_terms)
+
+def build_context_summary(matches, digi_data, previous_insights):
+    """Compact context lines for the prompt. Returns (context_summary, substitutions_from_posts)."""
+    context_summary = []
+    for m in matches[:6]:
+        recs = m.get('relevant_recommendations', [])
+        if recs:
+            hint = (recs[0].get('text') or '')[:120].replace('\n', ' ')
+            context_summary.append(f"{m.get('id')}: {m.get('title')} -> rec: {hint}")
+        else:
+            context_summary.append(f"{m.get('id')}: {m.get('title')} (no directly relevant recs)")
+
+    # Extract substitution/swap-type recommendations from the matched posts
+    substitutions_from_posts = []
+    for m in matches:
+        pid = m.get('id')
+        for rec in (m.get('relevant_recommendations') or []):
+            rtext = (rec.get('text') or '')
+            rtype = (rec.get('type') or '')
+            rt = rtext.lower()
+            rt_type = rtype.lower()
+            if any(k in rt_type for k in ('swap', 'substitute', 'replacement')) or any(k in rt for k in ('swap', 'replace', 'substitute', 'instead of', 'instead')):
+                substitutions_from_posts.append({
+                    'post_id': pid,
+                    'text': rtext.strip(),
+                    'type': rtype
+                })
+
+    if substitutions_from_posts:
+        for s in substitutions_from_posts[:6]:
+            context_summary.append(f"POST_SWAP: {s['post_id']} -> {s['text']}")
+
+    # Build digi_data and previous_insights context
+    if digi_data:
+        try:
             keys = list(digi_data.keys())[:4]
-            for k in keys:
-                v = str(digi_data.get(k))[:140].replace('\n', ' ')
-                combined_context_lines.append(f"DD:{k} -> {v}")
-        elif isinstance(digi_data, list):
-            for idx, item in enumerate(digi_data[:4]):
-                item_str = str(item)[:140].replace('\n', ' ')
-                combined_context_lines.append(f"DD_ITEM[{idx+1}]: {item_str}")
+            context_summary.append("DIGI_DATA_KEYS: " + ", ".join(keys))
+            sample_key = keys[0] if keys else None
+            if sample_key:
+                sample_val = str(digi_data.get(sample_key))[:200].replace('\n', ' ')
+                context_summary.append(f"DIGI_SAMPLE: {sample_key} -> {sample_val}")
+        except Exception:
+            pass
+
+    if previous_insights:
+        try:
+            if isinstance(previous_insights, dict):
+                preview = []
+                for k, v in previous_insights.items():
+                    if isinstance(v, str):
+                        cleaned_v = v[:80].replace('\n', ' ')
+                        preview.append(f"{k}: {cleaned_v}")
+                    elif isinstance(v, list):
+                        preview.append(f"{k}: list(len={len(v)})")
+                    else:
+                        preview.append(f"{k}: {type(v).__name__}")
+                for p in preview[:3]:
+                    context_summary.append("PREV_INSIGHT: " + p)
+        except Exception:
+            pass
+
+    return context_summary, substitutions_from_posts
+
+def build_meal_items_list(mealLog):
+    """One {"mealType", "current"} entry per logged food."""
+    meal_items_list = []
+    for meal_type, data in (mealLog or {}).items():
+        if isinstance(data, list):
+            foods = data
         else:
-            preview_str = str(digi_data)[:180].replace('\n', ' ')
-            combined_context_lines.append(f"DD_PREVIEW: {preview_str}")
-    except Exception:
-        # fallback small preview
-        combined_context_lines.append("DD_PREVIEW: (could not extract detailed preview)")
-
-# Add an explicit weighting note so the LLM understands the priority
-combined_context_str = "CONTEXT_WEIGHTING: food_data=60,digi_data=40\n" + "\n".join(combined_context_lines)
-
-system_instruction = (
-    "You are a clinical-aware nutrition assistant. "
-    "Use the provided userInfo and mealLog to analyze dietary choices and give concise, practical guidance. "
-    "UserInfo, MealLog, and environmentContext are JSON objects included below. Consider availability, and season when suggesting foods or swaps (use this flexibly). Be mindful of health conditions and goals. "
-    "Do NOT give medical diagnoses; give food and behavior suggestions consistent with the user's goals and conditions.\n\n"
-    "USER_INFO: " + json.dumps(userInfo) + "\n"
-    "MEAL_LOG: " + json.dumps(mealLog) + "\n"
-    "ENVIRONMENT_CONTEXT: " + json.dumps(environmentContext) + "\n"
-)
+            foods = data.get('foods', [])
+        for it in foods:
+            meal_items_list.append({"mealType": meal_type, "current": it})
+    return meal_items_list
+
+def build_combined_context(context_summary, digi_data):
+    """Context preview that weights food_data posts 60% and digi_data 40% (by prominence)."""
+    combined_context_lines = []
+    for i, line in enumerate(context_summary[:6]):
+        combined_context_lines.append(f"FD[{i+1}]: {line}")
+
+    if digi_data:
+        try:
+            if isinstance(digi_data, dict):
+                keys = list(digi_data.keys())[:4]
+                for k in keys:
+                    v = str(digi_data.get(k))[:140].replace('\n', ' ')
+                    combined_context_lines.append(f"DD:{k} -> {v}")
+            elif isinstance(digi_data, list):
+                for idx, item in enumerate(digi_data[:4]):
+                    item_str = str(item)[:140].replace('\n', ' ')
+                    combined_context_lines.append(f"DD_ITEM[{idx+1}]: {item_str}")
+            else:
+                preview_str = str(digi_data)[:180].replace('\n', ' ')
+                combined_context_lines.append(f"DD_PREVIEW: {preview_str}")
+        except Exception:
+            combined_context_lines.append("DD_PREVIEW: (could not extract detailed preview)")
+
+    return "CONTEXT_WEIGHTING: food_data=60,digi_data=40\n" + "\n".join(combined_context_lines)
 
-# Compose the prompt contents: include short food_data matches + digi_data + previous insights as context
-contents = (
-    "You have access to relevant posts from the food database and digi_data for context (weighted):\n"
-    + combined_context_str + "\n\n"
-    + "\n".join(context_summary)
-    + "\n\nAlso consider environmentContext (availability, season) when choosing recommendations; prefer suggestions that use available ingredients or are suitable for the user's location/season.\n\n"
-    + "Using the system instruction (which includes userInfo, mealLog and environmentContext), produce a single JSON object (only JSON, no extra text) with the following keys:\n"
-    "1) key_insight (string): a concise 4-5 line insight that explicitly references the user's profile (conditions, goals, BMI) and the meals the user actually ate today; describe how those meals are likely to affect the user's health (positive or negative impacts), and note any immediate concerns or helpful patterns observed.\n"
-    "2) modern_approach (string): a 3-4 line suggestion using modern foods or methods to help the user's goals; use the recommendations and comments from the matched posts where applicable.\n"
-    "3) heritage_alternative (string): a 3-4 line set of Indian/heritage alternatives (specific Indian foods or preparations) relevant to the user's goals, drawn from food_data.json recommendations where applicable.\n"
-    "4) simple_swap (string): 2-3 lines suggesting simple Indian swap(s) for items in the mealLog the user can use tomorrow (use food_data.json recommendations if present).\n"
-    "5) general_summary (array): a list of 4-5 short actionable strings the user should generally do for the next logging (next day), personalized using mealLog, userInfo, previous insights, digi_data.json context, and environmentContext. Each should be an encouraging, achievable step that uses the simple_swap, modern_approach, or heritage_alternative where relevant. Subtly reference environmentContext (availability/season) where helpful — e.g., 'for breakfast, start your day with X since it's available', or 'since it's Monsoon, prefer warm, hydrating options at lunch' — but do so briefly and not emphatically.\n\n"
-    "When answering, heavily use the matched posts and the 'recommendations' fields from food_data.json, the digi_data.json content, and any previous insights in insights.json as context. If you cite specific suggested foods, ensure they are realistic Indian items.\n"
-    "Return ONLY the JSON object. Keep each string reasonably short (approx 3-4 lines for string fields, 4-5 short strings for general_summary).\n\n"
-    "SYSTEM_INSTRUCTION: " + json.dumps({"userInfo": userInfo, "mealLog": mealLog, "environmentContext": environmentContext, "digi_data_preview": digi_preview, "previous_insights": prev_preview}) + "\n\n"
-)
 
-    # (The LLM call has been moved below so it can use mongoReasoning as context.)
+def warm_up():
+    """
+    Parse the context data files and build the post index ahead of the first
+    request. Post matching, MongoDB swaps and LLM calls still happen per run.
+    """
+    started = time.perf_counter()
+    load_digi_data()
+    post_index.get_post_index(FOOD_DATA_FILE, lambda path: _load_json_cached(path, []))
+    logger.info("Nudging context warmed up in %.0f ms", (time.perf_counter() - started) * 1000)
 
 
 # --- MONGO DB ALTERNATIVES BLOCK (separate, added as requested) ---
 try:
-    from pymongo import MongoClient
-    from bson.json_util import dumps as _dumps
+    import mongo_pool
+    import food_repository
 except Exception:
-    MongoClient = None
-
-
-def _safe_get_env(varname: str):
-    try:
-        return os.getenv(varname)
-    except Exception:
-        return None
+    mongo_pool = None
+    food_repository = None
 
 
 def _split_food_items(text: str):
@@ -466,39 +403,11 @@ def _split_food_items(text: str):
     return out
 
 
-mongoReasoning = []
-
-def _atlas_search_local(collection, query: str, limit: int = 3):
-    if collection is None:
-        return []
-    pipeline = [
-        {"$search": {"index": "default", "text": {"query": query, "path": "dish_name"}}},
-        {"$limit": limit},
-        {"$project": {"_id": 0}}
-    ]
-    try:
-        results = list(collection.aggregate(pipeline))
-        if results:
-            return results
-    except Exception:
-        # Atlas Search may fail if index not configured; fallback to regex
-        pass
-
-    try:
-        cursor = collection.find({"dish_name": {"$regex": query, "$options": "i"}}, {"_id": 0}).limit(limit)
-        return list(cursor)
-    except Exception:
-        return []
-
-
-def _find_similar_healthier_candidates(collection, substitutes_collection, base_dish: dict, conditions: list, goals: list, meal_type: str = None, max_alts: int = 3):
-    """Return (alternative_name, short_reasoning) or (None, reasoning_if_current_is_ok).
+def _rank_candidates(base_dish: dict, candidates: list, conditions: list, goals: list, meal_type: str = None, max_alts: int = 3):
+    """Keep candidates similar to base_dish that are measurably healthier, best first.
 
-    Strategy:
-    - Search for *similar* candidates (by name token overlap or shared attributes like "main_ingredient", "cuisine", or "meal_type").
-    - Prefer same-type (beverage vs solid).
-    - Only propose a candidate if it is measurably healthier for the user's goals (10% lower calories for weight-loss; >=10% more protein for protein goal).
-    - If no similar healthier candidate exists, return (None, explanation) so current item remains.
+    No I/O: mongo_db_alternatives_block gathers candidates for the whole meal
+    log in one batched lookup and ranks each item with this.
     """
     if not base_dish:
         return []
@@ -519,26 +428,13 @@ def _find_similar_healthier_candidates(collection, substitutes_collection, base_
     goals_norm = [g.lower() for g in (goals or [])]
     cond_norm = [c.lower() for c in (conditions or [])]
 
-    bev_keywords = ("tea", "chai", "coffee", "latte", "milk", "juice", "smoothie", "shake", "soda", "cola", "beverage", "drink")
     base_name_l = base_name.lower()
     base_meal_type = (base_dish.get("meal_type") or "").lower()
-    base_is_beverage = any(k in base_name_l for k in bev_keywords) or any(k in base_meal_type for k in ("drink", "beverage", "tea", "chai"))
+    base_is_beverage = keyword_classifier.matches("beverage", base_name_l) or keyword_classifier.matches("beverage_meal_type", base_meal_type)
 
     # normalize provided meal_type (breakfast/lunch/dinner/snacks)
     meal_time = (meal_type or "").lower()
 
-    # Gather candidate set by searching for similar names (broad match)
-    candidates = []
-    try:
-        candidates = _atlas_search_local(collection, base_name, limit=20)
-    except Exception:
-        candidates = []
-
-    # If the above returned nothing, broaden search to first token
-    if not candidates and base_name:
-        first = base_name.split()[0]
-        candidates = _atlas_search_local(collection, first, limit=20)
-
     # Normalize and filter candidates: exclude same exact dish and ingredient-like matches
     filtered = []
     for c in candidates:
@@ -549,7 +445,7 @@ def _find_similar_healthier_candidates(collection, substitutes_collection, base_
             continue
         # prefer same-type candidates only
         name_l = name.lower()
-        is_bev = any(k in name_l for k in bev_keywords) or any(k in (c.get("meal_type") or "").lower() for k in ("drink", "beverage", "tea", "chai"))
+        is_bev = keyword_classifier.matches("beverage", name_l) or keyword_classifier.matches("beverage_meal_type", (c.get("meal_type") or "").lower())
         if is_bev != base_is_beverage:
             continue
         # ensure candidate's declared meal_type (if present) matches the current meal time when available
@@ -676,567 +572,291 @@ def _find_similar_healthier_candidates(collection, substitutes_collection, base_
     return alts
 
 
-# run the block using the existing userInfo and mealLog variables
-def mongo_db_alternatives_block():
-    global mongoReasoning
-    mongoReasoning = []
-    m_uri = _safe_get_env("MONGO_URI")
-    if not m_uri or MongoClient is None:
-        # skip MongoDB alternatives silently when not configured
-        return mongoReasoning
-
-    try:
-        client = MongoClient(m_uri)
-        mdb = client.get_database("FoodData")
-        food_col = mdb.get_collection("food_collection")
-        subs_col = mdb.get_collection("ingredient_substitutes")
-    except Exception:
-        # fail silently on MongoDB connection errors
-        return mongoReasoning
-
+def _meal_log_items(mealLog):
+    """(meal_type, item) for every logged food, with combined entries ('X or Y') split into items."""
+    items = []
     for meal_type, info in (mealLog or {}).items():
         # Handle new format: direct array of food names
         if isinstance(info, list):
-            for food in info:
-                if isinstance(food, str):
-                    # split combined food entries into separate items (e.g., 'Roasted chana or a small banana')
-                    items = _split_food_items(food)
-                    for item in items:
-                        # find base dish for this single item
-                        found = _atlas_search_local(food_col, item, limit=1)
-                        base = found[0] if found else {"dish_name": item}
-
-                        alternatives = _find_similar_healthier_candidates(
-                            food_col,
-                            subs_col,
-                            base,
-                            userInfo.get("health_conditions"),
-                            userInfo.get("health_goals"),
-                            meal_type=meal_type,
-                            max_alts=3
-                        )
-
-                        if not alternatives:
-                            # no healthier alternatives found — keep current (item-level)
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": [{"name": item, "reasoning": "Kept: no similar healthier alternative found in DB."}]
-                            })
-                        else:
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": alternatives
-                            })
-        # Handle old format: {"foods": [...]}
+            foods = [food for food in info if isinstance(food, str)]
+        # Handle old format: {"foods": [...]} with names or food objects
         elif isinstance(info, dict) and "foods" in info:
+            foods = []
             for food in (info.get("foods") or []):
                 if isinstance(food, str):
-                    # split combined food entries into separate items (e.g., 'Roasted chana or a small banana')
-                    items = _split_food_items(food)
-                    for item in items:
-                        # find base dish for this single item
-                        found = _atlas_search_local(food_col, item, limit=1)
-                        base = found[0] if found else {"dish_name": item}
-
-                        alternatives = _find_similar_healthier_candidates(
-                            food_col,
-                            subs_col,
-                            base,
-                            userInfo.get("health_conditions"),
-                            userInfo.get("health_goals"),
-                            meal_type=meal_type,
-                            max_alts=3
-                        )
-
-                        if not alternatives:
-                            # no healthier alternatives found — keep current (item-level)
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": [{"name": item, "reasoning": "Kept: no similar healthier alternative found in DB."}]
-                            })
-                        else:
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": alternatives
-                            })
+                    foods.append(food)
                 elif isinstance(food, dict) and "name" in food:
-                    # Handle old format with food objects
-                    food_name = food["name"]
-                    items = _split_food_items(food_name)
-                    for item in items:
-                        # find base dish for this single item
-                        found = _atlas_search_local(food_col, item, limit=1)
-                        base = found[0] if found else {"dish_name": item}
-
-                        alternatives = _find_similar_healthier_candidates(
-                            food_col,
-                            subs_col,
-                            base,
-                            userInfo.get("health_conditions"),
-                            userInfo.get("health_goals"),
-                            meal_type=meal_type,
-                            max_alts=3
-                        )
-
-                        if not alternatives:
-                            # no healthier alternatives found — keep current (item-level)
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": [{"name": item, "reasoning": "Kept: no similar healthier alternative found in DB."}]
-                            })
-                        else:
-                            mongoReasoning.append({
-                                "mealType": meal_type,
-                                "current": item,
-                                "base_doc": base,
-                                "alternatives": alternatives
-                            })
-
-    # do not log detailed mongoReasoning here
-
-    return mongoReasoning
+                    foods.append(food["name"])
+        else:
+            continue
+        for food in foods:
+            for item in _split_food_items(food):
+                items.append((meal_type, item))
+    return items
 
 
-# Execute the block now (keeps it separate from the existing logic and files)
-mongo_db_alternatives_block()
+def mongo_db_alternatives_block(mealLog=None, userInfo=None, user_id=DEFAULT_USER_ID):
+    """
+    Per-item healthier alternatives from food_collection for a meal log
+    (defaults to the user's stored one).
 
+    Runs in three stages with a constant number of lookups per meal log:
+    resolve every item to its base dish in one batch, gather candidates for
+    all base dishes in one batch (plus one for first-token fallbacks), then
+    rank each item locally. Stage timings are kept in mongoStageTimings.
+    """
+    global mongoStageTimings
+    mealLog = load_meal_log(user_id) if mealLog is None else mealLog
+    userInfo = load_user_info(user_id) if userInfo is None else userInfo
+    mongoReasoning = []
+    if mongo_pool is None or food_repository is None:
+        # skip MongoDB alternatives silently when not configured
+        return mongoReasoning
 
-# Build a compact, nutrition-aware preview of mongo substitutions and split combined meal items
-mongo_swaps_preview = []
-meal_items_list = []
-try:
-    # create a per-food item list from mealLog so each food is suggested separately
-    for meal_type, info in (mealLog or {}).items():
-        for food in (info.get("foods") or []):
-            items = _split_food_items(food)
-            for it in items:
-                meal_items_list.append({"mealType": meal_type, "current": it})
-
-    # If Mongo is available, try to re-open a lightweight connection to fetch nutrient docs
-    m_uri = _safe_get_env("MONGO_URI")
-    client_tmp = None
-    food_col_tmp = None
-    if m_uri and MongoClient is not None:
-        try:
-            client_tmp = MongoClient(m_uri, serverSelectionTimeoutMS=2000)
-            mdb_tmp = client_tmp.get_database("FoodData")
-            food_col_tmp = mdb_tmp.get_collection("food_collection")
-        except Exception:
-            food_col_tmp = None
-
-    # Build preview: for each mongoReasoning entry, include base name, each alternative,
-    # and a short computed hint (e.g., "more protein", "fewer calories") when nutrient docs are available.
-    for entry in mongoReasoning:
-        base_name = entry.get("current")
-        base_doc = entry.get("base_doc") or {}
-        base_cal = None
-        base_pro = None
-        try:
-            base_cal = float(base_doc.get("calories_kcal") or base_doc.get("calories") or 0)
-        except Exception:
-            base_cal = None
-        try:
-            base_pro = float(base_doc.get("protein_g") or base_doc.get("protein") or 0)
-        except Exception:
-            base_pro = None
-
-        alts_preview = []
-        for alt in entry.get("alternatives", []):
-            alt_name = alt.get("name")
-            alt_reason = alt.get("reasoning", "")
-            alt_doc = None
-            alt_cal = None
-            alt_pro = None
-            hint = alt_reason
-
-            # attempt to fetch alt nutrition from DB by name if we have a collection
-            if food_col_tmp is not None and isinstance(alt_name, str) and alt_name:
-                try:
-                    found = _atlas_search_local(food_col_tmp, alt_name, limit=1)
-                    if found:
-                        alt_doc = found[0]
-                except Exception:
-                    alt_doc = None
+    try:
+        # reuse the process-wide pooled client instead of opening a new one per call
+        food_col = mongo_pool.get_collection("food_collection")
+    except Exception:
+        # fail silently on MongoDB connection errors
+        return mongoReasoning
+    if food_col is None and not food_repository.local_search_ready():
+        return mongoReasoning
 
-            if not alt_doc and food_col_tmp is not None and isinstance(alt_name, str):
-                # fallback regex search
-                try:
-                    res = list(food_col_tmp.find({"dish_name": {"$regex": alt_name, "$options": "i"}}, {"_id": 0}).limit(1))
-                    if res:
-                        alt_doc = res[0]
-                except Exception:
-                    alt_doc = None
+    items = _meal_log_items(mealLog)
+    timings = {"items": len(items)}
+    started = time.perf_counter()
+
+    # Stage 1: resolve every item to its base dish
+    t = time.perf_counter()
+    found = food_repository.lookup_dishes(food_col, [item for _, item in items], limit=1)
+    bases = {}
+    for _, item in items:
+        docs = found.get(item) if isinstance(item, str) else None
+        bases[item] = docs[0] if docs else {"dish_name": item}
+    timings["resolve_base_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    # Stage 2: gather similar candidates for all base dishes, broadening to the first token when empty
+    t = time.perf_counter()
+    base_names = {item: (base.get("dish_name") or "").strip() for item, base in bases.items()}
+    candidates = food_repository.lookup_dishes(food_col, base_names.values(), limit=20)
+    first_tokens = {name: name.split()[0] for name in set(base_names.values()) if name and not candidates.get(name)}
+    if first_tokens:
+        broad = food_repository.lookup_dishes(food_col, first_tokens.values(), limit=20)
+        for name, first in first_tokens.items():
+            candidates[name] = broad.get(first, [])
+    timings["gather_candidates_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+    # Stage 3: rank candidates per item (no I/O)
+    t = time.perf_counter()
+    for meal_type, item in items:
+        base = bases[item]
+        item_candidates = candidates.get(base_names[item], [])
+        alternatives = _rank_candidates(
+            base,
+            item_candidates,
+            userInfo.get("health_conditions"),
+            userInfo.get("health_goals"),
+            meal_type=meal_type,
+            max_alts=3
+        )
+        if not alternatives:
+            # no healthier alternatives found — keep current (item-level)
+            alternatives = [{"name": item, "reasoning": "Kept: no similar healthier alternative found in DB."}]
+        mongoReasoning.append({
+            "mealType": meal_type,
+            "current": item,
+            "base_doc": base,
+            "alternatives": alternatives
+        })
+    timings["rank_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    timings["backend"] = "local" if food_repository.local_search_ready() else "atlas"
+    mongoStageTimings = timings
+    logger.info("Mongo alternatives for %d items: %s", len(items), timings)
 
-            if alt_doc:
-                try:
-                    alt_cal = float(alt_doc.get("calories_kcal") or alt_doc.get("calories") or 0)
-                except Exception:
-                    alt_cal = None
-                try:
-                    alt_pro = float(alt_doc.get("protein_g") or alt_doc.get("protein") or 0)
-                except Exception:
-                    alt_pro = None
-
-                # compute simple deltas to surface why this alt is useful
-                parts = []
-                if base_cal and alt_cal is not None:
-                    if alt_cal < base_cal:
-                        parts.append(f"~{int(round(100*(1 - (alt_cal/base_cal))))}% fewer kcal")
-                    elif alt_cal > base_cal:
-                        parts.append(f"~{int(round(100*((alt_cal/base_cal) - 1)))}% more kcal")
-                if base_pro is not None and alt_pro is not None:
-                    if alt_pro > base_pro:
-                        parts.append(f"{round(alt_pro - base_pro,1)}g more protein")
-                if parts:
-                    hint = f"{alt_reason} ({'; '.join(parts)})"
-
-            # add small practical extra suggestions when protein seems low
-            extra_suggestion = ""
-            # if alt or base protein values indicate low protein (heuristic)
-            prot_ok = False
-            try:
-                prot_val = None
-                if alt_pro is not None:
-                    prot_val = alt_pro
-                elif base_pro is not None:
-                    prot_val = base_pro
-                if prot_val is not None and prot_val >= 5:
-                    prot_ok = True
-            except Exception:
-                prot_ok = False
+    return mongoReasoning
 
-            if not prot_ok:
-                # recommend small protein-boosting sides common in Indian kitchens
-                extra_suggestion = "Serve with a small side of sprouts or a spoon of curd/paneer to boost protein."
 
-            alts_preview.append({
-                "alt_name": alt_name,
-                "hint": hint,
-                "extra_suggestion": extra_suggestion
-            })
+# Insights are generated off the request path; see insight_jobs.py
+insight_queue = insight_jobs.InsightJobQueue(lambda user_id: generate_insights(user_id))
 
-        mongo_swaps_preview.append({
-            "mealType": entry.get("mealType"),
-            "current": base_name,
-            "base_cal": base_cal,
-            "base_protein": base_pro,
-            "alternatives": alts_preview
-        })
 
-except Exception:
-    # do not let preview generation break the main flow
-    mongo_swaps_preview = []
-    meal_items_list = []
+def _check_user_id(user_id):
+    if not user_state.valid_user_id(user_id):
+        raise HTTPException(status_code=400, detail="user_id must be 1-64 letters, digits or . _ @ -")
 
-@router.post("/store_user_info")
-async def store_user_info(data: UserInfoModel):
+
+@router.post("/users/{user_id}/store_user_info")
+async def store_user_info_for(user_id: str, data: UserInfoModel):
+    _check_user_id(user_id)
     try:
-        print(f"__file__: {__file__}")
-        user_info = data.userInfo
-        print(f"USER_DATA_FILE: {USER_DATA_FILE}")
-        with open(USER_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(user_info, f, ensure_ascii=False, indent=2)
-        print(f"User info saved to {USER_DATA_FILE}: {user_info}")
-        logger.info("userInfo stored successfully.")
+        user_state.store.put(user_id, "userInfo", data.userInfo)
+        logger.info("userInfo stored successfully for %s.", user_id)
         return {"message": "userInfo stored successfully"}
     except Exception as e:
         logger.error(f"Error storing userInfo: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-
-
-@router.post("/store_environment_context")
-async def store_environment_context(data: EnvironmentContextModel):
+@router.post("/users/{user_id}/store_environment_context")
+async def store_environment_context_for(user_id: str, data: EnvironmentContextModel):
+    _check_user_id(user_id)
     try:
-        env_ctx = data.environmentContext
-        with open(ENVIRONMENT_CONTEXT_FILE, "w", encoding="utf-8") as f:
-            json.dump(env_ctx, f, ensure_ascii=False, indent=2)
-        logger.info("environmentContext stored successfully.")
+        user_state.store.put(user_id, "environmentContext", data.environmentContext)
+        logger.info("environmentContext stored successfully for %s.", user_id)
         return {"message": "environmentContext stored successfully"}
     except Exception as e:
         logger.error(f"Error storing environmentContext: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.post("/store_meal_log")
-async def store_meal_log(data: MealLogModel):
+@router.post("/users/{user_id}/store_meal_log")
+async def store_meal_log_for(user_id: str, data: MealLogModel):
+    _check_user_id(user_id)
     try:
         meal_log = data.mealLog
-        with open(MEAL_LOG_FILE, "w", encoding="utf-8") as f:
-            json.dump(meal_log, f, ensure_ascii=False, indent=2)
-        logger.info("mealLog stored successfully.")
-        
-        # Generate insights after storing meal log
-        insights = generate_insights()
-        
-        # Save insights to file
-        with open("insights.json", "w", encoding="utf-8") as f:
-            json.dump(insights, f, ensure_ascii=False, indent=2)
-        
-        return {"message": "mealLog stored successfully", "insights": insights}
+        user_state.store.put(user_id, "mealLog", meal_log)
+        logger.info("mealLog stored successfully for %s.", user_id)
+        # logged foods rank higher in autocomplete
+        typeahead.record_meal_log(meal_log)
+
+        # Insights are generated in the background (and saved to the user's state);
+        # clients poll /nudging/jobs/{job_id} for the result
+        job = insight_queue.submit(user_id)
+        return {"message": "mealLog stored successfully", "job_id": job.id, "status": job.status}
+    except insight_jobs.QueueFullError as e:
+        logger.warning(f"Insight queue full: {e}")
+        raise HTTPException(status_code=503, detail="Insight generation is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Error storing mealLog: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/insights")
-async def get_insights():
-    try:
-        if os.path.exists("insights.json"):
-            with open("insights.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            return {"error": "Insights not available"}
-    except Exception as e:
-        logger.error(f"Error loading insights: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-def generate_insights():
-    # Load fresh data each time
-    userInfo = load_user_info()
-    mealLog = load_meal_log()
-    environmentContext = load_environment_context()
-    
-    # Call mongo block to populate mongoReasoning
-    mongo_db_alternatives_block()
-    mongoReasoning = load_mongo_reasoning()
-    
-    # Load local food data for context
-    food_data = []
-    try:
-        with open(os.path.join(os.path.dirname(__file__), "food_data.json"), "r", encoding="utf-8") as f:
-            food_data = json.load(f)
-    except Exception as e:
-        food_data = []
-
-    # Load digi_data.json for additional user/context signals (optional)
-    digi_data = {}
-    try:
-        digi_path = os.path.join(os.path.dirname(__file__), "digi_data.json")
-        if not os.path.exists(digi_path):
-            digi_path = os.path.join(os.getcwd(), "digi_data.json")
-        with open(digi_path, "r", encoding="utf-8") as f:
-            digi_data = json.load(f)
-    except Exception:
-        digi_data = {}
-
-    # Load any previously produced insights to incorporate as context (optional)
-    previous_insights = None
-    insights_path = os.path.join(os.path.dirname(__file__), "insights.json")
-    try:
-        if os.path.exists(insights_path):
-            with open(insights_path, "r", encoding="utf-8") as f:
-                previous_insights = json.load(f)
-    except Exception as e:
-        pass
-
-    # Build meal foods set
-    meal_foods = set()
-    for m in mealLog.values():
-        if isinstance(m, list):
-            for food in m:
-                if isinstance(food, str):
-                    meal_foods.add(food.lower())
-        elif isinstance(m, dict) and "foods" in m:
-            for food in m.get("foods", []):
-                if isinstance(food, str):
-                    meal_foods.add(food.lower())
-                elif isinstance(food, dict) and "name" in food:
-                    meal_foods.add(food["name"].lower())
-
-    # Build user-related search terms from profile
-    user_terms = set()
-    for key_name in ("health_goals", "health_conditions", "medication_details", "allergies"):
-        for t in userInfo.get(key_name, []) or []:
-            if isinstance(t, str):
-                user_terms.add(t.lower())
-
-    # Include BMI as a token if present
-    try:
-        bmi_val = int(userInfo.get("BMI", 0))
-        user_terms.add(str(bmi_val))
-    except Exception:
-        pass
-
-    # Find matching posts from food_data
-    matches = []
-    for post in food_data:
-        keywords = set([k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)])
-        foods = set([f.lower() for f in post.get("foods", []) if isinstance(f, str)])
-        title = (post.get("post_title") or "")
-        description = (post.get("post_description") or post.get("description") or "")
-        title_l = title.lower()
-        desc_l = description.lower()
-
-        matched_terms = set()
-        match_sources = []
-
-        # direct overlaps with meal foods, keywords, and user terms
-        if meal_foods & (keywords | foods):
-            overlap = meal_foods & (keywords | foods)
-            matched_terms.update(overlap)
-            match_sources.append("meal_foods")
-
-        if user_terms & (keywords | foods):
-            overlap = user_terms & (keywords | foods)
-            matched_terms.update(overlap)
-            match_sources.append("user_profile_terms")
-
-        # presence in title/description
-        for term in (meal_foods | user_terms):
-            if term in title_l or term in desc_l:
-                matched_terms.add(term)
-                match_sources.append("title/description")
-
-        if not matched_terms:
-            continue
-
-        # Analyze recommendations and keep only relevant ones
-        relevant_recs = []
-        for rec in post.get("recommendations", []) or []:
-            r_text = (rec.get("text") or "").lower()
-            r_type = (rec.get("type") or "").lower()
-            reasons = []
-            if meal_foods & set(r_text.split()):
-                reasons.append("matches_meal_food_in_text")
-            if user_terms & set(r_text.split()):
-                reasons.append("matches_user_term_in_text")
-            if user_terms & set(r_type.split()):
-                reasons.append("matches_user_term_in_type")
-            if any(t in r_text for t in matched_terms) or any(t in r_type for t in matched_terms) or any(t in r_text for t in keywords):
-                reasons.append("contains_matched_term")
-
-            if reasons:
-                relevant_recs.append({
-                    "type": rec.get("type"),
-                    "text": rec.get("text"),
-                    "reasons": list(set(reasons))
-                })
-
-        matches.append({
-            "id": post.get("id"),
-            "title": title,
-            "matched_terms": sorted(matched_terms),
-            "match_sources": sorted(set(match_sources)),
-            "title_snippet": title[:160],
-            "description_snippet": description[:240],
-            "relevant_recommendations": relevant_recs,
-            "all_recommendations_count": len(post.get("recommendations", []) or [])
-        })
-
-    # Build context summary from matches
-    context_summary = []
-    for m in matches[:6]:
-        recs = m.get('relevant_recommendations', [])
-        if recs:
-            hint = (recs[0].get('text') or '')[:120].replace('\n', ' ')
-            context_summary.append(f"{m.get('id')}: {m.get('title')} -> rec: {hint}")
-        else:
-            context_summary.append(f"{m.get('id')}: {m.get('title')} (no directly relevant recs)")
-
-    # Extract substitution/swap-type recommendations from the matched posts
-    substitutions_from_posts = []
-    for m in matches:
-        pid = m.get('id')
-        for rec in (m.get('relevant_recommendations') or []):
-            rtext = (rec.get('text') or '')
-            rtype = (rec.get('type') or '')
-            rt = rtext.lower()
-            rt_type = rtype.lower()
-            if any(k in rt_type for k in ('swap', 'substitute', 'replacement')) or any(k in rt for k in ('swap', 'replace', 'substitute', 'instead of', 'instead')):
-                substitutions_from_posts.append({
-                    'post_id': pid,
-                    'text': rtext.strip(),
-                    'type': rtype
-                })
-
-    if substitutions_from_posts:
-        for s in substitutions_from_posts[:6]:
-            context_summary.append(f"POST_SWAP: {s['post_id']} -> {s['text']}")
+@router.get("/users/{user_id}/insights")
+async def get_insights_for(user_id: str):
+    _check_user_id(user_id)
+    insights = load_previous_insights(user_id)
+    if insights is None:
+        return {"error": "Insights not available"}
+    return insights
+
+@router.get("/users/{user_id}/insights/stream")
+async def stream_insights_for(user_id: str):
+    """Generate a user's insights, streamed as Server-Sent Events (`section`, then `done` or `error`)"""
+    _check_user_id(user_id)
+    return StreamingResponse(
+        stream_insights(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Build digi_data and previous_insights context
-    if digi_data:
-        try:
-            keys = list(digi_data.keys())[:4]
-            context_summary.append("DIGI_DATA_KEYS: " + ", ".join(keys))
-            sample_key = keys[0] if keys else None
-            if sample_key:
-                sample_val = str(digi_data.get(sample_key))[:200].replace('\n', ' ')
-                context_summary.append(f"DIGI_SAMPLE: {sample_key} -> {sample_val}")
-        except Exception:
-            pass
+# Original single-user routes, kept for existing clients; they act on DEFAULT_USER_ID
+@router.post("/store_user_info")
+async def store_user_info(data: UserInfoModel):
+    return await store_user_info_for(DEFAULT_USER_ID, data)
 
-    if previous_insights:
-        try:
-            if isinstance(previous_insights, dict):
-                preview = []
-                for k, v in previous_insights.items():
-                    if isinstance(v, str):
-                        cleaned_v = v[:80].replace('\n', ' ')
-                        preview.append(f"{k}: {cleaned_v}")
-                    elif isinstance(v, list):
-                        preview.append(f"{k}: list(len={len(v)})")
-                    else:
-                        preview.append(f"{k}: {type(v).__name__}")
-                for p in preview[:3]:
-                    context_summary.append("PREV_INSIGHT: " + p)
-        except Exception:
-            pass
+@router.post("/store_environment_context")
+async def store_environment_context(data: EnvironmentContextModel):
+    return await store_environment_context_for(DEFAULT_USER_ID, data)
 
-    # Build meal_items_list from mealLog
-    meal_items_list = []
-    for meal_type, data in mealLog.items():
-        if isinstance(data, list):
-            foods = data
-        else:
-            foods = data.get('foods', [])
-        for it in foods:
-            meal_items_list.append({"mealType": meal_type, "current": it})
+@router.post("/store_meal_log")
+async def store_meal_log(data: MealLogModel):
+    return await store_meal_log_for(DEFAULT_USER_ID, data)
 
-    # Build previews for inclusion in the system instruction payload
+@router.get("/insights")
+async def get_insights():
+    return await get_insights_for(DEFAULT_USER_ID)
+
+@router.get("/insights/stream")
+async def stream_insights_default():
+    return await stream_insights_for(DEFAULT_USER_ID)
+
+@router.get("/jobs/{job_id}")
+async def get_insight_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """Status of an insight job, with the insights once done. `wait` long-polls up to that many seconds."""
+    job = insight_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    await insight_queue.wait(job, wait)
+    return job.to_dict()
+
+@router.get("/jobs")
+async def get_insight_jobs_stats():
+    """Insight worker pool, queue and coalescing counters"""
+    return insight_queue.stats()
+
+@router.get("/users/state")
+async def get_user_state_stats():
+    """In-memory user state and write-behind counters"""
+    return user_state.store.stats()
+
+@router.get("/insights/timings")
+async def get_insights_timings():
+    """Per-stage timings of the last insights run"""
+    return load_insight_stage_timings()
+
+@router.get("/alternatives/timings")
+async def get_alternatives_timings():
+    """Per-stage timings of the last MongoDB alternatives run"""
+    return load_mongo_stage_timings()
+
+def _match_posts(mealLog, userInfo):
+    return find_matching_posts(collect_meal_foods(mealLog), collect_user_terms(userInfo))
+
+def _digi_preview(digi_data):
     if isinstance(digi_data, dict):
-        digi_preview = {k: (str(digi_data.get(k))[:180]) for k in list(digi_data.keys())[:3]}
+        return {k: (str(digi_data.get(k))[:180]) for k in list(digi_data.keys())[:3]}
     elif digi_data:
-        digi_preview = {"_preview": str(digi_data)[:180]}
-    else:
-        digi_preview = {}
+        return {"_preview": str(digi_data)[:180]}
+    return {}
 
+def _prev_preview(previous_insights):
     if isinstance(previous_insights, dict):
-        prev_preview = {k: (str(previous_insights.get(k))[:180]) for k in list(previous_insights.keys())[:3]}
-    else:
-        prev_preview = {}
+        return {k: (str(previous_insights.get(k))[:180]) for k in list(previous_insights.keys())[:3]}
+    return {}
+
+# Context for the insights prompt. Stages without a path between them run
+# concurrently: the MongoDB alternatives, post matching and digi_data load
+# overlap instead of adding up.
+_insights_pipeline = (
+    Pipeline(inputs=["user_id"])
+    # the user's current state, straight from memory
+    .stage("userInfo", load_user_info, ["user_id"])
+    .stage("mealLog", load_meal_log, ["user_id"])
+    .stage("environmentContext", load_environment_context, ["user_id"])
+    .stage("previous_insights", load_previous_insights, ["user_id"])
+    # pymongo is blocking, keep it off the event loop
+    .stage("mongoReasoning", mongo_db_alternatives_block, ["mealLog", "userInfo", "user_id"], thread=True)
+    .stage("digi_data", load_digi_data, thread=True)
+    .stage("matches", _match_posts, ["mealLog", "userInfo"], thread=True)
+    .stage("context", build_context_summary, ["matches", "digi_data", "previous_insights"])
+    .stage("combined_context_str", lambda context, digi_data: build_combined_context(context[0], digi_data), ["context", "digi_data"])
+    .stage("meal_items_list", build_meal_items_list, ["mealLog"])
+    .stage("digi_preview", _digi_preview, ["digi_data"])
+    .stage("prev_preview", _prev_preview, ["previous_insights"])
+)
 
-    # Build combined context
-    combined_context_lines = []
-    for i, line in enumerate(context_summary[:6]):
-        combined_context_lines.append(f"FD[{i+1}]: {line}")
+# Stage timings of the last insights run (see /nudging/insights/timings)
+insightStageTimings = {}
+
+def load_insight_stage_timings():
+    return insightStageTimings
+
+def _record_insight_timings(timings, started):
+    global insightStageTimings
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    insightStageTimings = timings
 
-    if digi_data:
-        try:
-            if isinstance(digi_data, dict):
-                keys = list(digi_data.keys())[:4]
-                for k in keys:
-                    v = str(digi_data.get(k))[:140].replace('\n', ' ')
-                    combined_context_lines.append(f"DD:{k} -> {v}")
-            elif isinstance(digi_data, list):
-                for idx, item in enumerate(digi_data[:4]):
-                    item_str = str(item)[:140].replace('\n', ' ')
-                    combined_context_lines.append(f"DD_ITEM[{idx+1}]: {item_str}")
-            else:
-                preview_str = str(digi_data)[:180].replace('\n', ' ')
-                combined_context_lines.append(f"DD_PREVIEW: {preview_str}")
-        except Exception:
-            combined_context_lines.append("DD_PREVIEW: (could not extract detailed preview)")
 
-    combined_context_str = "CONTEXT_WEIGHTING: food_data=60,digi_data=40\n" + "\n".join(combined_context_lines)
+async def _build_insights_prompt(user_id):
+    """(system_instruction, contents, meal items, stage timings) for the insights call."""
+    ctx, stage_timings = await _insights_pipeline.run(user_id=user_id)
+    userInfo = ctx["userInfo"]
+    mealLog = ctx["mealLog"]
+    environmentContext = ctx["environmentContext"]
+    mongoReasoning = ctx["mongoReasoning"]
+    context_summary, substitutions_from_posts = ctx["context"]
+    meal_items_list = ctx["meal_items_list"]
+    digi_preview = ctx["digi_preview"]
+    prev_preview = ctx["prev_preview"]
+    combined_context_str = ctx["combined_context_str"]
 
     # LLM generation
     system_instruction = (
@@ -1265,166 +885,248 @@ def generate_insights():
         "Return ONLY the JSON object. Keep each string reasonably short (approx 3-4 lines for string fields, 4-5 short strings for general_summary).\n\n"
         "SYSTEM_INSTRUCTION: " + json.dumps({"userInfo": userInfo, "mealLog": mealLog, "environmentContext": environmentContext, "digi_data_preview": digi_preview, "previous_insights": prev_preview}) + "\n\n"
     )
+    return system_instruction, contents, meal_items_list, stage_timings
 
-    try:
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction
-            ),
-            contents=contents
-        )
 
-        raw = (response.text or "")
-        logger.info("Insights generated successfully")
-        insights = None
-        try:
-            insights = json.loads(raw)
-        except Exception:
-            import re
-            m = re.search(r"(\{.*\})", raw, re.S)
-            if m:
-                try:
-                    insights = json.loads(m.group(1))
-                except Exception:
-                    insights = {"error": "could not parse extracted JSON", "raw": raw}
-            else:
-                insights = {"error": "no json found in model output", "raw": raw}
-
-        # Post-process simple_swap to ensure one entry per food item
-        if insights and isinstance(insights, dict) and 'simple_swap' in insights and isinstance(insights['simple_swap'], list):
-            existing_swaps = {(s.get('mealType'), s.get('current')): s for s in insights['simple_swap']}
-            new_swaps = []
-            for item in meal_items_list:
-                key = (item['mealType'], item['current'])
-                if key in existing_swaps:
-                    new_swaps.append(existing_swaps[key])
-                else:
-                    new_swaps.append({
-                        'mealType': item['mealType'],
-                        'current': item['current'],
-                        'alternative': item['current'],
-                        'reasoning': 'No swap needed; this food aligns well with your goals.'
-                    })
-            insights['simple_swap'] = new_swaps
-
-        # Post-process: ensure each simple_swap item has a hasRecipe boolean
-        def _augment_simple_swap_with_has_recipe(obj):
-            """Use the LLM to decide hasRecipe for each simple_swap entry, fallback to heuristics on failure."""
+def _parse_insights(raw):
+    insights = None
+    try:
+        insights = json.loads(raw)
+    except Exception:
+        m = re.search(r"(\{.*\})", raw, re.S)
+        if m:
             try:
-                swaps = obj.get('simple_swap') if isinstance(obj, dict) else None
-                if not swaps or not isinstance(swaps, list):
-                    return
-
-                # Prepare alternatives list for the model
-                alternatives = []
-                for s in swaps:
-                    alt = s.get('alternative') if isinstance(s, dict) else None
-                    if alt is None:
-                        alternatives.append("")
-                    else:
-                        alternatives.append(str(alt))
-
-                # LLM prompt: ask to return a JSON array with index and hasRecipe boolean
-                system_prompt = (
-                    "You are a utility that classifies whether a suggested food alternative "
-                    "is something that typically has a home-cookable recipe (hasRecipe=true) "
-                    "or is usually a prepared/ordered-from-vendor/restaurant item (hasRecipe=false). "
-                    "Return ONLY a JSON array of objects with fields: index (int), alternative (string), hasRecipe (true|false), reason (short string). "
-                    "Be concise. Use common-sense knowledge about Indian and street foods."
-                )
+                insights = json.loads(m.group(1))
+            except Exception:
+                insights = {"error": "could not parse extracted JSON", "raw": raw}
+        else:
+            insights = {"error": "no json found in model output", "raw": raw}
+    return insights
+
+
+def _one_swap_per_item(swaps, meal_items_list):
+    """Ensure one simple_swap entry per logged food item."""
+    existing_swaps = {(s.get('mealType'), s.get('current')): s for s in swaps if isinstance(s, dict)}
+    new_swaps = []
+    for item in meal_items_list:
+        key = (item['mealType'], item['current'])
+        if key in existing_swaps:
+            new_swaps.append(existing_swaps[key])
+        else:
+            new_swaps.append({
+                'mealType': item['mealType'],
+                'current': item['current'],
+                'alternative': item['current'],
+                'reasoning': 'No swap needed; this food aligns well with your goals.'
+            })
+    return new_swaps
 
-                contents_prompt = "\n".join([f"[{i}] {a}" for i, a in enumerate(alternatives)])
 
-                model_result = None
+async def _augment_simple_swap_with_has_recipe(obj):
+    """
+    Set hasRecipe (and tags) on each simple_swap entry. recipe_classifier
+    decides locally; only entries it is unsure of go to the LLM, in one call,
+    and keep the local guess if that call fails.
+    """
+    try:
+        swaps = obj.get('simple_swap') if isinstance(obj, dict) else None
+        if not swaps or not isinstance(swaps, list):
+            return
+
+        alternatives = []
+        for s in swaps:
+            alt = s.get('alternative') if isinstance(s, dict) else None
+            alternatives.append("" if alt is None else str(alt))
+
+        decisions = [recipe_classifier.classify(alt) for alt in alternatives]
+        unsure = [i for i, d in enumerate(decisions) if d.confidence < recipe_classifier.HAS_RECIPE_MIN_CONFIDENCE]
+
+        model_result = None
+        if unsure:
+            # LLM prompt: ask to return a JSON array with index and hasRecipe boolean
+            system_prompt = (
+                "You are a utility that classifies whether a suggested food alternative "
+                "is something that typically has a home-cookable recipe (hasRecipe=true) "
+                "or is usually a prepared/ordered-from-vendor/restaurant item (hasRecipe=false). "
+                "Return ONLY a JSON array of objects with fields: index (int), alternative (string), hasRecipe (true|false), reason (short string). "
+                "Be concise. Use common-sense knowledge about Indian and street foods."
+            )
+
+            contents_prompt = "\n".join([f"[{i}] {alternatives[i]}" for i in unsure])
+
+            try:
+                resp = await llm_gateway.generate(
+                    contents_prompt,
+                    model="models/gemini-2.5-flash",
+                    system_instruction=system_prompt,
+                    api_key_env=GEMINI_KEY_ENV,
+                    label="nudging.has_recipe",
+                )
+                raw_text = resp.text or ""
                 try:
-                    resp = client.models.generate_content(
-                        model="models/gemini-2.5-flash",
-                        config=types.GenerateContentConfig(system_instruction=system_prompt),
-                        contents=contents_prompt
-                    )
-                    raw_text = resp.text or ""
-                    try:
-                        model_result = json.loads(raw_text)
-                    except Exception:
-                        import re
-                        m = re.search(r"(\[\s*\{.*\}\s*\])", raw_text, re.S)
-                        if m:
-                            try:
-                                model_result = json.loads(m.group(1))
-                            except Exception:
-                                model_result = None
+                    model_result = json.loads(raw_text)
                 except Exception:
-                    model_result = None
-
-                # Fallback heuristics in case LLM fails or returns unexpected output
-                restaurant_indicators = [
-                    'order', 'ordered', 'restaurant', 'stall', 'vendor', 'takeaway', 'delivery',
-                    'zomato', 'swiggy', 'street', 'food court', 'fast food', 'canteen', 'mess'
-                ]
-                home_keywords = [
-                    'dal', 'sabzi', 'curry', 'roti', 'paratha', 'rice', 'khichdi', 'idli', 'dosa',
-                    'sandwich', 'omelette', 'egg', 'paneer', 'salad', 'smoothie', 'porridge',
-                    'upma', 'poha', 'pulao', 'kheer', 'bhaji', 'stew', 'stir fry', 'lentil',
-                    'beans', 'vegetable', 'sabji', 'chapati', 'soup', 'pickle'
-                ]
-
-                if isinstance(model_result, list) and all(isinstance(i, dict) for i in model_result):
-                    # map results by index
-                    for item in model_result:
-                        try:
-                            idx = int(item.get('index'))
-                            if 0 <= idx < len(swaps):
-                                swaps[idx]['hasRecipe'] = bool(item.get('hasRecipe'))
-                                # preserve a short reason if provided
-                                if 'reason' in item and item.get('reason'):
-                                    swaps[idx]['hasRecipeReason'] = str(item.get('reason'))
-                                # Generate tags if hasRecipe is true
-                                if swaps[idx]['hasRecipe']:
-                                    alt = swaps[idx].get('alternative', '')
-                                    swaps[idx]['tags'] = generate_tags(alt)
-                        except Exception:
-                            continue
-                else:
-                    # apply heuristics per alternative
-                    for i, s in enumerate(swaps):
+                    m = re.search(r"(\[\s*\{.*\}\s*\])", raw_text, re.S)
+                    if m:
                         try:
-                            alt = s.get('alternative') or ''
-                            alt_l = str(alt).lower()
-                            has_recipe = True
-                            if any(ind in alt_l for ind in restaurant_indicators):
-                                has_recipe = False
-                            elif any(hk in alt_l for hk in home_keywords):
-                                has_recipe = True
-                            else:
-                                tokens = [t for t in alt_l.split() if t]
-                                if len(tokens) <= 1:
-                                    single = tokens[0] if tokens else ''
-                                    has_recipe = bool(single and any(k in single for k in home_keywords))
-                                else:
-                                    has_recipe = True
-                            s['hasRecipe'] = has_recipe
-                            # Generate tags if hasRecipe is true
-                            if s['hasRecipe']:
-                                s['tags'] = generate_tags(alt)
+                            model_result = json.loads(m.group(1))
                         except Exception:
-                            s['hasRecipe'] = True
-                            # Generate tags since defaulting to hasRecipe=True
-                            alt = s.get('alternative', '')
-                            s['tags'] = generate_tags(alt)
+                            model_result = None
             except Exception:
-                # don't let augmentation break the main flow
-                return
+                model_result = None
+
+        from_model = {}
+        if isinstance(model_result, list):
+            for item in model_result:
+                try:
+                    idx = int(item.get('index'))
+                    if idx in unsure:
+                        from_model[idx] = item
+                except Exception:
+                    continue
+
+        for i, s in enumerate(swaps):
+            if not isinstance(s, dict):
+                continue
+            item = from_model.get(i)
+            if item is not None:
+                s['hasRecipe'] = bool(item.get('hasRecipe'))
+                # preserve a short reason if provided
+                if item.get('reason'):
+                    s['hasRecipeReason'] = str(item.get('reason'))
+            else:
+                s['hasRecipe'] = decisions[i].has_recipe
+                s['hasRecipeReason'] = decisions[i].reason
+            # Generate tags if hasRecipe is true
+            if s['hasRecipe']:
+                s['tags'] = generate_tags(s.get('alternative', ''))
+    except Exception:
+        # don't let augmentation break the main flow
+        return
+
+
+async def _swaps_with_has_recipe(swaps):
+    await _augment_simple_swap_with_has_recipe({"simple_swap": swaps})
+    return swaps
+
+
+async def _finish_insights(user_id, insights, meal_items_list, swaps_task=None):
+    """
+    Post-process parsed insights and save them to the user's state.
+    `swaps_task` is a _swaps_with_has_recipe task already started on the streamed simple_swap.
+    """
+    if insights and isinstance(insights, dict) and 'simple_swap' in insights and isinstance(insights['simple_swap'], list):
+        if swaps_task is not None:
+            insights['simple_swap'] = await swaps_task
+        else:
+            insights['simple_swap'] = _one_swap_per_item(insights['simple_swap'], meal_items_list)
+
+    # Post-process: ensure each simple_swap item has a hasRecipe boolean
+    if swaps_task is None:
+        await _augment_simple_swap_with_has_recipe(insights)
+
+    user_state.store.put(user_id, "insights", insights)
+    logger.info("Insights saved for %s", user_id)
+    return insights
 
-        _augment_simple_swap_with_has_recipe(insights)
 
-        out_path = os.path.join(os.path.dirname(__file__), "insights.json")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(insights, f, ensure_ascii=False, indent=2)
-        
-        logger.info("Insights saved to insights.json")
+async def generate_insights(user_id=DEFAULT_USER_ID):
+    started = time.perf_counter()
+    system_instruction, contents, meal_items_list, stage_timings = await _build_insights_prompt(user_id)
+    timings = {"user_id": user_id, "mode": "generate", "stages": stage_timings,
+               "context_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    try:
+        t = time.perf_counter()
+        response = await llm_gateway.generate(
+            contents,
+            model="models/gemini-2.5-flash",
+            system_instruction=system_instruction,
+            api_key_env=GEMINI_KEY_ENV,
+            label="nudging.insights",
+        )
+        timings["llm_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        raw = (response.text or "")
+        logger.info("Insights generated successfully")
+        t = time.perf_counter()
+        insights = await _finish_insights(user_id, _parse_insights(raw), meal_items_list)
+        timings["post_process_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        _record_insight_timings(timings, started)
         return insights
 
     except Exception as e:
         logger.error(f"Error generating insights: {e}")
         return {"error": "Failed to generate insights"}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_insights(user_id=DEFAULT_USER_ID):
+    """
+    generate_insights() as Server-Sent Events.
+
+    Each top-level key (key_insight, modern_approach, ...) is sent as a
+    `section` event as soon as the model has streamed its complete value; the
+    post-processed insights (with hasRecipe and tags) follow as `done`, after
+    a `timings` event. hasRecipe classification starts as soon as simple_swap
+    arrives, while the model is still writing general_summary. A job queued by
+    store_meal_log for this user is taken over rather than run twice.
+    """
+    job = insight_queue.claim(user_id)
+    if job is None:
+        active = insight_queue.active(user_id)
+        if active is not None:
+            # a worker is already on it: relay its result
+            await active.done.wait()
+            if active.status == "done" and isinstance(active.result, dict):
+                for key, value in active.result.items():
+                    yield _sse("section", {"key": key, "value": value})
+                yield _sse("done", active.result)
+                return
+
+    insights = None
+    error = None
+    swaps_task = None
+    started = time.perf_counter()
+    try:
+        system_instruction, contents, meal_items_list, stage_timings = await _build_insights_prompt(user_id)
+        timings = {"user_id": user_id, "mode": "stream", "stages": stage_timings,
+                   "context_ms": round((time.perf_counter() - started) * 1000, 1)}
+        t = time.perf_counter()
+        parser = PartialJSONObject()
+        async for chunk in llm_gateway.stream(
+            contents,
+            model="models/gemini-2.5-flash",
+            system_instruction=system_instruction,
+            api_key_env=GEMINI_KEY_ENV,
+            label="nudging.insights",
+        ):
+            for key, value in parser.feed(chunk):
+                if key == "simple_swap" and isinstance(value, list):
+                    value = _one_swap_per_item(value, meal_items_list)
+                    swaps_task = asyncio.ensure_future(_swaps_with_has_recipe(value))
+                if "first_section_ms" not in timings:
+                    timings["first_section_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                yield _sse("section", {"key": key, "value": value})
+        timings["llm_ms"] = round((time.perf_counter() - t) * 1000, 1)
+
+        logger.info("Insights streamed successfully")
+        t = time.perf_counter()
+        insights = await _finish_insights(user_id, _parse_insights(parser.text), meal_items_list, swaps_task)
+        timings["post_process_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        _record_insight_timings(timings, started)
+        yield _sse("timings", timings)
+        yield _sse("done", insights)
+    except Exception as e:
+        logger.error(f"Error streaming insights: {e}")
+        error = "Failed to generate insights"
+        yield _sse("error", {"error": error})
+    finally:
+        if swaps_task is not None and not swaps_task.done():
+            swaps_task.cancel()
+        if job is not None:
+            # also reached when the client disconnects mid-stream
+            insight_queue.finish(job, result=insights, error=error if insights is None else None)
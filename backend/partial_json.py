@@ -0,0 +1,66 @@
+import json
+from typing import Any, List, Tuple
+
+
+class PartialJSONObject:
+    """
+    Incremental parser for a JSON object arriving in chunks (a streamed LLM reply).
+
+    feed() returns the top-level members whose values became complete in that
+    chunk, so each section can be used before the rest of the object has been
+    generated. Text before the opening brace (a ``` fence, a preamble) is
+    skipped. Only new characters are scanned on each call.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        members = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._member_start is None:
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    members.extend(self._member(self._member_start, i))
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                members.extend(self._member(self._member_start, i))
+                self._member_start = i + 1
+            i += 1
+        self._pos = i
+        return members
+
+    def _member(self, start: int, end: int) -> List[Tuple[str, Any]]:
+        segment = self.text[start:end].strip()
+        if not segment:
+            return []
+        try:
+            return list(json.loads("{" + segment + "}").items())
+        except ValueError:
+            # leave malformed members to the caller's parse of the full text
+            return []
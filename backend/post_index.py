@@ -0,0 +1,244 @@
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Tokens this short are answered straight from the gram table; longer ones
+# intersect their trigrams and are then verified with a substring check.
+_MAX_GRAM = 3
+_SUBSTRING_CACHE_SIZE = 4096
+
+
+class _SubstringVocab:
+    """
+    Finds vocabulary words that contain a given string.
+
+    Uses an n-gram table over the vocabulary (much smaller than the corpus), so
+    "dal" also finds "dals" and "mandal" just like a substring check against the
+    full text would.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = list(words)
+        grams: Dict[str, Set[int]] = defaultdict(set)
+        for wid, word in enumerate(self.words):
+            for n in range(1, _MAX_GRAM + 1):
+                for i in range(len(word) - n + 1):
+                    grams[word[i:i + n]].add(wid)
+        self.grams = dict(grams)
+        self._cache: Dict[str, List[str]] = {}
+
+    def containing(self, token: str) -> List[str]:
+        cached = self._cache.get(token)
+        if cached is not None:
+            return cached
+        if len(token) <= _MAX_GRAM:
+            ids = self.grams.get(token, ())
+        else:
+            sets = []
+            for i in range(len(token) - _MAX_GRAM + 1):
+                ids = self.grams.get(token[i:i + _MAX_GRAM])
+                if not ids:
+                    sets = None
+                    break
+                sets.append(ids)
+            if not sets:
+                ids = ()
+            else:
+                sets.sort(key=len)
+                ids = set(sets[0]).intersection(*sets[1:])
+        words = [self.words[wid] for wid in ids if token in self.words[wid]]
+        if len(self._cache) >= _SUBSTRING_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[token] = words
+        return words
+
+
+class _Post:
+    __slots__ = ("post", "title", "description", "title_l", "desc_l", "keywords", "foods", "recs", "rec_start")
+
+    def __init__(self, post: dict, rec_start: int):
+        self.post = post
+        self.title = post.get("post_title") or ""
+        self.description = post.get("post_description") or post.get("description") or ""
+        self.title_l = self.title.lower()
+        self.desc_l = self.description.lower()
+        self.keywords = {k.lower() for k in post.get("search_keywords", []) if isinstance(k, str)}
+        self.foods = {f.lower() for f in post.get("foods", []) if isinstance(f, str)}
+        # (rec, text_l, type_l); recommendation i of this post has global id rec_start + i
+        self.recs = [
+            (rec, (rec.get("text") or "").lower(), (rec.get("type") or "").lower())
+            for rec in post.get("recommendations", []) or []
+        ]
+        self.rec_start = rec_start
+
+
+class PostIndex:
+    """
+    Term -> post and term -> recommendation index over food_data.json posts.
+
+    match() returns exactly what a linear scan (nudging.match_posts) returns,
+    but only touches posts and recommendations reachable from the query terms.
+    """
+
+    def __init__(self, posts: List[dict], source: Optional[str] = None):
+        started = time.perf_counter()
+        self.source = source
+        self.posts = []
+        rec_count = 0
+        for post in posts:
+            p = _Post(post, rec_count)
+            rec_count += len(p.recs)
+            self.posts.append(p)
+        # exact search_keywords/foods entries -> post ids
+        self.term_posts: Dict[str, List[int]] = defaultdict(list)
+        # words of title + description -> post ids
+        self.word_posts: Dict[str, List[int]] = defaultdict(list)
+        # whitespace tokens of recommendation text/type -> global recommendation ids
+        self.rec_text_tokens: Dict[str, List[int]] = defaultdict(list)
+        self.rec_type_tokens: Dict[str, List[int]] = defaultdict(list)
+        for pid, p in enumerate(self.posts):
+            for term in p.keywords | p.foods:
+                self.term_posts[term].append(pid)
+            for word in set(_WORD_RE.findall(p.title_l)) | set(_WORD_RE.findall(p.desc_l)):
+                self.word_posts[word].append(pid)
+            for gid, (_, r_text, r_type) in enumerate(p.recs, p.rec_start):
+                for tok in set(r_text.split()):
+                    self.rec_text_tokens[tok].append(gid)
+                for tok in set(r_type.split()):
+                    self.rec_type_tokens[tok].append(gid)
+        self.term_posts = dict(self.term_posts)
+        self.word_posts = dict(self.word_posts)
+        self.rec_text_tokens = dict(self.rec_text_tokens)
+        self.rec_type_tokens = dict(self.rec_type_tokens)
+        self.vocab = _SubstringVocab(self.word_posts)
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    def __len__(self):
+        return len(self.posts)
+
+    def _text_matches(self, term: str) -> Set[int]:
+        """Posts whose lowercased title or description contains `term` as a substring."""
+        tokens = _WORD_RE.findall(term)
+        if not tokens:
+            # punctuation-only or empty terms cannot be looked up by word
+            return {pid for pid, p in enumerate(self.posts) if term in p.title_l or term in p.desc_l}
+        candidates = None
+        # every alphanumeric run of the term is a substring of some word in the text
+        for tok in sorted(set(tokens), key=len, reverse=True):
+            ids = set()
+            for word in self.vocab.containing(tok):
+                ids.update(self.word_posts[word])
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        posts = self.posts
+        return {pid for pid in candidates if term in posts[pid].title_l or term in posts[pid].desc_l}
+
+    def _rec_hits(self, index: Dict[str, List[int]], terms: Set[str]) -> Set[int]:
+        hits = set()
+        for term in terms:
+            hits.update(index.get(term, ()))
+        return hits
+
+    def match(self, meal_foods: Set[str], user_terms: Set[str]) -> List[dict]:
+        """Posts matching the meal foods or profile terms, with their relevant recommendations."""
+        matched: Dict[int, Set[str]] = defaultdict(set)
+        sources: Dict[int, List[str]] = defaultdict(list)
+
+        for terms, source in ((meal_foods, "meal_foods"), (user_terms, "user_profile_terms")):
+            hit = defaultdict(set)
+            for term in terms:
+                for pid in self.term_posts.get(term, ()):
+                    hit[pid].add(term)
+            for pid, overlap in hit.items():
+                matched[pid].update(overlap)
+                sources[pid].append(source)
+
+        for term in meal_foods | user_terms:
+            for pid in self._text_matches(term):
+                matched[pid].add(term)
+                sources[pid].append("title/description")
+
+        meal_rec_hits = self._rec_hits(self.rec_text_tokens, meal_foods)
+        user_rec_hits = self._rec_hits(self.rec_text_tokens, user_terms)
+        user_type_hits = self._rec_hits(self.rec_type_tokens, user_terms)
+
+        matches = []
+        for pid in sorted(matched):
+            p = self.posts[pid]
+            matched_terms = matched[pid]
+            relevant_recs = []
+            for gid, (rec, r_text, r_type) in enumerate(p.recs, p.rec_start):
+                reasons = []
+                if gid in meal_rec_hits:
+                    reasons.append("matches_meal_food_in_text")
+                if gid in user_rec_hits:
+                    reasons.append("matches_user_term_in_text")
+                if gid in user_type_hits:
+                    reasons.append("matches_user_term_in_type")
+                if any(t in r_text for t in matched_terms) or any(t in r_type for t in matched_terms) or any(t in r_text for t in p.keywords):
+                    reasons.append("contains_matched_term")
+
+                if reasons:
+                    relevant_recs.append({
+                        "type": rec.get("type"),
+                        "text": rec.get("text"),
+                        "reasons": list(set(reasons))
+                    })
+
+            matches.append({
+                "id": p.post.get("id"),
+                "title": p.title,
+                "matched_terms": sorted(matched_terms),
+                "match_sources": sorted(set(sources[pid])),
+                "title_snippet": p.title[:160],
+                "description_snippet": p.description[:240],
+                "relevant_recommendations": relevant_recs,
+                "all_recommendations_count": len(p.recs)
+            })
+        return matches
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "posts": len(self.posts),
+            "terms": len(self.term_posts),
+            "words": len(self.word_posts),
+            "recommendation_tokens": len(self.rec_text_tokens),
+            "build_ms": round(self.build_ms, 1),
+        }
+
+
+_indexes: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def get_post_index(path: str, loader) -> Optional[PostIndex]:
+    """
+    The PostIndex for a posts file, rebuilt only when the file's mtime changes.
+
+    `loader(path)` returns the parsed list of posts (nudging passes its cached
+    JSON loader so the file is parsed once for both uses).
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _indexes.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        posts = loader(path)
+        if not isinstance(posts, list):
+            return None
+        index = PostIndex(posts, source=path)
+        _indexes[path] = (mtime, index)
+    return index
@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
+
+from dotenv import load_dotenv
+
+import keyword_classifier
+import recipe_corpus
+from recipe_corpus import RECIPES_FILE
+from text_index import tokenize
+
+load_dotenv()
+
+# Local decisions below this confidence are sent to the LLM in one batched call
+HAS_RECIPE_MIN_CONFIDENCE = float(os.getenv("HAS_RECIPE_MIN_CONFIDENCE", "0.6"))
+
+# Words in recipe names and suggestions that say nothing about the dish
+_STOPWORDS = {
+    "a", "an", "and", "or", "the", "of", "in", "with", "without", "for", "to", "on", "at", "by",
+    "recipe", "style", "hindi", "homemade", "healthy", "easy", "quick", "simple", "made",
+    "using", "available", "e", "g", "eg", "some", "more", "less", "extra", "light", "small",
+}
+_PAREN_RE = re.compile(r"\([^)]*\)")
+
+
+class Decision(NamedTuple):
+    has_recipe: bool
+    confidence: float
+    reason: str
+
+
+def _content_tokens(text) -> List[str]:
+    return [t for t in tokenize(text) if t not in _STOPWORDS and not t.isdigit()]
+
+
+def dish_name(recipe_name: str) -> str:
+    """'Spicy Tomato Rice (Recipe) - Andhra Style' -> 'spicy tomato rice'"""
+    name = _PAREN_RE.sub(" ", recipe_name or "").split(" - ")[0]
+    return " ".join(_content_tokens(name))
+
+
+class HasRecipeClassifier:
+    """
+    Decides locally whether a suggested alternative is home-cookable.
+
+    A suggestion whose words all occur in one recipe's name and tags matches
+    that recipe; otherwise the restaurant/home_cookable keyword lists and the
+    share of its words found anywhere in the recipe corpus (names, tags,
+    ingredients) decide, each with a confidence. Suggestions nothing vouches
+    for get the old keyword fallback's guess at low confidence, for the caller
+    to confirm with the LLM.
+    """
+
+    def __init__(self, recipes: Sequence[dict]):
+        self.names: List[str] = []
+        self.recipe_tokens: List[Set[str]] = []
+        self.token_recipes: Dict[str, Set[int]] = {}
+        self.vocab: Set[str] = set()
+        for recipe in recipes:
+            name = recipe.get("TranslatedRecipeName") or ""
+            tokens = set(_content_tokens(dish_name(name))) | set(_content_tokens(recipe.get("tags")))
+            if not tokens:
+                continue
+            rid = len(self.names)
+            self.names.append(dish_name(name) or name)
+            self.recipe_tokens.append(tokens)
+            for tok in tokens:
+                self.token_recipes.setdefault(tok, set()).add(rid)
+            self.vocab |= tokens
+            self.vocab.update(_content_tokens(recipe.get("Cleaned-Ingredients")))
+        for word in keyword_classifier.CATEGORIES["home_cookable"]:
+            self.vocab.update(_content_tokens(word))
+
+    def _matching_recipe(self, tokens: List[str]) -> Optional[str]:
+        ids = None
+        for tok in tokens:
+            found = self.token_recipes.get(tok)
+            if not found:
+                return None
+            ids = set(found) if ids is None else ids & found
+            if not ids:
+                return None
+        return self.names[min(ids)] if ids else None
+
+    def classify(self, alternative) -> Decision:
+        text = str(alternative or "").lower()
+        tokens = _content_tokens(text)
+        if not tokens:
+            return Decision(False, 0.9, "no dish named")
+        if keyword_classifier.matches("restaurant", text):
+            return Decision(False, 0.9, "usually ordered or bought")
+        recipe = self._matching_recipe(tokens)
+        if recipe:
+            return Decision(True, 0.95, f"matches the recipe '{recipe}'")
+        if keyword_classifier.matches("home_cookable", text):
+            return Decision(True, 0.85, "a home-cooked dish type")
+        coverage = sum(1 for t in tokens if t in self.vocab) / len(tokens)
+        if coverage >= 0.5:
+            return Decision(True, round(0.5 + 0.4 * coverage, 2), "made from common recipe ingredients")
+        # nothing vouches for it: the old keyword fallback's guess
+        return Decision(len(tokens) > 1, 0.3, "unrecognised dish")
+
+
+_cached = None
+_lock = threading.Lock()
+
+
+def get_classifier() -> HasRecipeClassifier:
+    """The classifier over the shared recipes1.json corpus, rebuilt when the corpus is reloaded."""
+    global _cached
+    try:
+        corpus = recipe_corpus.get_corpus(RECIPES_FILE)
+    except ValueError:
+        corpus = None
+    cached = _cached
+    if cached is not None and cached[0] is corpus:
+        return cached[1]
+    with _lock:
+        if _cached is not None and _cached[0] is corpus:
+            return _cached[1]
+        classifier = HasRecipeClassifier(corpus if corpus is not None else [])
+        _cached = (corpus, classifier)
+    return classifier
+
+
+def classify(alternative) -> Decision:
+    return get_classifier().classify(alternative)
@@ -0,0 +1,260 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), "recipes1.json")
+# Long text read only for a few recipes at a time; kept zlib-compressed and
+# decompressed on access. Level 1: compressing happens for every recipe on
+# load and higher levels barely shrink short texts further
+COMPRESSED_FIELDS = ("TranslatedInstructions",)
+_COMPRESS_LEVEL = 1
+# Strings up to this length are interned (names, cuisines, tags repeat a lot)
+_INTERN_MAX_LEN = 64
+
+_MISSING = object()
+_WS_RE = re.compile(r"\s*")
+
+
+def _pack(key: str, value):
+    if isinstance(value, str):
+        if key in COMPRESSED_FIELDS:
+            return zlib.compress(value.encode("utf-8"), _COMPRESS_LEVEL)
+        return sys.intern(value) if len(value) <= _INTERN_MAX_LEN else value
+    if isinstance(value, list):
+        return tuple(sys.intern(v) if isinstance(v, str) and len(v) <= _INTERN_MAX_LEN else v for v in value)
+    return value
+
+
+def _unpack(value):
+    # JSON never yields bytes or tuples, so they can only be packed values
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _compact(column: list):
+    """An array for all-integer columns, else the list."""
+    if all(type(v) is int for v in column):
+        try:
+            return array("q", column)
+        except OverflowError:
+            pass
+    return column
+
+
+class Recipe(Mapping):
+    """Read-only dict-like view of one recipe in a RecipeCorpus."""
+
+    __slots__ = ("corpus", "position")
+
+    def __init__(self, corpus: "RecipeCorpus", position: int):
+        self.corpus = corpus
+        self.position = position
+
+    def __getitem__(self, key):
+        value = self.corpus.value(self.position, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        return self.corpus.value(self.position, key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        columns = self.corpus._columns
+        return (key for key in self.corpus.fields if columns[key][self.position] is not _MISSING)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, Recipe):
+            return self.corpus is other.corpus and self.position == other.position
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self.corpus), self.position))
+
+    @property
+    def id(self) -> str:
+        """The recipe's own "id", else "recipe_<position>"."""
+        return self.get("id") or f"recipe_{self.position}"
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """A plain dict of the recipe (only `fields` when given), in file field order."""
+        keys = self.corpus.fields if fields is None else [f for f in fields if f in self.corpus._columns]
+        out = {}
+        for key in keys:
+            value = self.corpus.value(self.position, key, _MISSING)
+            if value is not _MISSING:
+                out[key] = value
+        return out
+
+
+class RecipeCorpus:
+    """
+    recipes1.json held column by column instead of as one dict per recipe.
+
+    Each field is a column: integer fields are arrays, short strings and tag
+    lists are interned (tuples of shared strings), and COMPRESSED_FIELDS are
+    zlib-compressed bytes decompressed only when read. corpus[i] is a Recipe
+    view that reads like the original dict (.get, [], iteration), so code
+    written against the JSON list works unchanged, and to_dict() copies one
+    out for a response. Like the JSON list, the corpus is never mutated.
+
+    `version` identifies the file contents it was loaded from (mtime and
+    size) and `modified` is the file's mtime, for HTTP validators.
+    """
+
+    def __init__(self, recipes: Iterable[dict], source: str = "memory", version: str = "",
+                 modified: Optional[float] = None):
+        started = time.perf_counter()
+        self.source = source
+        self.version = version
+        self.modified = modified
+        self._positions: Optional[Dict[str, int]] = None
+        self.fields: List[str] = []
+        columns: Dict[str, list] = {}
+        count = 0
+        for recipe in recipes:
+            for key, value in recipe.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [_MISSING] * count
+                    self.fields.append(key)
+                column.append(_pack(key, value))
+            count += 1
+            for column in columns.values():
+                if len(column) < count:
+                    column.append(_MISSING)
+        self._columns = {key: _compact(column) for key, column in columns.items()}
+        self._count = count
+        self.load_ms = (time.perf_counter() - started) * 1000
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position: int) -> Recipe:
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("recipe index out of range")
+        return Recipe(self, position)
+
+    def __iter__(self) -> Iterator[Recipe]:
+        return (Recipe(self, i) for i in range(self._count))
+
+    def position_of(self, recipe_id: str) -> Optional[int]:
+        """Position of the recipe whose Recipe.id is `recipe_id`, or None."""
+        positions = self._positions
+        if positions is None:
+            positions = {recipe.id: recipe.position for recipe in self}
+            self._positions = positions
+        return positions.get(recipe_id)
+
+    def value(self, position: int, key: str, default=None):
+        column = self._columns.get(key)
+        if column is None:
+            return default
+        value = column[position]
+        return default if value is _MISSING else _unpack(value)
+
+    def column(self, key: str) -> list:
+        """Every recipe's value for one field (None where missing)."""
+        column = self._columns.get(key)
+        if column is None:
+            return [None] * self._count
+        return [None if v is _MISSING else _unpack(v) for v in column]
+
+    def stats(self) -> dict:
+        compressed = sum(
+            len(v) for key in COMPRESSED_FIELDS for v in self._columns.get(key, []) if isinstance(v, bytes)
+        )
+        return {
+            "source": self.source,
+            "version": self.version,
+            "recipes": self._count,
+            "fields": list(self.fields),
+            "compressed_bytes": compressed,
+            "load_ms": round(self.load_ms, 1),
+        }
+
+
+def read_recipes(path: str = RECIPES_FILE) -> List[dict]:
+    """
+    The recipe dicts in a recipes file: a list, {"recipes": [...]}, or a single
+    recipe object. Raises OSError / ValueError when it can't be read.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and "recipes" in data:
+        return data["recipes"]
+    return [data]
+
+
+def iter_recipes(path: str = RECIPES_FILE) -> Iterator[dict]:
+    """
+    read_recipes() one recipe at a time: a top-level list is decoded element
+    by element, so only one recipe dict is alive while a corpus is built
+    from it. Raises OSError / ValueError when the file can't be read.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    pos = _WS_RE.match(text).end()
+    if not text.startswith("[", pos):
+        yield from read_recipes(path)
+        return
+    decoder = json.JSONDecoder()
+    pos = _WS_RE.match(text, pos + 1).end()
+    if text.startswith("]", pos):
+        return
+    while True:
+        recipe, pos = decoder.raw_decode(text, pos)
+        yield recipe
+        pos = _WS_RE.match(text, pos).end()
+        if text.startswith(",", pos):
+            pos = _WS_RE.match(text, pos + 1).end()
+        elif text.startswith("]", pos):
+            return
+        else:
+            raise ValueError(f"Expecting ',' or ']' at char {pos} of {path}")
+
+
+_corpora: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def get_corpus(path: str = RECIPES_FILE) -> Optional[RecipeCorpus]:
+    """
+    The RecipeCorpus for a recipes file, loaded once per version of the file
+    (mtime). None when the file does not exist; ValueError when it is not
+    valid JSON.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    mtime = stat.st_mtime
+    cached = _corpora.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _corpora.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        corpus = RecipeCorpus(iter_recipes(path), source=path, version=version, modified=mtime)
+        _corpora[path] = (mtime, corpus)
+        print(f"✅ Loaded {len(corpus)} recipes from {os.path.basename(path)} in {corpus.load_ms:.0f} ms")
+    return corpus
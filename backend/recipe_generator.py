@@ -1,16 +1,37 @@
+import asyncio
 import os
 import json
 import re
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google import genai
-from google.genai import types
+
+import availability
+import llm_gateway
+import recipe_corpus
+import recipe_index
+import recipe_relevance
+import user_state
+from availability import INGREDIENT_MAPPINGS
 
 # Load env vars
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY_1")
+API_KEY_ENV = "GEMINI_API_KEY_1"
+api_key = os.getenv(API_KEY_ENV)
+# Recipes generated at once per batch request (each is a verification and a generation call)
+RECIPE_GEN_CONCURRENCY = int(os.getenv("RECIPE_GEN_CONCURRENCY", "4"))
+RECIPE_BATCH_MAX = int(os.getenv("RECIPE_BATCH_MAX", "20"))
+VERIFY_MODEL = "models/gemini-2.5-flash-lite"
+GENERATE_MODEL = "models/gemini-2.5-flash"
+
+router = APIRouter()
 
+# Example request, used when the module is run as a script
 # Input object: recipe name and tags (tags are derived from the recipe name, avoid basic commodities)
 input_recipe = {
     "recipeName": "Chicken Biryani",
@@ -60,37 +81,6 @@ environmentContext = {
     "cultural_event": "local_fairs_and_meets"
 }
 
-# Ingredient mapping for consistent matching
-INGREDIENT_MAPPINGS = {
-    # Available ingredients and their synonyms/variations
-    "rice": ["rice", "basmati rice", "white rice", "cooked rice"],
-    "dal": ["dal", "lentils", "toor dal", "moong dal", "masoor dal", "chana dal"],
-    "chapati_flour": ["chapati flour", "wheat flour", "atta", "flour", "whole wheat flour"],
-    "basic_spices": ["basic spices", "spices", "turmeric", "cumin", "coriander", "garam masala", 
-                    "red chili powder", "cumin powder", "coriander powder", "spice powder", "masala"],
-    "curd": ["curd", "yogurt", "dahi", "greek yogurt", "hung curd"],
-    "banana": ["banana", "bananas", "ripe banana"],
-    "roasted_chana": ["roasted chana", "chana", "chickpeas", "roasted chickpeas", "bhuna chana"],
-    "cooking_oil": ["cooking oil", "oil", "vegetable oil", "sunflower oil", "mustard oil", "ghee"],
-    # Categories that can include multiple items
-    "seasonal_vegetables": ["onion", "onions", "tomato", "tomatoes", "bell pepper", "capsicum", 
-                           "cauliflower", "cabbage", "carrots", "beans", "spinach", "seasonal vegetables", "vegetables"],
-    "basic_aromatics": ["ginger", "garlic", "green chili", "curry leaves"],
-    "common_condiments": ["lemon juice", "lime juice", "salt", "sugar"],
-}
-
-# If the API key is not set, write the prompt locally and exit so the script is safe to run without credentials.
-if not api_key:
-    prompt_obj = {"input_recipe": input_recipe}
-    with open("prompt.json", "w", encoding="utf-8") as f:
-        json.dump(prompt_obj, f, indent=2, ensure_ascii=False)
-    print("No GEMINI_API_KEY found in environment. Wrote prompt object to prompt.json and exiting.")
-    import sys
-    sys.exit(0)
-
-client = genai.Client(api_key=api_key)
-
-
 # ---------- Pydantic Schemas (all fields required) ----------
 class Ingredient(BaseModel):
     name: str
@@ -150,31 +140,21 @@ class IngredientAnalysis(BaseModel):
 
 # ---------- Generate Recipe ----------
 # Build a prompt that includes the input object so the model can use the provided recipe name and tags.
-def load_recipes(path="recipes1.json"):
+def load_recipes(path=recipe_corpus.RECIPES_FILE):
+    """The shared RecipeCorpus for a recipes file (recipe_corpus.py); empty when it can't be read."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
+        return recipe_corpus.get_corpus(path) or []
+    except ValueError:
         return []
 
 
-def find_matches(tags, recipes, top_k=3):
-    tags_lc = [t.lower() for t in tags]
-    candidates = []
-    for r in recipes:
-        score = 0
-        text_fields = []
-        for key in ("TranslatedRecipeName", "Cleaned-Ingredients", "TranslatedIngredients"):
-            val = r.get(key, "") or ""
-            text_fields.append(val)
-            val_lc = val.lower()
-            for t in tags_lc:
-                if t in val_lc:
-                    score += 1
-        if score > 0:
-            candidates.append({"score": score, "recipe": r, "snippet": " ".join(text_fields)[:800]})
-    candidates.sort(key=lambda x: x["score"], reverse=True)
-    return candidates[:top_k]
+def find_matches(tags, recipes=None, top_k=3):
+    """Top recipes for the tags, looked up in the recipe index (recipe_index.py)."""
+    if recipes is None:
+        index = recipe_index.get_recipe_index()
+    else:
+        index = recipe_index.RecipeIndex(recipes)
+    return index.find_matches(tags, top_k) if index is not None else []
 
 
 def check_ingredient_availability(ingredient_name: str, available_items: List[str], mappings: dict) -> tuple[bool, str]:
@@ -182,148 +162,58 @@ def check_ingredient_availability(ingredient_name: str, available_items: List[st
     Consistently check if an ingredient is available using predefined mappings.
     Returns (is_available, matched_category).
     """
-    ingredient_lower = ingredient_name.lower().strip()
-    
-    # Direct match in available items
-    available_lower = [item.lower() for item in available_items]
-    if ingredient_lower in available_lower:
-        return True, ingredient_lower
-    
-    # Check if ingredient matches available items through mappings
-    for available_item in available_items:
-        available_item_lower = available_item.lower()
-        if available_item_lower in mappings:
-            synonyms = mappings[available_item_lower]
-            for synonym in synonyms:
-                if synonym.lower() == ingredient_lower or ingredient_lower in synonym.lower() or synonym.lower() in ingredient_lower:
-                    return True, available_item_lower
-    
-    # Special cases for common variations
-    if any(word in ingredient_lower for word in ['powder', 'paste']) and 'basic_spices' in available_lower:
-        return True, 'basic_spices'
-    
-    # Check if ingredient is a basic essential (always available)
-    basic_essentials = ['water', 'salt']
-    if ingredient_lower in basic_essentials:
-        return True, 'basic_essential'
-    
-    return False, ""
+    return availability.engine_for(mappings).pantry(available_items).check(ingredient_name)
 
 
 def get_consistent_ingredients_to_buy(recipe_ingredients: List[dict], available_items: List[str]) -> List[str]:
     """
     Consistently determine which ingredients need to be bought using deterministic logic.
     """
-    ingredients_to_buy = []
-    
     print(f"  📋 Analyzing {len(recipe_ingredients)} recipe ingredients against {len(available_items)} available items")
-    
-    for ingredient in recipe_ingredients:
-        # Extract ingredient name from different possible formats
-        ingredient_name = ""
-        if isinstance(ingredient, dict):
-            ingredient_name = (ingredient.get("name") or 
-                             ingredient.get("ingredient") or 
-                             ingredient.get("ingredientName") or 
-                             ingredient.get("ingredient_name") or
-                             ingredient.get("item") or "").strip()
-        elif isinstance(ingredient, str):
-            ingredient_name = ingredient.strip()
-        
-        if not ingredient_name:
-            continue
-            
-        # Clean ingredient name (remove quantities, parentheses, etc.)
-        original_name = ingredient_name
-        ingredient_name = re.sub(r'\([^)]*\)', '', ingredient_name)  # Remove parentheses
-        ingredient_name = re.sub(r'\d+.*?(tsp|tbsp|cup|g|kg|ml|l|inch|clove|piece)s?\b', '', ingredient_name, flags=re.IGNORECASE)
-        ingredient_name = ingredient_name.strip()
-        
-        is_available, matched_category = check_ingredient_availability(ingredient_name, available_items, INGREDIENT_MAPPINGS)
-        
-        if not is_available:
-            # Standardize the name for consistency
-            standardized_name = ingredient_name.title()
-            if standardized_name not in ingredients_to_buy:
-                ingredients_to_buy.append(standardized_name)
-                
-        status_icon = "✅ Available" if is_available else "❌ Need to buy"
-        match_info = f" (matches: {matched_category})" if matched_category else ""
-        print(f"    {status_icon}: '{original_name}' -> '{ingredient_name}'{match_info}")
-    
-    # Sort for consistency
-    ingredients_to_buy.sort()
+
+    ingredients_to_buy, results = availability.engine.pantry(available_items).shopping_list(recipe_ingredients)
+    for r in results:
+        status_icon = "✅ Available" if r["available"] else "❌ Need to buy"
+        match_info = f" (matches: {r['matched']})" if r["matched"] else ""
+        print(f"    {status_icon}: '{r['ingredient']}' -> '{r['name']}'{match_info}")
+
     print(f"  🛒 Final shopping list: {ingredients_to_buy}")
     return ingredients_to_buy
 
 
-# Load recipes and find candidates
-recipes = load_recipes()
-candidates = find_matches(input_recipe.get("tags", []), recipes)
+VERIFY_SYSTEM_INSTRUCTION = "You will be given an input_recipe (with tags) and a list of candidate recipes. Decide whether the candidates match the search intent. Return JSON exactly matching the schema: {match: bool, use_context: bool, reason: str}."
+GENERATE_SYSTEM_INSTRUCTION = "Generate a recipe in the given schema, centered around the user's available ingredients. Prioritize using available items, considering synonyms and categories. Be deterministic and consistent in ingredient selection. Populate ingredients_to_buy only with absolutely essential items not available."
 
-# Prepare a verification prompt for the LLM to decide if the candidates match intent
-summaries = []
-for c in candidates:
-    r = c["recipe"]
-    summaries.append({
-        "name": r.get("TranslatedRecipeName"),
-        "cleaned_ingredients": r.get("Cleaned-Ingredients"),
-        "instructions": (r.get("TranslatedInstructions") or "")[:1000]
-    })
 
-verification_prompt = {
-    "input_recipe": input_recipe,
-    "candidates": summaries
-}
+def build_verification_prompt(input_recipe: dict, candidates: List[dict]) -> str:
+    """The input recipe and a summary of each candidate, for the verification call."""
+    summaries = []
+    for c in candidates:
+        r = c["recipe"]
+        summaries.append({
+            "name": r.get("TranslatedRecipeName"),
+            "cleaned_ingredients": r.get("Cleaned-Ingredients"),
+            "instructions": (r.get("TranslatedInstructions") or "")[:1000]
+        })
+    return json.dumps({"input_recipe": input_recipe, "candidates": summaries}, ensure_ascii=False)
 
-# Ask the model to verify whether the candidates satisfy the search intent (return JSON matching Verification schema)
-verif_resp = client.models.generate_content(
-    model="models/gemini-2.5-flash-lite",
-    config=types.GenerateContentConfig(
-        system_instruction="You will be given an input_recipe (with tags) and a list of candidate recipes. Decide whether the candidates match the search intent. Return JSON exactly matching the schema: {match: bool, use_context: bool, reason: str}.",
-        response_schema=Verification
-    ),
-    contents=json.dumps(verification_prompt, ensure_ascii=False)
-)
-
-use_context = False
-verified = None
-if hasattr(verif_resp, "parsed") and verif_resp.parsed is not None:
-    verified: Verification = verif_resp.parsed
-    use_context = bool(verified.match and verified.use_context)
-else:
-    # If verification failed or couldn't parse, fall back to using context only if we have candidates
-    use_context = len(candidates) > 0
-
-if use_context:
-    # Print a console.log style message as requested
-    print('console.log: using context from recipes1.json')
-    # Attach top candidate as context
-    context = candidates[0]["recipe"]
-    prompt_payload = {
-        "input_recipe": input_recipe,
-        "context": {
+
+def build_generation_prompt(input_recipe: dict, user_info: dict, environment_context: dict, context: Optional[dict] = None) -> str:
+    """
+    Final generation prompt: produce the Recipe schema JSON, centered around the
+    available ingredients, using the matched recipe as context when given.
+    """
+    available_ingredients_str = ", ".join(environment_context.get("availability", []))
+    context_str = ""
+    if context is not None:
+        context_str = "RECIPE CONTEXT: " + json.dumps({
             "name": context.get("TranslatedRecipeName"),
             "ingredients": context.get("Cleaned-Ingredients"),
             "instructions": context.get("TranslatedInstructions"),
             "cuisine": context.get("Cuisine")
-        },
-        "userInfo": userInfo,
-        "environmentContext": environmentContext
-    }
-else:
-    prompt_payload = {
-        "input_recipe": input_recipe,
-        "userInfo": userInfo,
-        "environmentContext": environmentContext
-    }
-
-# Final generation prompt asks the model to produce the Recipe schema JSON, using context when available
-# Modified prompt to center recipe around available ingredients with deterministic matching
-available_ingredients_str = ", ".join(environmentContext["availability"])
-ingredient_mappings_str = json.dumps(INGREDIENT_MAPPINGS, indent=2)
-
-prompt = f"""
+        }, ensure_ascii=False)
+
+    return f"""
 Generate a recipe for {input_recipe['recipeName']} using ONLY the available ingredients listed below:
 
 STRICTLY AVAILABLE INGREDIENTS: {available_ingredients_str}
@@ -342,92 +232,270 @@ STRICT CONSTRAINTS:
 - If you absolutely need onions, tomatoes, ginger, garlic, or other fresh items, add them to 'ingredients_to_buy'
 - Prefer simple recipes that work with the limited available ingredients
 
-USER CONTEXT: {json.dumps(userInfo, ensure_ascii=False)}
-ENVIRONMENT: {json.dumps(environmentContext, ensure_ascii=False)}
-{"RECIPE CONTEXT: " + json.dumps(prompt_payload.get("context", {}), ensure_ascii=False) if use_context else ""}
+USER CONTEXT: {json.dumps(user_info, ensure_ascii=False)}
+ENVIRONMENT: {json.dumps(environment_context, ensure_ascii=False)}
+{context_str}
 
 Return JSON matching the Recipe schema. Keep ingredients_to_buy minimal and realistic.
 """
 
-response = client.models.generate_content(
-    model="models/gemini-2.5-flash",
-    config=types.GenerateContentConfig(
-        system_instruction="Generate a recipe in the given schema, centered around the user's available ingredients. Prioritize using available items, considering synonyms and categories. Be deterministic and consistent in ingredient selection. Populate ingredients_to_buy only with absolutely essential items not available.",
-        response_schema=Recipe,
-        temperature=0.1  # Lower temperature for more consistency
-    ),
-    contents=prompt
-)
-
-
-def write_json(obj, path="generatedRecipe.json"):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
 
+def parse_recipe(response) -> dict:
+    """
+    The generated recipe as a dict: the parsed Recipe when the schema was
+    honoured, else the first JSON object in the raw text (markdown fences stripped).
+    Raises ValueError when there is none.
+    """
+    try:
+        parsed = response.parsed
+    except Exception:
+        parsed = None
+    if isinstance(parsed, Recipe):
+        return parsed.model_dump()
+    if isinstance(parsed, dict):
+        return parsed
 
-if hasattr(response, "parsed") and response.parsed is not None:
-    # Response parsed directly into the Pydantic model
-    recipe_obj: Recipe = response.parsed
-    
-    # Use consistent ingredient matching instead of fallback logic
-    print("🔍 Analyzing ingredient availability with consistent matching:")
-    consistent_to_buy = get_consistent_ingredients_to_buy(
-        [{"name": ing.name} for ing in recipe_obj.ingredients], 
-        environmentContext["availability"]
-    )
-    
-    # Override the AI's ingredients_to_buy with our consistent analysis
-    recipe_obj.ingredients_to_buy = consistent_to_buy
-    
-    # Convert to dict and save
-    json_recipe = recipe_obj.dict()
-    write_json(json_recipe)
-    
-    print(f"\n✅ Recipe generated and saved to generatedRecipe.json")
-    print(f"📝 Ingredients needed: {len(recipe_obj.ingredients)} total")
-    print(f"🛒 Items to buy: {len(recipe_obj.ingredients_to_buy)} ({', '.join(recipe_obj.ingredients_to_buy) if recipe_obj.ingredients_to_buy else 'None - all ingredients available!'})")
-    
-else:
-    # Fallback: try to extract JSON from response.text (strip markdown fences)
     raw = getattr(response, "text", None) or str(response)
-
-    # Remove triple-backtick blocks and extract first JSON object
     m = re.search(r'```(?:json)?\s*(.*?)\s*```', raw, re.DOTALL | re.IGNORECASE)
     if m:
         raw = m.group(1)
-
     start = raw.find('{')
     end = raw.rfind('}')
-    if start != -1 and end != -1 and end > start:
-        candidate = raw[start:end+1]
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object in the response")
+    return json.loads(raw[start:end+1])
+
+
+class RecipeGenerator:
+    """
+    Generates recipes for (input_recipe, userInfo, environmentContext) requests.
+
+    Each request finds candidates in the shared recipe index and decides
+    whether they match (verification), then generates the recipe, using the
+    top candidate as context when they do. Verification is local
+    (recipe_relevance) unless the local score is ambiguous, in which case the
+    LLM is asked. LLM calls go through llm_gateway.
+    generate_many() runs up to `max_concurrency` requests at once and yields
+    results as they complete.
+    """
+
+    def __init__(self, recipes_path: str = recipe_index.RECIPES_FILE, api_key_env: str = API_KEY_ENV,
+                 max_concurrency: int = RECIPE_GEN_CONCURRENCY):
+        self.recipes_path = recipes_path
+        self.api_key_env = api_key_env
+        self.max_concurrency = max(1, max_concurrency)
+        self._lock = threading.Lock()
+        self._counts = {"local_accept": 0, "local_reject": 0, "llm": 0, "llm_failed": 0}
+        self._verify_llm_ms = deque(maxlen=200)
+
+    def _count(self, name: str, llm_ms: Optional[float] = None):
+        with self._lock:
+            self._counts[name] += 1
+            if llm_ms is not None:
+                self._verify_llm_ms.append(llm_ms)
+
+    def candidates(self, tags: List[str], top_k: int = 3) -> List[dict]:
+        index = recipe_index.get_recipe_index(self.recipes_path)
+        return index.find_matches(tags, top_k) if index is not None else []
+
+    async def verify(self, input_recipe: dict, candidates: List[dict]) -> Tuple[bool, str, str]:
+        """
+        (use_context, reason, verified_by) for the candidates found for input_recipe;
+        verified_by is "local", "llm", or "fallback" when the LLM gave no usable answer.
+        """
+        relevance = recipe_relevance.RelevanceScorer(recipe_index.get_recipe_index(self.recipes_path)).score(
+            input_recipe, candidates
+        )
+        if relevance.decision is not None:
+            self._count("local_accept" if relevance.decision else "local_reject")
+            return relevance.decision, relevance.reason, "local"
+
+        started = time.perf_counter()
         try:
-            parsed = json.loads(candidate)
-            
-            # Use consistent ingredient matching for fallback case too
-            print("🔍 Analyzing ingredient availability with consistent matching (fallback):")
-            recipe_ingredients = []
-            for ing in parsed.get("ingredients", []):
-                if isinstance(ing, dict):
-                    name = (ing.get("name") or ing.get("ingredient") or 
-                           ing.get("ingredientName") or ing.get("ingredient_name") or 
-                           ing.get("item") or "").strip()
-                    if name:
-                        recipe_ingredients.append({"name": name})
-            
-            consistent_to_buy = get_consistent_ingredients_to_buy(recipe_ingredients, environmentContext["availability"])
-            parsed["ingredients_to_buy"] = consistent_to_buy
-            
-            write_json(parsed)
-            print("✅ Parsed JSON from raw response and saved to generatedRecipe.json")
-            print(f"🛒 Items to buy: {len(consistent_to_buy)} ({', '.join(consistent_to_buy) if consistent_to_buy else 'None - all ingredients available!'})")
-                
+            resp = await llm_gateway.generate(
+                build_verification_prompt(input_recipe, candidates),
+                model=VERIFY_MODEL,
+                system_instruction=VERIFY_SYSTEM_INSTRUCTION,
+                response_mime_type="application/json",
+                response_schema=Verification,
+                api_key_env=self.api_key_env,
+                label="recipes.verify",
+            )
+            verified = resp.parsed
         except Exception as e:
-            debug_path = "generatedRecipe.raw.txt"
-            with open(debug_path, "w", encoding="utf-8") as f:
-                f.write(raw)
-            print(f"Could not parse JSON from raw response: {e}; wrote raw to {debug_path}")
-    else:
-        debug_path = "generatedRecipe.raw.txt"
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(raw)
-        print(f"No JSON object found in response; wrote raw response to {debug_path}")
\ No newline at end of file
+            print(f"⚠️ Recipe verification failed: {e}")
+            verified = None
+        if isinstance(verified, Verification):
+            self._count("llm", (time.perf_counter() - started) * 1000)
+            return bool(verified.match and verified.use_context), verified.reason, "llm"
+        self._count("llm_failed")
+        # If verification failed or couldn't parse, fall back to using context since we have candidates
+        return True, "verification unavailable", "fallback"
+
+    def verify_stats(self) -> dict:
+        """How verifications were decided, and the LLM latency the local ones saved."""
+        with self._lock:
+            counts = dict(self._counts)
+            samples = list(self._verify_llm_ms)
+        skipped = counts["local_accept"] + counts["local_reject"]
+        total = skipped + counts["llm"] + counts["llm_failed"]
+        avg_ms = sum(samples) / len(samples) if samples else None
+        return {
+            **counts,
+            "total": total,
+            "skipped": skipped,
+            "skip_rate": round(skipped / total, 3) if total else None,
+            "llm_avg_ms": round(avg_ms, 1) if avg_ms is not None else None,
+            # estimated from the measured LLM verification latency
+            "saved_ms": round(skipped * avg_ms, 1) if avg_ms is not None else None,
+            "accept_threshold": recipe_relevance.RECIPE_VERIFY_ACCEPT,
+            "reject_threshold": recipe_relevance.RECIPE_VERIFY_REJECT,
+        }
+
+    async def generate(self, input_recipe: dict, user_info: dict, environment_context: dict) -> dict:
+        """
+        Generate one recipe. Returns {"recipe", "used_context", "context_name",
+        "reason", "verified_by", "timings"}; ingredients_to_buy is recomputed
+        deterministically.
+        """
+        started = time.perf_counter()
+        candidates = self.candidates(input_recipe.get("tags", []))
+        use_context, reason, verified_by = await self.verify(input_recipe, candidates)
+        verified_at = time.perf_counter()
+        context = candidates[0]["recipe"] if use_context and candidates else None
+
+        response = await llm_gateway.generate(
+            build_generation_prompt(input_recipe, user_info, environment_context, context),
+            model=GENERATE_MODEL,
+            system_instruction=GENERATE_SYSTEM_INSTRUCTION,
+            temperature=0.1,  # Lower temperature for more consistency
+            response_mime_type="application/json",
+            response_schema=Recipe,
+            api_key_env=self.api_key_env,
+            label="recipes.generate",
+        )
+        recipe = parse_recipe(response)
+        # Override the AI's ingredients_to_buy with our consistent analysis
+        pantry = availability.engine.pantry(environment_context.get("availability", []))
+        recipe["ingredients_to_buy"], _ = pantry.shopping_list(recipe.get("ingredients", []))
+        done_at = time.perf_counter()
+        return {
+            "recipe": recipe,
+            "used_context": context is not None,
+            "context_name": context.get("TranslatedRecipeName") if context else None,
+            "reason": reason,
+            "verified_by": verified_by,
+            "timings": {
+                "verify_ms": round((verified_at - started) * 1000, 1),
+                "generate_ms": round((done_at - verified_at) * 1000, 1),
+                "total_ms": round((done_at - started) * 1000, 1),
+            },
+        }
+
+    async def generate_many(self, requests: List[Tuple[dict, dict, dict]]) -> AsyncIterator[dict]:
+        """
+        Generate recipes for (input_recipe, userInfo, environmentContext)
+        tuples, yielding {"index", "status": "done"|"error", ...} as each
+        one completes. Requests still running are cancelled if the consumer stops.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(i, request):
+            async with semaphore:
+                try:
+                    return {"index": i, "status": "done", **(await self.generate(*request))}
+                except Exception as e:
+                    print(f"❌ Recipe generation failed for request {i}: {e}")
+                    return {"index": i, "status": "error", "error": str(e)}
+
+        tasks = [asyncio.ensure_future(run(i, r)) for i, r in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+generator = RecipeGenerator()
+
+
+# ---------- API ----------
+class RecipeRequest(BaseModel):
+    recipeName: str
+    tags: List[str] = []
+    userId: Optional[str] = user_state.DEFAULT_USER_ID
+    userInfo: Optional[dict] = None
+    environmentContext: Optional[dict] = None
+
+
+class RecipeBatchRequest(BaseModel):
+    requests: List[RecipeRequest]
+
+
+def _request_args(request: RecipeRequest) -> Tuple[dict, dict, dict]:
+    """(input_recipe, userInfo, environmentContext), filling the last two from the user's stored state."""
+    user_id = request.userId or user_state.DEFAULT_USER_ID
+    if not user_state.valid_user_id(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user_id")
+    user_info = request.userInfo or user_state.store.get(user_id, "userInfo") or userInfo
+    environment_context = request.environmentContext or user_state.store.get(user_id, "environmentContext") or environmentContext
+    return {"recipeName": request.recipeName, "tags": request.tags}, user_info, environment_context
+
+
+@router.post("/generate")
+async def generate_recipe(request: RecipeRequest):
+    """Generate one recipe"""
+    try:
+        return await generator.generate(*_request_args(request))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Recipe generation failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Recipe generation failed: {str(e)}")
+
+
+@router.get("/verification")
+async def verification_stats():
+    """Verifications decided locally vs by the LLM, and the latency saved"""
+    return generator.verify_stats()
+
+
+@router.post("/generate/batch")
+async def generate_recipes(batch: RecipeBatchRequest):
+    """Generate many recipes; one NDJSON line per recipe, in completion order (`index` is its position)"""
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="No recipe requests")
+    if len(batch.requests) > RECIPE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {RECIPE_BATCH_MAX} recipes per batch")
+    requests = [_request_args(r) for r in batch.requests]
+
+    async def lines():
+        async for result in generator.generate_many(requests):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def write_json(obj, path="generatedRecipe.json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    # If the API key is not set, write the prompt locally and exit so the script is safe to run without credentials.
+    if not api_key:
+        write_json({"input_recipe": input_recipe}, "prompt.json")
+        print("No GEMINI_API_KEY found in environment. Wrote prompt object to prompt.json and exiting.")
+        raise SystemExit(0)
+
+    result = asyncio.run(generator.generate(input_recipe, userInfo, environmentContext))
+    if result["used_context"]:
+        print('console.log: using context from recipes1.json')
+    recipe = result["recipe"]
+    print("🔍 Analyzing ingredient availability with consistent matching:")
+    to_buy = get_consistent_ingredients_to_buy(recipe.get("ingredients", []), environmentContext["availability"])
+    write_json(recipe)
+    print(f"\n✅ Recipe generated and saved to generatedRecipe.json")
+    print(f"📝 Ingredients needed: {len(recipe.get('ingredients', []))} total")
+    print(f"🛒 Items to buy: {len(to_buy)} ({', '.join(to_buy) if to_buy else 'None - all ingredients available!'})")
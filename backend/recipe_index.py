@@ -0,0 +1,135 @@
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import recipe_corpus
+from recipe_corpus import RECIPES_FILE
+from text_index import InvertedIndex, tokenize
+
+MATCH_FIELDS = ("TranslatedRecipeName", "Cleaned-Ingredients", "TranslatedIngredients")
+# Tag words whose matching recipes are remembered per index
+_WORD_CACHE_SIZE = 4096
+
+
+class RecipeIndex:
+    """
+    Token inverted index over recipes1.json-style recipes, built once.
+
+    find_matches() scores recipes like recipe_generator's original scan, one
+    point per (tag, field) pair where the tag occurs in the field, but looks
+    the tags up in the index instead of substring-testing every recipe. A tag
+    occurs in a field when each of its words starts a word of the field, so
+    "tomato" still finds "tomatoes". scoring="bm25" ranks by BM25 summed over
+    the fields instead.
+    """
+
+    def __init__(self, recipes: Sequence[dict], source: str = "memory"):
+        self.recipes = recipes
+        self.source = source
+        started = time.perf_counter()
+        self.index = InvertedIndex(MATCH_FIELDS)
+        for recipe in recipes:
+            self.index.add(recipe)
+        self.index.finalize()
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self._word_cache: Dict[tuple, frozenset] = {}
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def _word_docs(self, field: str, word: str) -> frozenset:
+        key = (field, word)
+        docs = self._word_cache.get(key)
+        if docs is None:
+            postings = self.index.postings[field]
+            found: Set[int] = set()
+            for term in self.index.prefix_terms(field, word, max_terms=256):
+                found.update(postings[term])
+            docs = frozenset(found)
+            if len(self._word_cache) >= _WORD_CACHE_SIZE:
+                self._word_cache.clear()
+            self._word_cache[key] = docs
+        return docs
+
+    def _tag_docs(self, field: str, tag: str) -> frozenset:
+        docs = None
+        for word in tokenize(tag):
+            found = self._word_docs(field, word)
+            docs = found if docs is None else docs & found
+            if not docs:
+                return frozenset()
+        return docs or frozenset()
+
+    def scores(self, tags: Iterable[str], scoring: str = "count") -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        tags = [t for t in tags if t]
+        if scoring == "bm25":
+            query = " ".join(tags)
+            for field in MATCH_FIELDS:
+                for doc_id, score in self.index.score(query, field, prefix=False).items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+            return scores
+        counts = Counter()
+        for field in MATCH_FIELDS:
+            for tag in tags:
+                counts.update(self._tag_docs(field, tag))
+        return counts
+
+    def find_matches(self, tags: Iterable[str], top_k: int = 3, scoring: str = "count") -> List[dict]:
+        """Top `top_k` recipes as {"score", "recipe", "snippet"}; ties keep file order."""
+        scores = self.scores(tags, scoring)
+        if not scores or top_k <= 0:
+            return []
+        # only recipes scoring at least the k-th best score can make the cut
+        threshold = heapq.nlargest(top_k, scores.values())[-1]
+        ids = sorted(doc_id for doc_id, score in scores.items() if score >= threshold)
+        ids.sort(key=scores.__getitem__, reverse=True)  # stable: ties stay in file order
+        best = [(doc_id, scores[doc_id]) for doc_id in ids[:top_k]]
+        matches = []
+        for doc_id, score in best:
+            recipe = self.recipes[doc_id]
+            snippet = " ".join(recipe.get(key, "") or "" for key in MATCH_FIELDS)[:800]
+            matches.append({"score": score, "recipe": recipe, "snippet": snippet})
+        return matches
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "recipes": len(self.recipes),
+            "terms": {field: len(self.index.vocab[field]) for field in MATCH_FIELDS},
+            "build_ms": round(self.build_ms, 1),
+        }
+
+
+_indexes: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+
+def load_recipes(path: str = RECIPES_FILE) -> List[dict]:
+    """Plain recipe dicts from a recipes file ([] when it can't be read)."""
+    try:
+        return recipe_corpus.read_recipes(path)
+    except Exception:
+        return []
+
+
+def get_recipe_index(path: str = RECIPES_FILE) -> Optional[RecipeIndex]:
+    """The RecipeIndex over the shared RecipeCorpus for a recipes file, rebuilt when the corpus is reloaded."""
+    try:
+        corpus = recipe_corpus.get_corpus(path)
+    except ValueError:
+        corpus = recipe_corpus.RecipeCorpus([], source=path)
+    if corpus is None:
+        return None
+    cached = _indexes.get(path)
+    if cached is not None and cached[0] is corpus:
+        return cached[1]
+    with _lock:
+        cached = _indexes.get(path)
+        if cached is not None and cached[0] is corpus:
+            return cached[1]
+        index = RecipeIndex(corpus, source=path)
+        _indexes[path] = (corpus, index)
+    return index
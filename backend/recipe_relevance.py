@@ -0,0 +1,100 @@
+import os
+from typing import List, NamedTuple, Optional, Set
+
+from dotenv import load_dotenv
+
+from recipe_classifier import dish_name
+from text_index import tokenize
+
+load_dotenv()
+
+# Local relevance at or above ACCEPT uses the top candidate as context and at
+# or below REJECT generates without it; only scores in between are sent to
+# the verification LLM call. Calibrated with benchmarks/bench_relevance.py.
+RECIPE_VERIFY_ACCEPT = float(os.getenv("RECIPE_VERIFY_ACCEPT", "0.7"))
+RECIPE_VERIFY_REJECT = float(os.getenv("RECIPE_VERIFY_REJECT", "0.35"))
+
+# Weights of the features in the relevance score (they sum to 1)
+NAME_WEIGHT = 0.45
+TAG_WEIGHT = 0.25
+INGREDIENT_WEIGHT = 0.2
+MARGIN_WEIGHT = 0.1
+
+
+class Relevance(NamedTuple):
+    score: float
+    name_coverage: float
+    tag_coverage: float
+    ingredient_overlap: float
+    margin: float
+    # True: use the top candidate, False: don't, None: ask the LLM
+    decision: Optional[bool]
+    reason: str
+
+
+def _covered(words: List[str], tokens: Set[str]) -> bool:
+    """Every word starts some token ("tomato" covers "tomatoes")."""
+    return all(w in tokens or any(t.startswith(w) for t in tokens) for w in words)
+
+
+def _share(phrases: List[List[str]], tokens: Set[str]) -> float:
+    return sum(1 for words in phrases if _covered(words, tokens)) / len(phrases) if phrases else 0.0
+
+
+class RelevanceScorer:
+    """
+    Scores how well the top find_matches() candidate fits an input recipe.
+
+    Features, each in [0, 1]:
+      - name coverage: words of the requested dish found in the candidate's
+        name and tags
+      - tag coverage: input tags found anywhere in the candidate
+      - ingredient overlap: input tags that name an ingredient in the corpus
+        and appear among the candidate's ingredients (neutral 0.5 when no
+        tag names an ingredient)
+      - margin: how far the top candidate's match score is ahead of the next
+    """
+
+    def __init__(self, index=None, accept: float = RECIPE_VERIFY_ACCEPT, reject: float = RECIPE_VERIFY_REJECT):
+        self.index = index
+        self.accept = accept
+        self.reject = reject
+
+    def _is_ingredient(self, words: List[str]) -> bool:
+        if self.index is None:
+            return False
+        return all(self.index.index.prefix_terms("Cleaned-Ingredients", w, max_terms=1) for w in words)
+
+    def score(self, input_recipe: dict, candidates: List[dict]) -> Relevance:
+        if not candidates:
+            return Relevance(0.0, 0.0, 0.0, 0.0, 0.0, False, "no candidates in the recipe corpus")
+        top = candidates[0]["recipe"]
+        name_tokens = set(tokenize(dish_name(top.get("TranslatedRecipeName") or ""))) | set(tokenize(top.get("tags")))
+        ingredient_tokens = set(tokenize(top.get("Cleaned-Ingredients")))
+        all_tokens = name_tokens | ingredient_tokens | set(tokenize(top.get("TranslatedIngredients")))
+
+        dish_words = tokenize(dish_name(input_recipe.get("recipeName") or ""))
+        tags = [words for words in (tokenize(t) for t in input_recipe.get("tags") or []) if words]
+        name_coverage = _share([[w] for w in dish_words], name_tokens)
+        tag_coverage = _share(tags, all_tokens)
+        ingredient_tags = [words for words in tags if self._is_ingredient(words)]
+        ingredient_overlap = _share(ingredient_tags, ingredient_tokens) if ingredient_tags else 0.5
+        best = candidates[0].get("score") or 0
+        runner_up = (candidates[1].get("score") or 0) if len(candidates) > 1 else 0
+        margin = (best - runner_up) / best if best else 0.0
+
+        score = round(
+            NAME_WEIGHT * name_coverage + TAG_WEIGHT * tag_coverage
+            + INGREDIENT_WEIGHT * ingredient_overlap + MARGIN_WEIGHT * margin, 3
+        )
+        if score >= self.accept:
+            decision, reason = True, f"local match {score:.2f} with '{top.get('TranslatedRecipeName')}'"
+        elif score <= self.reject:
+            decision, reason = False, f"local match {score:.2f}: candidates do not fit the request"
+        else:
+            decision, reason = None, f"local match {score:.2f} is ambiguous"
+        return Relevance(score, name_coverage, tag_coverage, ingredient_overlap, round(margin, 3), decision, reason)
+
+
+def score(input_recipe: dict, candidates: List[dict], index=None) -> Relevance:
+    return RelevanceScorer(index).score(input_recipe, candidates)
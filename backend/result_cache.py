@@ -0,0 +1,122 @@
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query) -> str:
+    """Case- and whitespace-insensitive form of a search query, used in cache keys."""
+    return _SPACE_RE.sub(" ", str(query or "")).strip().lower()
+
+
+def search_key(query, search_path: str = "dish_name", limit: int = 10) -> tuple:
+    return (normalize_query(query), search_path, int(limit))
+
+
+class TTLCache:
+    """
+    Thread-safe bounded cache with per-entry TTL and LRU eviction.
+
+    Entries older than `ttl` seconds are treated as misses; when the cache is
+    full the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (hit, value)."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        hit, value = self.get(key)
+        if not hit:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class ShuffledPool:
+    """
+    Pre-shuffled pool of documents served in slices.
+
+    Replaces a $sample aggregation per request: the pool is filled once, and
+    each take() returns the next `n` documents, reshuffling locally when the
+    pool has been walked through.
+    """
+
+    def __init__(self, docs: List[dict]):
+        self.docs = list(docs)
+        random.shuffle(self.docs)
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> List[dict]:
+        if not self.docs:
+            return []
+        n = min(n, len(self.docs))
+        with self._lock:
+            if self._pos + n > len(self.docs):
+                random.shuffle(self.docs)
+                self._pos = 0
+            out = self.docs[self._pos:self._pos + n]
+            self._pos += n
+        return out
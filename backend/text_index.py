@@ -0,0 +1,117 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> List[str]:
+    """Lowercase alphanumeric tokens of a string (or list of strings)."""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(t) for t in text if t)
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class InvertedIndex:
+    """
+    Field-aware inverted index with BM25 scoring and prefix expansion.
+
+    Documents are identified by their integer position (the order they were
+    added in). Call finalize() once after adding documents; the index is
+    read-only afterwards, so a built index can be shared between threads and
+    swapped atomically when a fresh one is built.
+    """
+
+    def __init__(self, fields: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, Dict[int, int]]] = {f: defaultdict(dict) for f in self.fields}
+        self.doc_lengths: Dict[str, List[int]] = {f: [] for f in self.fields}
+        self.avg_lengths: Dict[str, float] = {}
+        self.norms: Dict[str, List[float]] = {}
+        self.vocab: Dict[str, List[str]] = {}
+        self.doc_count = 0
+
+    def add(self, doc: dict) -> int:
+        doc_id = self.doc_count
+        for field in self.fields:
+            tokens = tokenize(doc.get(field))
+            self.doc_lengths[field].append(len(tokens))
+            postings = self.postings[field]
+            for tok in tokens:
+                postings[tok][doc_id] = postings[tok].get(doc_id, 0) + 1
+        self.doc_count += 1
+        return doc_id
+
+    def finalize(self) -> "InvertedIndex":
+        for field in self.fields:
+            lengths = self.doc_lengths[field]
+            avg = (sum(lengths) / len(lengths)) if lengths else 0.0
+            self.avg_lengths[field] = avg
+            # BM25 length normalisation depends only on the document, so precompute it
+            self.norms[field] = [self.k1 * (1 - self.b + self.b * n / (avg or 1.0)) for n in lengths]
+            self.postings[field] = dict(self.postings[field])
+            self.vocab[field] = sorted(self.postings[field])
+        return self
+
+    def prefix_terms(self, field: str, prefix: str, max_terms: int = 64) -> List[str]:
+        """Vocabulary terms of `field` starting with `prefix`, most frequent first."""
+        vocab = self.vocab.get(field) or []
+        start = bisect_left(vocab, prefix)
+        terms = []
+        for i in range(start, len(vocab)):
+            term = vocab[i]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if len(terms) > max_terms:
+            postings = self.postings[field]
+            terms = heapq.nlargest(max_terms, terms, key=lambda t: len(postings[t]))
+        return terms
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _expand(self, field: str, tokens: List[str], prefix: bool) -> List[Tuple[str, float]]:
+        postings = self.postings[field]
+        weighted = []
+        for i, tok in enumerate(tokens):
+            if tok in postings:
+                weighted.append((tok, 1.0))
+            # the last token is still being typed; unknown tokens may be truncated
+            if prefix and (i == len(tokens) - 1 or tok not in postings):
+                for term in self.prefix_terms(field, tok):
+                    if term != tok:
+                        weighted.append((term, len(tok) / len(term)))
+        return weighted
+
+    def score(self, query: str, field: str, prefix: bool = True) -> Dict[int, float]:
+        """BM25 scores of every document matching any query token in `field`."""
+        if field not in self.postings:
+            return {}
+        tokens = tokenize(query)
+        postings = self.postings[field]
+        norms = self.norms[field]
+        k1 = self.k1
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in self._expand(field, tokens, prefix):
+            docs = postings[term]
+            idf = self._idf(len(docs)) * weight * (k1 + 1)
+            for doc_id, tf in docs.items():
+                scores[doc_id] += idf * tf / (tf + norms[doc_id])
+        return scores
+
+    def search(self, query: str, field: str, limit: int = 10, prefix: bool = True) -> List[Tuple[int, float]]:
+        """Top `limit` (doc_id, score) pairs for `query` in `field`."""
+        scores = self.score(query, field, prefix)
+        return heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+
+    def matching_docs(self, term: str, field: str) -> Optional[Dict[int, int]]:
+        """Raw postings (doc_id -> term frequency) for an exact term."""
+        return self.postings.get(field, {}).get(term)
@@ -0,0 +1,227 @@
+import heapq
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional
+
+import food_search
+
+BASE_DIR = os.path.dirname(__file__)
+TYPEAHEAD_INGREDIENTS_FILE = os.getenv(
+    "TYPEAHEAD_INGREDIENTS_FILE",
+    os.path.join(BASE_DIR, "..", "frontend", "recipeApp", "ingredients.json"),
+)
+RECIPES_FILE = os.path.join(BASE_DIR, "recipes1.json")
+
+# Prefixes this short match a large slice of the key space, so their ranked
+# results are memoised until popularity or the corpus changes.
+CACHED_PREFIX_LEN = 2
+
+_SPACE_RE = re.compile(r"\s+")
+_WORD_START_RE = re.compile(r"(?:^|[\s(/,-])(?=\w)")
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", str(text or "").lower()).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index for autocomplete.
+
+    Every entry is reachable from the start of any of its words, so "paneer"
+    completes to "Palak Paneer". Lookups are a bisect into the sorted keys
+    followed by a popularity-ranked top-k over the matching range.
+    """
+
+    def __init__(self, entries: List[dict], popularity: Counter):
+        self.entries = entries
+        self.popularity = popularity
+        self.names = [normalize(entry["name"]) for entry in entries]
+        # rank = (popularity, shorter names first), precomputed so lookups only index lists
+        self.ranks = [(popularity[name], -len(name)) for name in self.names]
+        self.positions: Dict[str, int] = {name: idx for idx, name in enumerate(self.names)}
+        keyed = []
+        for idx, name in enumerate(self.names):
+            for m in _WORD_START_RE.finditer(name):
+                keyed.append((name[m.end():], idx))
+        keyed.sort()
+        self.keys = [k for k, _ in keyed]
+        self.ids = [i for _, i in keyed]
+        self._cache: Dict[tuple, List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        cache_key = (prefix, limit)
+        if len(prefix) <= CACHED_PREFIX_LEN:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\uffff", lo=start)
+        matched = set(self.ids[start:end])
+        top = heapq.nlargest(limit, matched, key=self.ranks.__getitem__)
+        results = [self.entries[i] for i in top]
+
+        if len(prefix) <= CACHED_PREFIX_LEN:
+            with self._lock:
+                self._cache[cache_key] = results
+        return results
+
+    def bump(self, names: List[str]):
+        """Increase popularity of selected names (e.g. foods the user just logged)."""
+        with self._lock:
+            for name in names:
+                key = normalize(name)
+                self.popularity[key] += 1
+                idx = self.positions.get(key)
+                if idx is not None:
+                    self.ranks[idx] = (self.popularity[key], -len(key))
+            self._cache.clear()
+
+
+def _load_ingredient_names() -> List[str]:
+    try:
+        with open(TYPEAHEAD_INGREDIENTS_FILE, "r", encoding="utf-8") as f:
+            return [n for n in json.load(f) if isinstance(n, str)]
+    except Exception as e:
+        print(f"❌ Could not load typeahead ingredients: {e}")
+        return []
+
+
+def _ingredient_frequencies(food_docs: List[dict]) -> Counter:
+    """How often each ingredient appears across recipes1.json and the food snapshot."""
+    counts = Counter()
+    try:
+        with open(RECIPES_FILE, "r", encoding="utf-8") as f:
+            for recipe in json.load(f):
+                for ing in (recipe.get("Cleaned-Ingredients") or "").split(","):
+                    counts[normalize(ing)] += 1
+    except Exception:
+        pass
+    for doc in food_docs:
+        ings = doc.get("ingredients") or []
+        if isinstance(ings, str):
+            ings = ings.split(",")
+        for ing in ings:
+            counts[normalize(ing)] += 1
+    return counts
+
+
+def build_index(food_docs: Optional[List[dict]] = None, selections: Optional[Counter] = None) -> PrefixIndex:
+    """Build the autocomplete index from dish names in the food snapshot plus ingredients.json."""
+    food_docs = food_docs or []
+    popularity = _ingredient_frequencies(food_docs)
+    entries = []
+    seen = set()
+    for doc in food_docs:
+        name = (doc.get("dish_name") or "").strip()
+        key = normalize(name)
+        if not name:
+            continue
+        # dishes that appear many times in the collection are popular too
+        popularity[key] += 1
+        if key in seen:
+            continue
+        seen.add(key)
+        entries.append({
+            "name": name,
+            "calories": round(doc.get("calories_kcal") or 0),
+            "protein": round(doc.get("protein_g") or 0, 1),
+            "carbs": 0,
+            "fat": 0,
+            "unit": "serving",
+            "type": "dish",
+        })
+    for name in _load_ingredient_names():
+        key = normalize(name)
+        if key in seen:
+            continue
+        seen.add(key)
+        entries.append({
+            "name": name,
+            "calories": 0,
+            "protein": 0,
+            "carbs": 0,
+            "fat": 0,
+            "unit": "serving",
+            "type": "ingredient",
+        })
+    if selections:
+        popularity.update(selections)
+    return PrefixIndex(entries, popularity)
+
+
+_index: Optional[PrefixIndex] = None
+_selections = Counter()
+_build_lock = threading.Lock()
+
+
+def rebuild(food_index=None) -> PrefixIndex:
+    global _index
+    # builds are serialized so a slower build from an older food index
+    # (a lazy build in get_index) cannot replace one from a newer reload
+    with _build_lock:
+        food_index = food_index or food_search.get_index()
+        docs = food_index.docs if food_index is not None else []
+        _index = build_index(docs, _selections)
+        return _index
+
+
+def warm_up():
+    """
+    Build the index ahead of the first suggest() when no food index reload is
+    coming to do it. Called from the app lifespan: with the local food search
+    backend the snapshot is still loading then, and on_reload builds the index
+    in the refresh thread once it is ready.
+    """
+    if _index is None and (food_search.FOOD_SEARCH_BACKEND != "local" or food_search.get_index() is not None):
+        rebuild()
+
+
+def get_index() -> PrefixIndex:
+    index = _index
+    if index is None:
+        index = rebuild()
+    return index
+
+
+def suggest(prefix: str, limit: int = 10) -> List[dict]:
+    return get_index().complete(prefix, limit)
+
+
+def record_selection(names: List[str]):
+    """Feed logged foods back into the ranking."""
+    names = [n for n in names if isinstance(n, str) and n.strip()]
+    if not names:
+        return
+    _selections.update(normalize(n) for n in names)
+    if _index is not None:
+        _index.bump(names)
+
+
+def record_meal_log(meal_log: dict):
+    """record_selection for every food in a {meal_type: [foods] | {"foods": [...]}} log."""
+    names = []
+    for info in (meal_log or {}).values():
+        foods = info.get("foods", []) if isinstance(info, dict) else info
+        for food in foods or []:
+            if isinstance(food, dict):
+                food = food.get("name")
+            if isinstance(food, str):
+                names.append(food)
+    record_selection(names)
+
+
+# keep dish names in sync with the food search snapshot
+food_search.on_reload(rebuild)
@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+USER_STATE_DB = os.getenv("USER_STATE_DB", os.path.join(os.path.dirname(__file__), "user_state.sqlite3"))
+USER_STATE_FLUSH_SECONDS = float(os.getenv("USER_STATE_FLUSH_SECONDS", "1.0"))
+USER_STATE_CACHE_USERS = int(os.getenv("USER_STATE_CACHE_USERS", "10000"))
+
+# The user behind the original single-user routes. Its state is seeded from and
+# mirrored to the legacy JSON files, which other tools still read.
+DEFAULT_USER_ID = "default"
+KINDS = ("userInfo", "environmentContext", "mealLog", "insights")
+LEGACY_FILES = {
+    "userInfo": "user_data.json",
+    "environmentContext": "environment_context.json",
+    "mealLog": "meal_log.json",
+    "insights": "insights.json",
+}
+
+_USER_ID_RE = re.compile(r"^[A-Za-z0-9_.@-]{1,64}$")
+_MISSING = object()
+
+
+def valid_user_id(user_id: str) -> bool:
+    return bool(_USER_ID_RE.match(user_id or ""))
+
+
+class UserStateStore:
+    """
+    Per-user state (profile, environment, meal log, insights) held in memory.
+
+    Writes update memory and are persisted to SQLite by a background thread
+    every USER_STATE_FLUSH_SECONDS (write-behind), batched into one
+    transaction. Reads hit memory; a user not seen since startup is loaded
+    with one indexed query. Clean users beyond USER_STATE_CACHE_USERS are
+    dropped from memory, least recently used first.
+    """
+
+    def __init__(self, path: str = USER_STATE_DB, legacy_dir: Optional[str] = None):
+        self.path = path
+        self.legacy_dir = legacy_dir if legacy_dir is not None else os.path.dirname(os.path.abspath(__file__))
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._users: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: Dict[Tuple[str, str], Any] = {}
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reads = 0
+        self.loads = 0
+        self.writes = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.last_flush_ms = 0.0
+
+    # --- persistence ---
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_state ("
+                " user_id TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (user_id, kind))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _load_legacy(self) -> Dict[str, Any]:
+        state = {}
+        for kind, name in LEGACY_FILES.items():
+            path = os.path.join(self.legacy_dir, name)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state[kind] = json.load(f)
+            except Exception as e:
+                logger.warning(f"Failed to load {name}: {e}")
+        return state
+
+    def _load_user(self, user_id: str) -> Dict[str, Any]:
+        with self._db_lock:
+            rows = self._db().execute(
+                "SELECT kind, value FROM user_state WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        state = {kind: json.loads(value) for kind, value in rows}
+        if user_id == DEFAULT_USER_ID:
+            # files edited or written before the store existed still count
+            for kind, value in self._load_legacy().items():
+                state.setdefault(kind, value)
+        self.loads += 1
+        return state
+
+    def _with_user(self, user_id: str, fn: Callable[[Dict[str, Any]], Any]):
+        """
+        fn(state) under self._lock. A user not in memory is loaded first without
+        the lock, so a cold load never blocks other users; if another thread
+        loaded the user meanwhile, its copy wins.
+        """
+        loaded = None
+        while True:
+            with self._lock:
+                state = self._users.get(user_id)
+                if state is not None:
+                    self._users.move_to_end(user_id)
+                    return fn(state)
+                if loaded is not None:
+                    self._users[user_id] = loaded
+                    result = fn(loaded)
+                    self._evict()
+                    return result
+            loaded = self._load_user(user_id)
+
+    def _evict(self):
+        excess = len(self._users) - USER_STATE_CACHE_USERS
+        if excess <= 0:
+            return
+        dirty_users = {user_id for user_id, _ in self._dirty}
+        for user_id in list(self._users):
+            if excess <= 0:
+                break
+            if user_id not in dirty_users and user_id != DEFAULT_USER_ID:
+                del self._users[user_id]
+                excess -= 1
+
+    # --- public API ---
+    def get(self, user_id: str, kind: str, default=None):
+        def read(state):
+            self.reads += 1
+            return state.get(kind, _MISSING)
+
+        value = self._with_user(user_id, read)
+        return default if value is _MISSING else value
+
+    def put(self, user_id: str, kind: str, value):
+        if kind not in KINDS:
+            raise ValueError(f"unknown user state kind: {kind}")
+
+        def write(state):
+            state[kind] = value
+            self._dirty[(user_id, kind)] = value
+            self.writes += 1
+
+        self._with_user(user_id, write)
+        self._ensure_flusher()
+
+    def flush(self):
+        """Persist pending writes now (also run by the background thread and on shutdown)."""
+        with self._lock:
+            pending, self._dirty = self._dirty, {}
+        if not pending:
+            return
+        started = time.perf_counter()
+        now = time.time()
+        rows = [(user_id, kind, json.dumps(value, ensure_ascii=False), now) for (user_id, kind), value in pending.items()]
+        try:
+            with self._db_lock:
+                db = self._db()
+                db.executemany(
+                    "INSERT OR REPLACE INTO user_state (user_id, kind, value, updated_at) VALUES (?, ?, ?, ?)", rows
+                )
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist user state: {e}")
+            with self._lock:
+                # keep them for the next attempt unless they were overwritten meanwhile
+                for key, value in pending.items():
+                    self._dirty.setdefault(key, value)
+            return
+        for (user_id, kind), value in pending.items():
+            if user_id == DEFAULT_USER_ID:
+                self._write_legacy(kind, value)
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def _write_legacy(self, kind: str, value):
+        path = os.path.join(self.legacy_dir, LEGACY_FILES[kind])
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Failed to mirror {kind} to {path}: {e}")
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="user-state-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(USER_STATE_FLUSH_SECONDS):
+            self.flush()
+
+    def close(self):
+        """Stop the flush thread and persist everything still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "db": self.path,
+                "cached_users": len(self._users),
+                "pending_writes": len(self._dirty),
+                "reads": self.reads,
+                "loads": self.loads,
+                "writes": self.writes,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "last_flush_ms": round(self.last_flush_ms, 1),
+                "flush_interval_seconds": USER_STATE_FLUSH_SECONDS,
+            }
+
+
+store = UserStateStore()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { View, Text, StyleSheet, FlatList, Dimensions } from 'react-native';
 import { Button } from 'react-native-paper';
-import { useRouter } from 'expo-router';
+import { useRouter, useLocalSearchParams } from 'expo-router';
 import KeyInsights from './components/insights/KeyInsights';
 import ModernApproach from './components/insights/ModernApproach';
 import HeritageAlternative from './components/insights/HeritageAlternative';
@@ -16,10 +16,97 @@ const Insights = () => {
   const [currentIndex, setCurrentIndex] = useState(0);
   const flatListRef = useRef<FlatList>(null);
   const router = useRouter();
+  // Set by LogMeal when a meal log has just queued an insight generation job
+  const { jobId } = useLocalSearchParams<{ jobId?: string }>();
 
   useEffect(() => {
-    fetchInsights();
-  }, []);
+    if (!jobId) {
+      // Nothing is being generated: show the stored insights
+      fetchInsights();
+      return;
+    }
+    let abortStream: (() => void) | undefined;
+    let cancelled = false;
+    loadJob(jobId)
+      .then(stream => {
+        if (stream && !cancelled) abortStream = streamInsights();
+      });
+    return () => {
+      cancelled = true;
+      abortStream?.();
+    };
+  }, [jobId]);
+
+  // Only a queued or running job is worth streaming; a finished one already has its
+  // insights, and streaming without a job would start a fresh generation.
+  // Resolves to true when the caller should stream.
+  const loadJob = (id: string) =>
+    fetch(`http://10.20.2.95:5000/nudging/jobs/${id}`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(job => {
+        if (job && (job.status === 'queued' || job.status === 'running')) {
+          return true;
+        }
+        if (job && job.status === 'done' && job.result) {
+          console.log('Insights data received:', job.result);
+          setInsights(job.result);
+          setLoading(false);
+        } else {
+          fetchInsights();
+        }
+        return false;
+      })
+      .catch(error => {
+        console.error('Error fetching insight job:', error);
+        fetchInsights();
+        return false;
+      });
+
+  // Sections are shown as the backend streams them (Server-Sent Events); React Native's
+  // fetch cannot read a response incrementally, XMLHttpRequest's onprogress can
+  const streamInsights = () => {
+    const xhr = new XMLHttpRequest();
+    let seen = 0;
+    let received = false;
+
+    const handleEvents = () => {
+      const text = xhr.responseText;
+      const end = text.lastIndexOf('\n\n');
+      if (end < seen) return;
+      const block = text.slice(seen, end);
+      seen = end + 2;
+      block.split('\n\n').forEach(raw => {
+        const lines = raw.split('\n');
+        const event = (lines.find(line => line.startsWith('event: ')) || '').slice(7);
+        const dataLine = lines.find(line => line.startsWith('data: '));
+        if (!dataLine) return;
+        const data = JSON.parse(dataLine.slice(6));
+        if (event === 'section') {
+          received = true;
+          setInsights((prev: any) => ({ ...(prev || {}), [data.key]: data.value }));
+          setLoading(false);
+        } else if (event === 'done') {
+          received = true;
+          console.log('Insights data received:', data);
+          setInsights(data);
+          setLoading(false);
+        } else if (event === 'error') {
+          console.error('Error streaming insights:', data);
+          fetchInsights();
+        }
+      });
+    };
+
+    xhr.onprogress = handleEvents;
+    xhr.onload = () => {
+      handleEvents();
+      if (!received) fetchInsights();
+    };
+    xhr.onerror = () => fetchInsights();
+    xhr.open('GET', 'http://10.20.2.95:5000/nudging/insights/stream');
+    xhr.send();
+    return () => xhr.abort();
+  };
 
   const fetchInsights = () => {
     fetch('http://10.20.2.95:5000/nudging/insights')
@@ -124,7 +124,7 @@ const LogMeal = () => {
     return logged / mealTypes.length;
   };
 
-  // MongoDB Atlas Search function
+  // Autocomplete served from the backend's in-memory prefix index
   const searchFoods = useCallback(async (query: string, meal: MealType) => {
     if (query.length === 0) {
       setSearchResults(prev => ({ ...prev, [meal]: [] }));
@@ -133,7 +133,7 @@ const LogMeal = () => {
     }
 
     try {
-      const response = await fetch(`http://10.20.2.95:5000/search_foods?query=${encodeURIComponent(query)}&limit=5`);
+      const response = await fetch(`http://10.20.2.95:5000/search_foods/suggest?query=${encodeURIComponent(query)}&limit=5`);
       if (!response.ok) {
         throw new Error('Search request failed');
       }
@@ -678,20 +678,9 @@ const LogMeal = () => {
                 console.log('Meal log stored:', result);
                 Alert.alert('Success', 'Meal log sent to backend!');
 
-                // Fetch insights
-                fetch('http://10.20.2.95:5000/nudging/insights')
-                  .then(response => response.json())
-                  .then(insights => {
-                    console.log('Insights:', insights);
-                    setIsGeneratingPlan(false);
-                    // Navigate to Insights
-                    router.push('/Insights' as any);
-                  })
-                  .catch(error => {
-                    console.error('Error fetching insights:', error);
-                    setIsGeneratingPlan(false);
-                    Alert.alert('Error', 'Failed to fetch insights.');
-                  });
+                setIsGeneratingPlan(false);
+                // Insights are generated in the background; the Insights screen streams the job
+                router.push({ pathname: '/Insights', params: { jobId: result.job_id } } as any);
               })
               .catch(error => {
                 console.error('Error storing meal log:', error);
@@ -112,7 +112,25 @@ const Pantry = () => {
       .then(result => {
         console.log('Storage result:', result);
         AsyncStorage.setItem('pantryItems', JSON.stringify(items));
-        Alert.alert('Success', 'Pantry set successfully!');
+        return fetch('http://10.20.2.95:5000/recipes/availability', {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ pantry: environmentContext.availability, limit: 3 }),
+        })
+          .then(response => response.json())
+          .then(data => {
+            const lines = (data.recipes || []).map((r: { name: string, missing: string[] }) =>
+              r.missing.length === 0
+                ? `• ${r.name}: ready to cook`
+                : `• ${r.name}: need ${r.missing.join(', ')}`
+            );
+            Alert.alert('Success', lines.length
+              ? `Pantry set successfully!\n\nClosest recipes:\n${lines.join('\n')}`
+              : 'Pantry set successfully!');
+          })
+          .catch(() => Alert.alert('Success', 'Pantry set successfully!'));
       })
       .catch(error => {
         console.error('Error storing pantry:', error);
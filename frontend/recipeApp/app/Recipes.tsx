@@ -17,6 +17,33 @@ import { useRouter } from 'expo-router';
 import { MaterialIcons, Ionicons } from '@expo/vector-icons';
 import Animated, { FadeInUp, SlideInRight } from 'react-native-reanimated';
 import { LinearGradient } from 'expo-linear-gradient';
+import AsyncStorage from '@react-native-async-storage/async-storage';
+
+const API_BASE = 'http://10.20.2.95:5000';
+// The list only needs what the cards show; the modal fetches the full recipe
+const LIST_FIELDS = 'TranslatedRecipeName,Cuisine,TotalTimeInMins,tags';
+const PAGE_SIZE = 50;
+
+// GET with the ETag remembered from the last response: a 304 reuses the stored body
+const fetchWithETag = async (url: string) => {
+  const cacheKey = `etag:${url}`;
+  const cached = await AsyncStorage.getItem(cacheKey).then(v => (v ? JSON.parse(v) : null)).catch(() => null);
+  const response = await fetch(url, {
+    headers: cached?.etag ? { 'If-None-Match': cached.etag } : {},
+  });
+  if (response.status === 304 && cached) {
+    return cached.body;
+  }
+  if (!response.ok) {
+    throw new Error(`Request failed: ${response.status}`);
+  }
+  const body = await response.json();
+  const etag = response.headers.get('ETag');
+  if (etag) {
+    AsyncStorage.setItem(cacheKey, JSON.stringify({ etag, body })).catch(() => {});
+  }
+  return body;
+};
 
 interface Recipe {
   id: string;
@@ -70,10 +97,17 @@ const Recipes = () => {
 
   const fetchJsonRecipes = async () => {
     try {
-      const response = await fetch('http://10.20.2.95:5000/family/recipes/all');
-      if (response.ok) {
-        const data = await response.json();
-        setJsonRecipes(data.recipes || []);
+      // Page through the list; each page is revalidated with its ETag
+      let url: string | null = `${API_BASE}/family/recipes/all?limit=${PAGE_SIZE}&fields=${LIST_FIELDS}`;
+      let recipes: Recipe[] = [];
+      while (url) {
+        const data: any = await fetchWithETag(url);
+        recipes = [...recipes, ...(data.recipes || [])];
+        setJsonRecipes(recipes);
+        setRecipesLoading(false);
+        url = data.next_cursor
+          ? `${API_BASE}/family/recipes/all?limit=${PAGE_SIZE}&fields=${LIST_FIELDS}&cursor=${data.next_cursor}`
+          : null;
       }
     } catch (error) {
       console.error('Error fetching recipes:', error);
@@ -85,7 +119,7 @@ const Recipes = () => {
   const getAIRecommendations = async (query: string) => {
     setLoading(true);
     try {
-      const response = await fetch('http://10.20.2.95:5000/family/recipes/recommendations', {
+      const response = await fetch(`${API_BASE}/family/recipes/recommendations`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -189,6 +223,12 @@ const Recipes = () => {
   const openRecipeModal = (recipe: Recipe) => {
     setSelectedRecipe(recipe);
     setShowRecipeModal(true);
+    // List entries only carry the card fields; load ingredients and instructions
+    fetchWithETag(`${API_BASE}/family/recipes/${encodeURIComponent(recipe.id)}`)
+      .then((full: Recipe) => {
+        setSelectedRecipe(current => (current && current.id === recipe.id ? { ...current, ...full } : current));
+      })
+      .catch(error => console.error('Error fetching recipe details:', error));
   };
 
   const getRecipeTitle = (recipe: Recipe) => {